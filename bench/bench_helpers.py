@@ -0,0 +1,221 @@
+"""
+텍스트/포맷 헬퍼 마이크로벤치마크
+- http_server.py 의 순수 CPU 경로를 체크인된 코퍼스(bench/corpus)로 측정
+- 항목별 ns/op, 할당량(tracemalloc: 호출 중 최대 임시 할당 / 호출 후 남은 할당) 출력
+- bench/baseline.json 과 비교해 기준보다 느려진 항목은 REGRESSION 으로 표시하고 종료 코드 1
+
+실행:
+  python bench/bench_helpers.py                   # 측정 + 기준선 비교
+  python bench/bench_helpers.py --save-baseline   # 현재 결과를 기준선으로 저장
+  python bench/bench_helpers.py -k parse          # 이름에 parse 가 들어간 항목만
+  python bench/bench_helpers.py --threshold 0.3   # 허용 오차 (기본 25%)
+
+기준선은 측정한 머신에 종속되므로 배포 전 같은 머신에서 전/후를 비교할 것
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+# dict/set 배치가 실행마다 달라지지 않도록 해시 시드 고정 후 재실행
+if os.environ.get("PYTHONHASHSEED") != "0":
+    os.environ["PYTHONHASHSEED"] = "0"
+    os.execv(sys.executable, [sys.executable] + sys.argv)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from http_server import (  # noqa: E402
+    ProductName,
+    build_search_keyword,
+    detect_sort_intent,
+    extract_option_from_name,
+    format_price,
+    format_price_range,
+    get_buying_tip,
+    parse_product_name,
+    sort_products,
+)
+
+CORPUS_DIR = os.path.join(ROOT, "bench", "corpus")
+BASELINE = os.path.join(ROOT, "bench", "baseline.json")
+
+TARGET_SEC = 0.05  # 1회 측정 목표 시간
+REPEAT = 7         # 측정 반복 (최솟값 사용)
+SORT_LIST_SIZE = 20  # tool 한 번에 정렬하는 상품 수와 비슷하게
+
+
+def load_corpus(name: str) -> dict:
+    with open(os.path.join(CORPUS_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_cases() -> list:
+    """(항목 이름, 함수, 입력 리스트) - 함수는 입력 하나를 받아 1 op 수행"""
+    names = load_corpus("product_names.json")
+    keywords = load_corpus("search_keywords.json")
+
+    rng = random.Random(20261016)
+    prices = [rng.choice([0, 990, 4900, 9900, 12900, 35000, 59800, 129000, 1890000, 1890123])
+              + rng.randrange(0, 1000) * 10 for _ in range(1000)]
+    product_lists = [
+        [{"productName": rng.choice(names["realistic"]),
+          "productPrice": rng.choice([0, rng.randrange(1000, 2000000)])}
+         for _ in range(SORT_LIST_SIZE)]
+        for _ in range(50)
+    ]
+
+    cases = []
+    for group in ("realistic", "pathological"):
+        corpus = names[group]
+        cases += [
+            # cold: 캐시 없이 토크나이저만 / warm: 같은 상품명 재호출 (캐시 적중)
+            (f"analyze_product_name.cold[{group}]", ProductName, corpus),
+            (f"parse_product_name[{group}]", parse_product_name, corpus),
+            (f"extract_option_from_name[{group}]", extract_option_from_name, corpus),
+            (f"build_search_keyword[{group}]", build_search_keyword, corpus),
+        ]
+    for group in ("realistic", "pathological"):
+        corpus = keywords[group]
+        cases += [
+            (f"detect_sort_intent[{group}]", detect_sort_intent, corpus),
+            (f"get_buying_tip[{group}]", get_buying_tip, corpus),
+        ]
+    cases += [
+        ("format_price", format_price, prices),
+        ("format_price_range", format_price_range, prices),
+        ("sort_products.LOW", lambda products: sort_products(products, "LOW"), product_lists),
+        ("sort_products.HIGH", lambda products: sort_products(products, "HIGH"), product_lists),
+    ]
+    return cases
+
+
+def time_case(fn, inputs: list) -> float:
+    """ns/op (입력 전체를 number 번 돌린 시간의 최솟값 기준, timeit 처럼 GC 끔)"""
+    def run(number):
+        start = time.perf_counter()
+        for _ in range(number):
+            for value in inputs:
+                fn(value)
+        return time.perf_counter() - start
+
+    run(1)  # 워밍업 (캐시 채움)
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number = 1
+        while run(number) < TARGET_SEC:
+            number *= 2
+        best = min(run(number) for _ in range(REPEAT))
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best / (number * len(inputs)) * 1e9
+
+
+def measure_allocations(fn, inputs: list) -> tuple:
+    """(호출 중 최대 임시 할당 bytes/op, 호출 후 남은 할당 bytes/op)"""
+    tracemalloc.start()
+    try:
+        peak_total = 0
+        before, _ = tracemalloc.get_traced_memory()
+        for value in inputs:
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn(value)
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - current
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_total / len(inputs), max(after - before, 0) / len(inputs)
+
+
+def run_cases(cases: list) -> dict:
+    results = {}
+    for name, fn, inputs in cases:
+        ns_op = time_case(fn, inputs)
+        peak, retained = measure_allocations(fn, inputs)
+        results[name] = {
+            "ns_op": round(ns_op, 1),
+            "peak_bytes_op": round(peak, 1),
+            "retained_bytes_op": round(retained, 1),
+        }
+    return results
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE):
+        return None
+    with open(BASELINE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(results: dict):
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(BASELINE, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def report(results: dict, baseline, threshold: float) -> list:
+    """결과 표 출력, 기준선 대비 느려진 항목 이름 반환"""
+    base_results = (baseline or {}).get("results", {})
+    regressions = []
+
+    print(f"{'항목':<46}{'ns/op':>12}{'기준':>12}{'변화':>9}{'peak B/op':>12}{'남음 B/op':>11}")
+    for name, r in results.items():
+        base = base_results.get(name)
+        if base:
+            change = r["ns_op"] / base["ns_op"] - 1 if base["ns_op"] else 0.0
+            mark = ""
+            if change > threshold:
+                mark = "  REGRESSION"
+                regressions.append(name)
+            base_str, change_str = f"{base['ns_op']:,.0f}", f"{change:+.0%}"
+        else:
+            mark, base_str, change_str = "", "-", "-"
+        print(f"{name:<46}{r['ns_op']:>12,.0f}{base_str:>12}{change_str:>9}"
+              f"{r['peak_bytes_op']:>12,.0f}{r['retained_bytes_op']:>11,.0f}{mark}")
+
+    if baseline and baseline.get("python") != platform.python_version():
+        print(f"\n※ 기준선 Python {baseline.get('python')} / 현재 {platform.python_version()} - 비교는 참고용")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="텍스트/포맷 헬퍼 마이크로벤치마크")
+    parser.add_argument("-k", dest="keyword", default="", help="이름에 이 문자열이 들어간 항목만 실행")
+    parser.add_argument("--save-baseline", action="store_true", help="현재 결과를 기준선으로 저장")
+    parser.add_argument("--threshold", type=float, default=0.25, help="REGRESSION 판정 허용 오차 (비율)")
+    args = parser.parse_args()
+
+    cases = [case for case in build_cases() if args.keyword in case[0]]
+    results = run_cases(cases)
+
+    if args.save_baseline:
+        baseline = load_baseline() or {}
+        merged = dict(baseline.get("results", {}))
+        merged.update(results)
+        save_baseline(merged)
+        report(results, None, args.threshold)
+        print(f"\n기준선 저장: {BASELINE}")
+        return
+
+    regressions = report(results, load_baseline(), args.threshold)
+    if regressions:
+        print(f"\n기준선보다 {args.threshold:.0%} 넘게 느려진 항목 {len(regressions)}개")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
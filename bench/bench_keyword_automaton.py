@@ -0,0 +1,95 @@
+"""
+구매 팁 / 정렬 의도 키워드 매칭 마이크로벤치마크
+- 기존 방식(카테고리 × 키워드 부분 문자열 검사) vs Aho-Corasick 오토마톤
+- 팁 테이블을 수천 개 카테고리까지 늘려가며 비교
+
+실행: python bench/bench_keyword_automaton.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from http_server import (  # noqa: E402
+    SORT_INTENT_WORDS,
+    build_keyword_automaton,
+    get_catalog,
+    render_buying_tip,
+)
+
+BUYING_TIPS = get_catalog().buying_tips
+
+QUERIES = [
+    "삼성 모니터 27인치 가성비",
+    "맥북 프로 14 인기",
+    "프리미엄 캠핑 의자",
+    "아기 물티슈 100매",
+    "무선 이어폰 노이즈캔슬링 최저가",
+    "강아지 사료 대용량",
+    "전혀 매칭되지 않는 검색어 입니다",
+]
+
+
+def naive_match(tips: dict, keyword: str):
+    """기존 방식: 카테고리 순서대로 키워드마다 부분 문자열 검사"""
+    keyword_lower = keyword.lower()
+    tip = ""
+    for category, data in tips.items():
+        for kw in data["keywords"]:
+            if kw in keyword_lower:
+                tip = render_buying_tip(category, data)
+                break
+        if tip:
+            break
+    sort_type = "SIM"
+    for candidate, words in SORT_INTENT_WORDS:
+        if any(w in keyword_lower for w in words):
+            sort_type = candidate
+            break
+    return tip, sort_type
+
+
+def synthetic_tips(size: int, seed: int = 0) -> dict:
+    """실제 팁 테이블 뒤에 임의의 한글 카테고리를 붙여 size개로 확장"""
+    rng = random.Random(seed)
+    tips = dict(BUYING_TIPS)
+    while len(tips) < size:
+        name = "".join(chr(rng.randint(0xAC00, 0xD7A3)) for _ in range(rng.randint(2, 4)))
+        tips[name] = {
+            "keywords": [
+                "".join(chr(rng.randint(0xAC00, 0xD7A3)) for _ in range(rng.randint(2, 5)))
+                for _ in range(4)
+            ],
+            "checks": ["항목"],
+            "tip": "팁",
+        }
+    return tips
+
+
+def bench(size: int, number: int):
+    tips = synthetic_tips(size)
+    automaton = build_keyword_automaton(tips, SORT_INTENT_WORDS)
+    texts = [render_buying_tip(category, data) for category, data in tips.items()]
+
+    def automaton_match(keyword: str):
+        tip_index, sort_index = automaton.search(keyword.lower())
+        tip = texts[tip_index] if tip_index is not None else ""
+        sort_type = SORT_INTENT_WORDS[sort_index][0] if sort_index is not None else "SIM"
+        return tip, sort_type
+
+    # 결과 동일성 확인
+    for query in QUERIES:
+        assert naive_match(tips, query) == automaton_match(query), query
+
+    naive = timeit.timeit(lambda: [naive_match(tips, q) for q in QUERIES], number=number)
+    fast = timeit.timeit(lambda: [automaton_match(q) for q in QUERIES], number=number)
+    ops = number * len(QUERIES)
+    print(f"{size:>6} categories | naive {naive / ops * 1e9:>10.0f} ns/op"
+          f" | automaton {fast / ops * 1e9:>8.0f} ns/op | x{naive / fast:.1f}")
+
+
+if __name__ == "__main__":
+    for size, number in [(len(BUYING_TIPS), 2000), (1000, 300), (5000, 60)]:
+        bench(size, number)
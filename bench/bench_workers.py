@@ -0,0 +1,135 @@
+"""
+워커 수별 처리량 스케일링 벤치마크
+- 스텁 + `WORKERS=n python http_server.py` (stateless + JSON 응답) 를 띄우고
+  load_test.py --attach 드라이버 프로세스 여러 개로 같은 부하를 건 뒤 calls/s 합산
+- 워커 1개 대비 처리량 배율과 효율(배율 / 워커 수) 출력
+- 서버 CPU가 병목이 되도록 스텁 지연은 짧게, 오류율은 0으로 둠
+  (드라이버/스텁도 같은 머신의 CPU를 쓰므로 코어가 워커 수 + 드라이버 수보다 넉넉해야 선형에 가까움)
+
+실행:
+  python bench/bench_workers.py                      # 1, 2, 4, ... 코어 수까지
+  python bench/bench_workers.py --workers 1,2,4,8 --drivers 8 --sessions 16 --duration 20
+  python bench/bench_workers.py --json bench/workers.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import load_test  # noqa: E402
+
+LOAD_TEST = os.path.join(ROOT, "bench", "load_test.py")
+
+
+def default_worker_counts() -> list:
+    cores = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    counts.append(cores)
+    return counts
+
+
+def run_drivers(args, port: int) -> list:
+    """드라이버 프로세스를 동시에 띄워 각자의 리포트(JSON) 수집"""
+    with tempfile.TemporaryDirectory(prefix="coupang-workers-") as tmp:
+        procs, outputs = [], []
+        for i in range(args.drivers):
+            output = os.path.join(tmp, f"driver-{i}.json")
+            outputs.append(output)
+            procs.append(subprocess.Popen(
+                [sys.executable, LOAD_TEST, "--attach", "--port", str(port),
+                 "--sessions", str(args.sessions), "--duration", str(args.duration),
+                 "--keywords", str(args.keywords), "--seed", str(args.seed + i), "--json", output]
+                + (["--tools", args.tools] if args.tools else []),
+                stdout=subprocess.DEVNULL))
+        for proc in procs:
+            proc.wait()
+        reports = []
+        for output in outputs:
+            if os.path.exists(output):
+                with open(output, encoding="utf-8") as f:
+                    reports.append(json.load(f))
+        return reports
+
+
+def measure(args, workers: int) -> dict:
+    """워커 n개 서버 하나를 띄워 측정"""
+    server_args = load_test.build_parser().parse_args([
+        "--api-latency", args.latency, "--deeplink-latency", args.latency, "--danawa-latency", args.latency,
+        "--api-error-rate", "0", "--danawa-error-rate", "0", "--danawa-miss-rate", "0",
+        "--server-env", f"WORKERS={workers}", "--server-env", "MCP_STATELESS=1",
+        "--quiet-server",
+    ] + [item for env in args.server_env for item in ("--server-env", env)])
+    server_args.port = load_test.free_port()
+    server_args.stub_port = load_test.free_port()
+
+    with tempfile.TemporaryDirectory(prefix="coupang-load-") as cache_dir:
+        procs = load_test.start_processes(server_args, cache_dir)
+        try:
+            asyncio.run(load_test.wait_for_port(server_args.stub_port, procs[0]))
+            asyncio.run(load_test.wait_for_port(server_args.port, procs[1]))
+            reports = run_drivers(args, server_args.port)
+        finally:
+            load_test.stop_processes(procs)
+
+    return {
+        "workers": workers,
+        "drivers": len(reports),
+        "rps": round(sum(r["rps"] for r in reports), 2),
+        "calls": sum(r["total_calls"] for r in reports),
+        "errors": sum(r["total_errors"] for r in reports),
+        "failed_sessions": sum(r["failed_sessions"] for r in reports),
+        "p95_ms": max((t["p95_ms"] for r in reports for t in r["tools"].values()), default=0.0),
+    }
+
+
+def print_results(results: list):
+    base = results[0]["rps"] if results and results[0]["rps"] else 0.0
+    print(f"\n{'workers':>8}{'calls/s':>10}{'배율':>8}{'효율':>8}{'calls':>9}{'err':>6}{'p95 ms':>9}")
+    for r in results:
+        speedup = r["rps"] / base if base else 0.0
+        efficiency = speedup / r["workers"] * results[0]["workers"] if base else 0.0
+        print(f"{r['workers']:>8}{r['rps']:>10.1f}{speedup:>7.2f}x{efficiency:>8.0%}"
+              f"{r['calls']:>9}{r['errors']:>6}{r['p95_ms']:>9.0f}")
+    print(f"\n코어 {os.cpu_count()}개")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워커 수별 처리량 스케일링 벤치마크")
+    parser.add_argument("--workers", default="", help="쉼표로 구분한 워커 수 (기본: 1, 2, 4, ... 코어 수)")
+    parser.add_argument("--drivers", type=int, default=0, help="부하 드라이버 프로세스 수 (기본: 최대 워커 수)")
+    parser.add_argument("--sessions", type=int, default=8, help="드라이버당 동시 세션 수")
+    parser.add_argument("--duration", type=float, default=15.0, help="워커 수별 측정 시간 (초)")
+    parser.add_argument("--tools", default="", help="쉼표로 구분한 tool 목록 (기본: 전체 상품 tool)")
+    parser.add_argument("--keywords", type=int, default=0, help="검색어 풀 크기")
+    parser.add_argument("--latency", default="fixed:5", help="스텁 응답 지연 분포 (ms)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="MCP 서버 프로세스 환경 변수 (반복 가능)")
+    parser.add_argument("--json", default="", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.workers.split(",")] if args.workers else default_worker_counts()
+    args.drivers = args.drivers or max(counts)
+    load_test.parse_latency(args.latency)
+
+    results = []
+    for workers in counts:
+        print(f"워커 {workers}개 측정 중 ...", flush=True)
+        results.append(measure(args, workers))
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"cpu_count": os.cpu_count(), "results": results}, f, ensure_ascii=False, indent=1)
+
+
+if __name__ == "__main__":
+    main()
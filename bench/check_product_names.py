@@ -0,0 +1,64 @@
+"""
+상품명 파서 골든 코퍼스 검사
+- bench/corpus/product_names.json 의 상품명마다 parse_product_name /
+  extract_option_from_name / build_search_keyword 결과를 골든 파일과 비교
+- 파서 동작을 의도적으로 바꿨을 때만 --update 로 골든 파일 갱신
+
+실행: python bench/check_product_names.py [--update]
+"""
+import json
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from http_server import (  # noqa: E402
+    build_search_keyword,
+    extract_option_from_name,
+    parse_product_name,
+)
+
+CORPUS = os.path.join(ROOT, "bench", "corpus", "product_names.json")
+GOLDEN = os.path.join(ROOT, "bench", "corpus", "product_names.golden.json")
+
+
+def expected_for(name: str) -> dict:
+    return {
+        "name": name,
+        "parsed": parse_product_name(name),
+        "option": extract_option_from_name(name),
+        "keyword": build_search_keyword(name),
+    }
+
+
+def main():
+    with open(CORPUS, encoding="utf-8") as f:
+        corpus = json.load(f)
+    names = corpus["realistic"] + corpus["pathological"]
+    results = [expected_for(name) for name in names]
+
+    if "--update" in sys.argv:
+        with open(GOLDEN, "w", encoding="utf-8") as f:
+            # 한 줄에 한 건씩 - 파서 변경 시 diff 로 바뀐 상품명만 보이도록
+            f.write("[\n")
+            f.write(",\n".join(json.dumps(r, ensure_ascii=False) for r in results))
+            f.write("\n]\n")
+        print(f"골든 파일 갱신: {len(results)}건")
+        return
+
+    with open(GOLDEN, encoding="utf-8") as f:
+        golden = json.load(f)
+
+    failures = [(g, r) for g, r in zip(golden, results) if g != r]
+    if len(golden) != len(results):
+        print(f"코퍼스 {len(results)}건 / 골든 {len(golden)}건 - --update 필요")
+        sys.exit(1)
+    for g, r in failures[:20]:
+        print(f"불일치: {g['name'][:60]!r}\n  기대: {g}\n  실제: {r}")
+    print(f"{len(results) - len(failures)}/{len(results)} 일치")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""
+MCP 서버 부하 테스트 (오프라인)
+- 로컬 스텁 서버가 API 서버(search/best/goldbox/deeplink), 쿠팡 Open API(서명 검증), 다나와 프록시 응답을 흉내냄
+  (지연 분포, 오류율 설정 가능)
+- `python http_server.py` (__main__ 의 streamable_http_app) 를 스텁을 바라보도록 띄운 뒤
+  여러 MCP 세션을 동시에 열어 tool 을 반복 호출
+- tool 별 처리량, p50/p95/p99, 오류 수 출력 (--json 으로 저장 가능)
+
+실행:
+  python bench/load_test.py --sessions 20 --duration 30
+  python bench/load_test.py --api-latency lognormal:80:0.6 --danawa-latency lognormal:400:0.8 \\
+      --danawa-error-rate 0.05 --tools search_coupang_products,compare_coupang_products
+  python bench/load_test.py --server-env SEARCH_CACHE_TTL=0 --server-env TOOL_DEADLINE_SEC=3
+  python bench/load_test.py --api-mode direct      # COUPANG_API_MODE=direct (스텁이 HMAC 서명 검증)
+  python bench/load_test.py --attach --port 7860   # 이미 떠 있는 서버에 부하만 (스텁/서버 기동 안 함)
+
+지연 분포 (ms): fixed:50 | uniform:20:200 | lognormal:중앙값:sigma
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import math
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(ROOT, "bench", "corpus")
+
+# --api-mode direct 에서 서버와 스텁이 쓰는 테스트 키
+STUB_ACCESS_KEY = "stub-access-key"
+STUB_SECRET_KEY = "stub-secret-key"
+
+# tool 이름 → 인자 생성 함수
+CATEGORY_IDS = [1001, 1002, 1010, 1011, 1012, 1013, 1014, 1015, 1016, 1017, 1018, 1019, 1020, 1021, 1024, 1025, 1026, 1029, 1030]
+TOOL_ARGS = {
+    "search_coupang_products": lambda rng, kw: {"keyword": kw},
+    "search_coupang_rocket": lambda rng, kw: {"keyword": kw},
+    "search_coupang_budget": lambda rng, kw: {"keyword": kw, "max_price": rng.choice([10000, 30000, 50000, 100000])},
+    "compare_coupang_products": lambda rng, kw: {"keyword": kw},
+    "get_coupang_best_products": lambda rng, kw: {"category_id": rng.choice(CATEGORY_IDS)},
+    "get_coupang_goldbox": lambda rng, kw: {},
+}
+
+
+# ============ 지연 분포 ============
+
+def parse_latency(spec: str):
+    """"lognormal:80:0.6" → 초 단위 지연 샘플러"""
+    kind, *args = spec.split(":")
+    values = [float(a) for a in args]
+    if kind == "fixed":
+        ms, = values
+        return lambda rng: ms / 1000
+    if kind == "uniform":
+        low, high = values
+        return lambda rng: rng.uniform(low, high) / 1000
+    if kind == "lognormal":
+        median, sigma = values
+        mu = math.log(median)
+        return lambda rng: rng.lognormvariate(mu, sigma) / 1000
+    raise argparse.ArgumentTypeError(f"알 수 없는 지연 분포: {spec}")
+
+
+# ============ 스텁 서버 (API 서버 + 쿠팡 Open API + 다나와 프록시) ============
+
+def load_product_names() -> list:
+    with open(os.path.join(CORPUS_DIR, "product_names.json"), encoding="utf-8") as f:
+        return json.load(f)["realistic"]
+
+
+def make_stub_app(args):
+    """API 서버 / 다나와 프록시 스텁 (Starlette)"""
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route
+
+    rng = random.Random(args.seed)
+    names = load_product_names()
+    api_latency = parse_latency(args.api_latency)
+    deeplink_latency = parse_latency(args.deeplink_latency)
+    danawa_latency = parse_latency(args.danawa_latency)
+
+    def product(idx: int, seed: str, with_discount=False) -> dict:
+        local = random.Random(f"{seed}:{idx}")
+        product_id = local.randrange(10 ** 9, 10 ** 10)
+        price = local.randrange(10, 2000) * 100
+        item = {
+            "productId": product_id,
+            "productName": local.choice(names),
+            "productPrice": price,
+            "productImage": f"https://thumbnail.example/{product_id}.jpg",
+            "productUrl": f"https://link.coupang.com/re/AFFSDP?lptag=AF0000000&pageKey={product_id}&itemId={product_id + 1}",
+            "isRocket": local.random() < 0.5,
+            "isFreeShipping": local.random() < 0.7,
+            "rank": idx + 1,
+        }
+        if with_discount:
+            item["discountRate"] = local.randrange(5, 70)
+            item["originalPrice"] = price * 100 // (100 - item["discountRate"])
+        return item
+
+    def error_response():
+        if rng.random() < 0.3:
+            return JSONResponse({"rCode": "429", "rMessage": "Too Many Requests"}, status_code=429)
+        return JSONResponse({"rCode": "500", "rMessage": "stub error"}, status_code=500)
+
+    def respond(action: str, params: dict, urls: list = None):
+        """action 별 응답 (API 서버 / Open API 공통)"""
+        limit = int(params.get("limit", "10"))
+        if action == "search":
+            keyword = params.get("keyword", "")
+            data = {"landingUrl": "https://link.coupang.com/a/search",
+                    "productData": [product(i, keyword) for i in range(limit)]}
+        elif action == "best":
+            category = params.get("category_id", "")
+            data = [product(i, f"best:{category}") for i in range(limit)]
+        elif action == "goldbox":
+            data = [product(i, "goldbox", with_discount=True) for i in range(limit)]
+        elif action == "deeplink":
+            data = [{"originalUrl": url,
+                     "shortenUrl": f"https://link.coupang.com/a/{abs(hash(url)) % 10 ** 8:x}",
+                     "landingUrl": url} for url in urls]
+        else:
+            return JSONResponse({"rCode": "400", "rMessage": f"unknown action {action}"}, status_code=400)
+        return JSONResponse({"rCode": "0", "rMessage": "", "data": data})
+
+    async def api(request):
+        q = request.query_params
+        action = q.get("action", "")
+        await asyncio.sleep((deeplink_latency if action == "deeplink" else api_latency)(rng))
+        if rng.random() < args.api_error_rate:
+            return error_response()
+        # 실제 API 서버처럼 url 하나만 받음 (urls 배열은 Open API의 coupangUrls만)
+        return respond(action, dict(q), [q.get("url", "")])
+
+    def verify_signature(request) -> bool:
+        """CEA HmacSHA256 서명 검증 (STUB_SECRET_KEY 로 서명했는지)"""
+        fields = dict(part.strip().split("=", 1) for part in
+                      request.headers.get("authorization", "").removeprefix("CEA ").split(","))
+        message = fields.get("signed-date", "") + request.method + request.url.path + request.url.query
+        expected = hmac.new(STUB_SECRET_KEY.encode(), message.encode(), hashlib.sha256).hexdigest()
+        return fields.get("access-key") == STUB_ACCESS_KEY and hmac.compare_digest(expected, fields.get("signature", ""))
+
+    async def openapi(request):
+        """쿠팡 Open API 스텁 (COUPANG_API_MODE=direct)"""
+        rest = request.path_params["rest"]
+        action = ("deeplink" if rest == "v1/deeplink" else "search" if rest == "v1/products/search"
+                  else "goldbox" if rest == "products/goldbox" else "best")
+        await asyncio.sleep((deeplink_latency if action == "deeplink" else api_latency)(rng))
+        if not verify_signature(request):
+            return JSONResponse({"code": "ERROR", "message": "Invalid signature"}, status_code=401)
+        if rng.random() < args.api_error_rate:
+            return error_response()
+        params = dict(request.query_params)
+        if action == "best":
+            params["category_id"] = rest.rsplit("/", 1)[-1]
+        urls = (await request.json())["coupangUrls"] if action == "deeplink" else None
+        return respond(action, params, urls)
+
+    async def danawa(request):
+        await asyncio.sleep(danawa_latency(rng))
+        roll = rng.random()
+        if roll < args.danawa_error_rate:
+            # 프록시 오류는 JSON 이 아닌 HTML 로 오는 경우가 많음
+            return Response("<html>502 Bad Gateway</html>", status_code=502, media_type="text/html")
+        if roll < args.danawa_error_rate + args.danawa_miss_rate:
+            return JSONResponse({"success": False, "error": "no result"})
+        price = random.Random(request.query_params.get("keyword", "")).randrange(10, 2000) * 100
+        return JSONResponse({"success": True, "price": f"{price:,}", "source": "danawa"})
+
+    return Starlette(routes=[
+        Route("/api", api, methods=["GET"]),
+        Route("/v2/providers/affiliate_open_api/apis/openapi/{rest:path}", openapi, methods=["GET", "POST"]),
+        Route("/danawa", danawa, methods=["GET"]),
+    ])
+
+
+def run_stub(args):
+    import uvicorn
+    uvicorn.run(make_stub_app(args), host="127.0.0.1", port=args.stub_port, log_level="warning")
+
+
+# ============ 서버 프로세스 ============
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_port(port: int, proc: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"프로세스가 종료됨 (exit {proc.returncode})")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"포트 {port} 대기 시간 초과")
+
+
+def start_processes(args, cache_dir: str) -> list:
+    """스텁 → MCP 서버 순으로 기동"""
+    stub_argv = [sys.executable, os.path.abspath(__file__), "--stub", "--stub-port", str(args.stub_port),
+                 "--seed", str(args.seed),
+                 "--api-latency", args.api_latency, "--deeplink-latency", args.deeplink_latency,
+                 "--danawa-latency", args.danawa_latency,
+                 "--api-error-rate", str(args.api_error_rate),
+                 "--danawa-error-rate", str(args.danawa_error_rate),
+                 "--danawa-miss-rate", str(args.danawa_miss_rate)]
+    stub = subprocess.Popen(stub_argv)
+
+    env = dict(os.environ)
+    env.update({
+        "PORT": str(args.port),
+        "COUPANG_API_SERVER": f"http://127.0.0.1:{args.stub_port}/api",
+        "DANAWA_PROXY_URL": f"http://127.0.0.1:{args.stub_port}/danawa",
+        "CACHE_DIR": cache_dir,
+        # 미리 채우기는 측정 결과를 흐리므로 끔 (--server-env PREWARM_ENABLED=1 로 켬)
+        "PREWARM_ENABLED": "0",
+    })
+    if args.api_mode == "direct":
+        env.update({
+            "COUPANG_API_MODE": "direct",
+            "COUPANG_API_DOMAIN": f"http://127.0.0.1:{args.stub_port}",
+            "COUPANG_ACCESS_KEY": STUB_ACCESS_KEY,
+            "COUPANG_SECRET_KEY": STUB_SECRET_KEY,
+        })
+    for item in args.server_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "http_server.py")], env=env, cwd=ROOT,
+                              stdout=subprocess.DEVNULL if args.quiet_server else None,
+                              stderr=subprocess.DEVNULL if args.quiet_server else None)
+    return [stub, server]
+
+
+def stop_processes(procs: list):
+    for proc in procs:
+        if proc.poll() is None:
+            proc.send_signal(signal.SIGINT)
+    for proc in procs:
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# ============ 부하 생성 ============
+
+class Recorder:
+    """tool 별 지연 시간 / 오류 집계"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, tool: str, latency: float, ok: bool):
+        self.latencies.setdefault(tool, []).append(latency)
+        if not ok:
+            self.errors[tool] = self.errors.get(tool, 0) + 1
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    """nearest-rank 백분위수"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+async def run_session(session_id: int, args, keywords: list, tools: list, weights: list,
+                      recorder: Recorder, stop_at: float):
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamablehttp_client
+
+    rng = random.Random(args.seed * 1000 + session_id)
+    url = f"http://127.0.0.1:{args.port}/mcp"
+    calls = 0
+    async with streamablehttp_client(url, timeout=60) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            while time.monotonic() < stop_at and (not args.calls or calls < args.calls):
+                tool = rng.choices(tools, weights)[0]
+                arguments = TOOL_ARGS[tool](rng, rng.choice(keywords))
+                started = time.perf_counter()
+                try:
+                    result = await session.call_tool(tool, arguments)
+                    ok = not result.isError
+                except Exception:
+                    ok = False
+                recorder.record(tool, time.perf_counter() - started, ok)
+                calls += 1
+                if args.think_time:
+                    await asyncio.sleep(rng.expovariate(1 / args.think_time))
+
+
+def build_report(recorder: Recorder, elapsed: float) -> dict:
+    report = {"elapsed_sec": round(elapsed, 3), "tools": {}}
+    total_calls = 0
+    for tool, values in sorted(recorder.latencies.items()):
+        values.sort()
+        total_calls += len(values)
+        report["tools"][tool] = {
+            "calls": len(values),
+            "errors": recorder.errors.get(tool, 0),
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "max_ms": round(values[-1] * 1000, 1),
+        }
+    report["total_calls"] = total_calls
+    report["total_errors"] = sum(recorder.errors.values())
+    report["rps"] = round(total_calls / elapsed, 2) if elapsed else 0.0
+    return report
+
+
+def print_report(report: dict):
+    print(f"\n{'tool':<28}{'calls':>7}{'err':>6}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for tool, r in report["tools"].items():
+        print(f"{tool:<28}{r['calls']:>7}{r['errors']:>6}{r['rps']:>8.1f}"
+              f"{r['p50_ms']:>9.0f}{r['p95_ms']:>9.0f}{r['p99_ms']:>9.0f}{r['max_ms']:>9.0f}")
+    print(f"\n합계 {report['total_calls']}회 / 오류 {report['total_errors']}회 / "
+          f"{report['rps']:.1f} calls/s ({report['elapsed_sec']:.1f}s)")
+
+
+async def run_load(args) -> dict:
+    with open(os.path.join(CORPUS_DIR, "search_keywords.json"), encoding="utf-8") as f:
+        keywords = [kw for kw in json.load(f)["realistic"] if kw.strip()]
+    if args.keywords:
+        keywords = keywords[:args.keywords]
+
+    tools = args.tools.split(",") if args.tools else list(TOOL_ARGS)
+    weights = [1.0] * len(tools)
+    unknown = [tool for tool in tools if tool not in TOOL_ARGS]
+    if unknown:
+        raise SystemExit(f"알 수 없는 tool: {', '.join(unknown)}")
+
+    async def drive():
+        recorder = Recorder()
+        started = time.monotonic()
+        stop_at = started + args.duration
+        results = await asyncio.gather(*[
+            run_session(i, args, keywords, tools, weights, recorder, stop_at)
+            for i in range(args.sessions)
+        ], return_exceptions=True)
+        return recorder, results, time.monotonic() - started
+
+    if args.attach:
+        recorder, results, elapsed = await drive()
+    else:
+        with tempfile.TemporaryDirectory(prefix="coupang-load-") as cache_dir:
+            procs = start_processes(args, cache_dir)
+            try:
+                await wait_for_port(args.stub_port, procs[0])
+                await wait_for_port(args.port, procs[1])
+                recorder, results, elapsed = await drive()
+            finally:
+                stop_processes(procs)
+
+    failed = [r for r in results if isinstance(r, BaseException)]
+    report = build_report(recorder, elapsed)
+    report["sessions"] = args.sessions
+    report["failed_sessions"] = len(failed)
+    if failed:
+        print(f"세션 {len(failed)}개 실패: {failed[0]!r}")
+    return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="MCP 서버 오프라인 부하 테스트")
+    parser.add_argument("--sessions", type=int, default=20, help="동시 MCP 세션 수")
+    parser.add_argument("--duration", type=float, default=30.0, help="측정 시간 (초)")
+    parser.add_argument("--calls", type=int, default=0, help="세션당 최대 호출 수 (0이면 시간으로만 제한)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="호출 사이 평균 대기 (초, 지수 분포)")
+    parser.add_argument("--tools", default="", help="쉼표로 구분한 tool 목록 (기본: 전체 상품 tool)")
+    parser.add_argument("--keywords", type=int, default=0, help="검색어 풀 크기 (작을수록 캐시 적중 증가)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=0, help="MCP 서버 포트 (0이면 빈 포트)")
+    parser.add_argument("--stub-port", type=int, default=0, help="스텁 서버 포트 (0이면 빈 포트)")
+    parser.add_argument("--api-mode", choices=["proxy", "direct"], default="proxy",
+                        help="proxy: API 서버 스텁 경유, direct: Open API 스텁에 서명 요청")
+    parser.add_argument("--api-latency", default="lognormal:80:0.5", help="API 서버 지연 분포 (ms)")
+    parser.add_argument("--deeplink-latency", default="lognormal:60:0.4", help="딥링크 지연 분포 (ms)")
+    parser.add_argument("--danawa-latency", default="lognormal:350:0.7", help="다나와 프록시 지연 분포 (ms)")
+    parser.add_argument("--api-error-rate", type=float, default=0.01)
+    parser.add_argument("--danawa-error-rate", type=float, default=0.03)
+    parser.add_argument("--danawa-miss-rate", type=float, default=0.1)
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="MCP 서버 프로세스 환경 변수 (반복 가능)")
+    parser.add_argument("--quiet-server", action="store_true", help="MCP 서버 로그 숨김")
+    parser.add_argument("--json", default="", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--attach", action="store_true", help="--port 에 떠 있는 서버에 부하만 (프로세스 기동 안 함)")
+    parser.add_argument("--stub", action="store_true", help=argparse.SUPPRESS)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+
+    for spec in (args.api_latency, args.deeplink_latency, args.danawa_latency):
+        parse_latency(spec)
+
+    if args.stub:
+        run_stub(args)
+        return
+
+    if args.attach and not args.port:
+        raise SystemExit("--attach 에는 --port 가 필요함")
+    args.port = args.port or free_port()
+    args.stub_port = args.stub_port or free_port()
+    report = asyncio.run(run_load(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,65 @@
 - API 키가 필요 없습니다! (서버에서 처리)
 """
 import os
+import random
+import asyncio
 import httpx
+from contextlib import asynccontextmanager
 from mcp.server.fastmcp import FastMCP
+from time import monotonic, time
+from email.utils import parsedate_to_datetime
 from urllib.parse import urlencode
 
 # 서버 URL (Netlify 배포 후 수정)
 API_SERVER = os.getenv("COUPANG_API_SERVER", "https://coupang-mcp.netlify.app/.netlify/functions/coupang")
 
-mcp = FastMCP("Coupang")
+# 공유 커넥션 풀 설정 (요청마다 TCP+TLS 핸드셰이크 방지)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") == "1"
+
+_http_client = None
+
+
+def http2_available() -> bool:
+    """HTTP/2 사용 가능 여부 (h2 패키지가 없으면 HTTP/1.1로 동작)"""
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """프로세스 공유 클라이언트 반환 (없으면 생성)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+        _http_client = httpx.AsyncClient(http2=http2_available(), limits=limits)
+    return _http_client
+
+
+@asynccontextmanager
+async def app_lifespan(server):
+    """서버 수명주기: 시작 시 커넥션 풀 생성, 종료 시 정리"""
+    global _http_client
+    get_http_client()
+    try:
+        yield {}
+    finally:
+        if _http_client is not None:
+            await _http_client.aclose()
+            _http_client = None
+
+
+mcp = FastMCP("Coupang", lifespan=app_lifespan)
 
 
 async def get_real_image_url(image_url: str) -> str:
@@ -19,11 +70,10 @@ async def get_real_image_url(image_url: str) -> str:
     if not image_url:
         return ""
     try:
-        async with httpx.AsyncClient(follow_redirects=False) as client:
-            response = await client.head(image_url, timeout=5.0)
-            if response.status_code == 302:
-                return response.headers.get("location", image_url)
-    except:
+        response = await get_http_client().head(image_url, timeout=5.0)
+        if response.status_code == 302:
+            return response.headers.get("location", image_url)
+    except Exception:
         pass
     return image_url
 
@@ -47,21 +97,134 @@ async def shorten_url(product_url: str) -> str:
         data = await call_api("deeplink", {"url": original_url})
         if data.get("rCode") == "0" and data.get("data"):
             return data["data"][0].get("shortenUrl", product_url)
-    except:
+    except Exception:
         pass
 
     return product_url
 
 
+# ============ 재시도 (백오프 + 전역 예산 + Retry-After) ============
+# - 타임아웃/연결 오류, 429/500/502/503/504 → 지수 백오프(full jitter) 후 재시도
+# - 전역 예산: 요청마다 RETRY_BUDGET_RATIO만큼 적립, 재시도 1회에 1 차감 → 장애 때 재시도 폭주 방지
+# - 429/503 + Retry-After: 그 시각까지 API 서버를 호출하지 않고 바로 오류 (최대 RETRY_AFTER_MAX초)
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))  # 첫 요청 포함
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.2"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "3.0"))
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+RETRY_BUDGET_MIN_PER_SEC = float(os.getenv("RETRY_BUDGET_MIN_PER_SEC", "1.0"))
+RETRY_BUDGET_MAX = float(os.getenv("RETRY_BUDGET_MAX", "20"))
+RETRY_AFTER_MAX = float(os.getenv("RETRY_AFTER_MAX", "300"))
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class RetryBudget:
+    """전역 재시도 예산 (토큰 버킷)"""
+
+    def __init__(self, ratio: float, min_per_sec: float, max_tokens: float):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.updated_at = monotonic()
+
+    def _refill(self):
+        now = monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self.updated_at) * self.min_per_sec)
+        self.updated_at = now
+
+    def deposit(self):
+        """일반 요청 1회"""
+        self._refill()
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """재시도 1회 (예산이 없으면 False)"""
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+retry_budget = RetryBudget(RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN_PER_SEC, RETRY_BUDGET_MAX)
+_retry_after_until = 0.0  # Retry-After로 API 서버가 막힌 시각 (monotonic)
+
+
+def parse_retry_after(value: str):
+    """Retry-After 헤더 (초 또는 HTTP 날짜) → 초, 없거나 해석 불가면 None"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """attempt번째 재시도 전 대기 (full jitter)"""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def request_with_retry(url: str) -> httpx.Response:
+    """API 서버 GET (재시도 포함, 마지막 응답 또는 예외 반환)"""
+    global _retry_after_until
+    retry_budget.deposit()
+    attempt = 0
+    while True:
+        delay = None
+        try:
+            response = await get_http_client().get(url, timeout=30.0)
+        except (httpx.TimeoutException, httpx.NetworkError) as e:
+            error = e
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            error = None
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None and response.status_code in (429, 503):
+                # 알려준 시각까지 호출하지 않음 (짧으면 그만큼 기다렸다가 재시도)
+                _retry_after_until = monotonic() + min(retry_after, RETRY_AFTER_MAX)
+                if retry_after > RETRY_MAX_DELAY:
+                    return response
+                delay = retry_after
+
+        attempt += 1
+        if attempt >= RETRY_MAX_ATTEMPTS or not retry_budget.withdraw():
+            if error is not None:
+                raise error
+            return response
+        await asyncio.sleep(backoff_delay(attempt) if delay is None else delay)
+
+
 async def call_api(action: str, params: dict = None) -> dict:
-    """API 서버 호출"""
+    """API 서버 호출 (실패 시 {"error", "message"})"""
+    retry_in = _retry_after_until - monotonic()
+    if retry_in > 0:
+        return {"error": "upstream_unavailable",
+                "message": f"API 서버가 일시 중단 상태입니다. {retry_in:.0f}초 후 다시 시도해주세요."}
+
     params = params or {}
     params["action"] = action
     url = f"{API_SERVER}?{urlencode(params)}"
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, timeout=30.0)
-        return response.json()
+    try:
+        response = await request_with_retry(url)
+    except httpx.HTTPError as e:
+        return {"error": "upstream_error", "message": f"API 서버 응답 없음 ({type(e).__name__})"}
+    try:
+        data = response.json()
+    except ValueError:
+        data = None
+    if response.status_code >= 400 and not (isinstance(data, dict) and "rCode" in data):
+        message = data.get("message") if isinstance(data, dict) else None
+        return {"error": f"HTTP {response.status_code}", "message": message or f"HTTP {response.status_code}"}
+    if not isinstance(data, dict):
+        return {"error": "invalid_response", "message": "API 서버 응답을 해석할 수 없습니다."}
+    return data
 
 
 def get_search_cta(keyword: str) -> str:
@@ -3,38 +3,1277 @@
 - Streamable HTTP transport로 원격 접속 지원
 """
 import os
+import hmac
 import json
+import time
+import random
+import asyncio
+import logging
+import contextvars
+import hashlib
+import sqlite3
 import httpx
-from mcp.server.fastmcp import FastMCP
-from urllib.parse import urlencode
-from starlette.responses import JSONResponse, FileResponse
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from mcp.server.fastmcp import Context, FastMCP
+from urllib.parse import urlencode, urlsplit
+from starlette.responses import JSONResponse, FileResponse, Response
 from starlette.routing import Route
 
 # 서버 URL
 API_SERVER = os.getenv("COUPANG_API_SERVER", "https://coupang-mcp.netlify.app/.netlify/functions/coupang")
 
-# 정렬 의도 감지
-def detect_sort_intent(keyword: str) -> str:
-    """사용자 키워드에서 정렬 의도 파악
+# 쿠팡 API 호출 방식
+# - proxy: API_SERVER(Netlify 함수) 경유
+# - direct: 쿠팡 파트너스 Open API에 HMAC 서명으로 직접 호출 (왕복 1회 절약, 액세스/시크릿 키 필요)
+COUPANG_API_MODE = os.getenv("COUPANG_API_MODE", "proxy")
+COUPANG_API_DOMAIN = os.getenv("COUPANG_API_DOMAIN", "https://api-gateway.coupang.com")
+COUPANG_ACCESS_KEY = os.getenv("COUPANG_ACCESS_KEY", "")
+COUPANG_SECRET_KEY = os.getenv("COUPANG_SECRET_KEY", "")
 
-    Returns: SIM(관련성), SALE(인기순), LOW(낮은가격), HIGH(높은가격)
+if COUPANG_API_MODE not in ("proxy", "direct"):
+    raise ValueError(f"COUPANG_API_MODE는 proxy 또는 direct: {COUPANG_API_MODE}")
+if COUPANG_API_MODE == "direct" and not (COUPANG_ACCESS_KEY and COUPANG_SECRET_KEY):
+    raise ValueError("COUPANG_API_MODE=direct에는 COUPANG_ACCESS_KEY와 COUPANG_SECRET_KEY가 필요합니다.")
+
+# 다나와 가격 프록시 (Netlify 도쿄 리전)
+DANAWA_PROXY_URL = os.getenv("DANAWA_PROXY_URL", "https://danawa-proxy-test.netlify.app/.netlify/functions/danawa-test")
+
+# 캐시 저장 위치 (HF Space 영구 스토리지 /data가 있으면 사용 → 컨테이너 재시작 후에도 유지)
+CACHE_DIR = os.getenv("CACHE_DIR") or (
+    "/data" if os.path.isdir("/data") and os.access("/data", os.W_OK)
+    else os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+# 관리자 엔드포인트 토큰 (비어 있으면 관리자 엔드포인트 비활성화)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# 배포 모드
+# - WORKERS > 1: uvicorn 워커 프로세스 여러 개 (코어 수만큼 확장)
+#   MCP 세션은 프로세스 메모리에만 있어서 다른 워커로 간 요청은 세션을 못 찾음 → stateless 강제
+# - stateless: 세션 ID를 발급/검증하지 않고 요청마다 새 transport → 어느 워커가 받아도 처리
+#   (이전에 받은 세션 ID를 계속 보내는 클라이언트도 그대로 동작)
+# - JSON 응답: SSE 스트림 대신 JSON 한 번으로 응답 (stateless일 때 기본값, progress 알림은 보낼 수 없음)
+WORKERS = int(os.getenv("WORKERS") or os.getenv("WEB_CONCURRENCY") or "1")
+MCP_STATELESS = WORKERS > 1 or os.getenv("MCP_STATELESS", "0") == "1"
+MCP_JSON_RESPONSE = os.getenv("MCP_JSON_RESPONSE", "1" if MCP_STATELESS else "0") == "1"
+
+logger = logging.getLogger("coupang_mcp")
+
+
+# ============ Prometheus 메트릭 (/metrics) ============
+# 기록은 모두 이벤트 루프 스레드에서만 일어남 → 락 없이 dict 갱신만 (observe = bisect + 덧셈)
+# 캐시 적중/동시성 한도처럼 이미 집계 중인 값은 스크레이프 시점에 복사
+# 워커 여러 개면 값은 워커별이고 /metrics는 요청을 받은 워커 하나가 응답
+# → 모든 시계열에 worker="<pid>" 라벨을 붙여 워커끼리 섞이거나 리셋처럼 보이지 않게 함
+#   (한 포트를 공유하므로 스크레이프마다 워커 하나만 보임 - 합계는 sum without (worker) (rate(...)) 로)
+#   /admin/* 응답에는 X-Worker 헤더로 어느 워커의 값인지 표시
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_WORKER_LABEL = os.getenv("METRICS_WORKER_LABEL", "1" if WORKERS > 1 else "0") == "1"
+WORKER_ID = str(os.getpid())
+WORKER_HEADERS = {"X-Worker": WORKER_ID}
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 1.5, 2.5, 5.0, 10.0, 30.0)
+
+METRICS_REGISTRY = []
+
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    """Prometheus 라벨 문자열 ({a="1",b="2"})"""
+    pairs = [f'worker="{WORKER_ID}"'] if METRICS_WORKER_LABEL else []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """라벨 조합(튜플)별 값 - 생성 시 레지스트리에 등록"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values = {}
+        METRICS_REGISTRY.append(self)
+
+    def set(self, labels: tuple, value: float):
+        self._values[labels] = value
+
+    def render(self, lines: list):
+        lines.append(f"# HELP {self.name} {self.help_text}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {value}")
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = buckets
+
+    def observe(self, labels: tuple, value: float):
+        series = self._values.get(labels)
+        if series is None:
+            # [버킷별 개수(누적 아님, 마지막은 +Inf), 합계]
+            series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self, lines: list):
+        lines.append(f"# HELP {self.name} {self.help_text}")
+        lines.append(f"# TYPE {self.name} histogram")
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_str = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {total}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS_REGISTRY:
+        metric.render(lines)
+    return "\n".join(lines) + "\n"
+
+
+tool_duration = Histogram(
+    "coupang_tool_duration_seconds", "MCP tool 호출 소요 시간", ("tool", "status"))
+tool_in_flight = Gauge(
+    "coupang_tool_in_flight", "실행 중인 MCP tool 호출 수", ("tool",))
+upstream_duration = Histogram(
+    "coupang_upstream_request_duration_seconds", "업스트림 요청 소요 시간 (status: HTTP 코드/timeout/error)",
+    ("host", "action", "status"))
+upstream_in_flight = Gauge(
+    "coupang_upstream_in_flight", "호스트별 진행 중인 업스트림 요청 수", ("host",))
+upstream_queued = Gauge(
+    "coupang_upstream_queued", "호스트별 동시성 한도 대기 중인 요청 수", ("host",))
+upstream_limit = Gauge(
+    "coupang_upstream_concurrency_limit", "호스트별 현재 동시성 한도 (AIMD)", ("host",))
+breaker_state = Gauge(
+    "coupang_circuit_breaker_state", "서킷 브레이커 상태 (현재 상태만 1)", ("breaker", "state"))
+cache_requests = Counter(
+    "coupang_cache_requests_total", "캐시 조회 결과별 횟수", ("cache", "result"))
+cache_entries = Gauge(
+    "coupang_cache_entries", "메모리 캐시 항목 수", ("cache",))
+upstream_retries = Counter(
+    "coupang_upstream_retries_total", "업스트림 재시도 횟수 (reason: HTTP 코드/timeout/network)", ("host", "reason"))
+upstream_short_circuits = Counter(
+    "coupang_upstream_short_circuits_total", "Retry-After 기간이라 보내지 않은 업스트림 요청 수", ("host",))
+quota_requests = Counter(
+    "coupang_api_quota_requests_total", "쿠팡 API 호출 한도 토큰 요청 결과 (granted/waited/rejected)",
+    ("endpoint", "result"))
+quota_tokens = Gauge(
+    "coupang_api_quota_tokens", "엔드포인트 클래스별 남은 호출 한도 토큰 (마지막 조회 시점)", ("endpoint",))
+
+
+# ============ 트레이싱 ============
+# tool 호출마다 루트 span, 그 아래 call_api / get_danawa_price / shorten_url / upstream 요청 span
+# 현재 span은 contextvars로 전달 → asyncio Task가 만들어질 때 자동 상속 (보강 조회별로 갈라짐)
+# 트레이스는 루트 span이 끝날 때 한 줄(JSON)로 내보냄 - 그때까지 안 끝난 span은 duration_ms=None
+#
+# TRACE_EXPORTER: ""(끔) | "jsonl"(TRACE_FILE에 추가) | "log"(로거 INFO)
+#   jsonl: 파일 쓰기는 전용 스레드에서, 워커 여러 개면 워커마다 traces.<pid>.jsonl (교체 시 서로의 파일을 건드리지 않게)
+# TRACE_SAMPLE_RATE: 내보낼 비율 / TRACE_SLOW_MS: 이보다 느리거나 실패한 호출은 비율과 무관하게 내보냄
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "0"))
+TRACE_FILE = os.getenv("TRACE_FILE") or os.path.join(CACHE_DIR, "traces.jsonl")
+TRACE_FILE_MAX_BYTES = int(os.getenv("TRACE_FILE_MAX_BYTES", str(50 * 1024 * 1024)))
+TRACE_MAX_SPANS = 1000  # 트레이스 하나에 기록할 최대 span 수
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Trace:
+    """루트 span 하나와 그 아래 span 목록"""
+
+    def __init__(self, sampled: bool):
+        self.trace_id = os.urandom(8).hex()
+        self.sampled = sampled
+        self.started_at = time.time()
+        self.spans = []
+        self.finished = False
+        self.dropped_spans = 0
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start", "end", "attributes", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id, attributes: dict):
+        self.trace = trace
+        self.span_id = len(trace.spans) + 1
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.monotonic()
+        self.end = None
+        self.attributes = attributes
+        self.error = None
+        trace.spans.append(self)
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_dict(self, origin: float) -> dict:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": None if self.end is None else round((self.end - self.start) * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class NoopSpan:
+    """트레이싱 꺼짐 / 샘플링 제외 시 사용하는 빈 span"""
+
+    def set(self, key: str, value):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def _activate(span: Span):
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = type(e).__name__
+        raise
+    finally:
+        span.end = time.monotonic()
+        _current_span.reset(token)
+
+
+@contextmanager
+def trace_span(name: str, **attributes):
+    """현재 트레이스에 자식 span 추가 (트레이스가 없거나 이미 내보냈으면 아무것도 안 함)"""
+    parent = _current_span.get()
+    if parent is None or parent.trace.finished:
+        yield NOOP_SPAN
+        return
+    trace = parent.trace
+    if len(trace.spans) >= TRACE_MAX_SPANS:
+        trace.dropped_spans += 1
+        yield NOOP_SPAN
+        return
+    with _activate(Span(trace, name, parent.span_id, attributes)) as span:
+        yield span
+
+
+@contextmanager
+def trace_tool(name: str, arguments: dict):
+    """tool 호출 루트 span - 끝나면 샘플링 조건에 맞는 트레이스를 내보냄"""
+    if trace_exporter is None:
+        yield NOOP_SPAN
+        return
+    sampled = random.random() < TRACE_SAMPLE_RATE
+    if not sampled and TRACE_SLOW_MS <= 0:
+        yield NOOP_SPAN
+        return
+
+    trace = Trace(sampled)
+    attributes = {"tool": name}
+    attributes.update({f"arg.{key}": value for key, value in (arguments or {}).items()})
+    root = Span(trace, name, None, attributes)
+    try:
+        with _activate(root):
+            yield root
+    finally:
+        trace.finished = True
+        duration_ms = (root.end - root.start) * 1000
+        if trace.sampled or root.error or (TRACE_SLOW_MS > 0 and duration_ms >= TRACE_SLOW_MS):
+            export_trace(trace, root, duration_ms)
+
+
+def export_trace(trace: Trace, root: Span, duration_ms: float):
+    record = {
+        "trace_id": trace.trace_id,
+        "tool": root.name,
+        "timestamp": datetime.fromtimestamp(trace.started_at, timezone.utc).isoformat(),
+        "duration_ms": round(duration_ms, 3),
+        "sampled": trace.sampled,
+        "spans": [span.to_dict(root.start) for span in trace.spans],
+    }
+    if trace.dropped_spans:
+        record["dropped_spans"] = trace.dropped_spans
+    try:
+        trace_exporter.export(record)
+    except Exception as e:
+        logger.warning("트레이스 내보내기 실패: %s", e)
+
+
+def worker_trace_file(path: str) -> str:
+    """워커 여러 개면 파일 이름에 pid 추가 (traces.jsonl → traces.<pid>.jsonl)"""
+    if WORKERS <= 1:
+        return path
+    base, ext = os.path.splitext(path)
+    return f"{base}.{WORKER_ID}{ext}"
+
+
+class JsonlTraceExporter:
+    """트레이스를 JSONL 파일에 한 줄씩 추가 (max_bytes 넘으면 .1로 교체, 쓰기는 전용 스레드에서)"""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._file = None
+        self._executor = None
+
+    def export(self, record: dict):
+        if self._executor is None:
+            # 순서 유지 + 이벤트 루프를 막지 않도록 스레드 하나에서만 씀
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trace")
+        self._executor.submit(self._write, record)
+
+    def _write(self, record: dict):
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self._file.flush()
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._file.close()
+                os.replace(self.path, self.path + ".1")
+                self._file = None
+        except Exception as e:
+            logger.warning("트레이스 내보내기 실패: %s", e)
+
+    def close(self):
+        """남은 쓰기를 마치고 파일 닫기"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LogTraceExporter:
+    """트레이스를 로거로 출력"""
+
+    def export(self, record: dict):
+        logger.info("trace %s", json.dumps(record, ensure_ascii=False, default=str))
+
+
+TRACE_EXPORTERS = {
+    "jsonl": lambda: JsonlTraceExporter(worker_trace_file(TRACE_FILE), TRACE_FILE_MAX_BYTES),
+    "log": LogTraceExporter,
+}
+
+trace_exporter = TRACE_EXPORTERS[TRACE_EXPORTER]() if TRACE_EXPORTER else None
+
+
+def set_trace_exporter(exporter):
+    """내보내기 교체 (export(record: dict) 메서드가 있는 객체, None이면 트레이싱 끔)"""
+    global trace_exporter
+    trace_exporter = exporter
+
+
+# ============ 업스트림 HTTP 커넥션 풀 ============
+# 요청마다 AsyncClient를 새로 만들면 매번 TCP+TLS 핸드셰이크가 발생
+# → 프로세스 전체에서 클라이언트 하나를 공유하고, 업스트림 호스트별로 keep-alive 풀 유지
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") == "1"
+
+_http_client = None
+
+
+def http2_available() -> bool:
+    """HTTP/2 사용 가능 여부 (h2 패키지가 없으면 HTTP/1.1로 동작)"""
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def url_origin(url: str) -> str:
+    """URL에서 scheme://host 부분만 추출"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """업스트림 호스트별 커넥션 풀을 가진 공유 클라이언트 생성"""
+    http2 = http2_available()
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    # 호스트마다 별도 transport → 한 업스트림이 느려도 다른 호스트 풀을 잠식하지 않음
+    mounts = {
+        url_origin(url): httpx.AsyncHTTPTransport(http2=http2, limits=limits)
+        for url in (API_SERVER, DANAWA_PROXY_URL, COUPANG_API_DOMAIN)
+    }
+    return httpx.AsyncClient(http2=http2, limits=limits, mounts=mounts)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """공유 클라이언트 반환 (lifespan 밖에서 호출되면 지연 생성)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client():
+    """공유 클라이언트 종료 (커넥션 풀 정리)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+# ============ 업스트림별 적응형 동시성 제한 (AIMD) ============
+# 상품별 enrichment가 한꺼번에 나가므로, 세션이 많으면 수백 개 동시 요청 → 스로틀링
+# 호스트별로 동시 요청 수를 제한하고, 지연/오류를 보고 한도를 조절
+# - 정상 응답: 한도 += 1/한도 (한도만큼 성공하면 +1, additive increase)
+# - 오류/목표 지연 초과: 한도 *= UPSTREAM_CONCURRENCY_BACKOFF (multiplicative decrease)
+UPSTREAM_CONCURRENCY_INITIAL = int(os.getenv("UPSTREAM_CONCURRENCY_INITIAL", "10"))
+UPSTREAM_CONCURRENCY_MIN = int(os.getenv("UPSTREAM_CONCURRENCY_MIN", "2"))
+UPSTREAM_CONCURRENCY_MAX = int(os.getenv("UPSTREAM_CONCURRENCY_MAX", "64"))
+UPSTREAM_CONCURRENCY_BACKOFF = float(os.getenv("UPSTREAM_CONCURRENCY_BACKOFF", "0.7"))
+UPSTREAM_LATENCY_TARGET = float(os.getenv("UPSTREAM_LATENCY_TARGET", "2.0"))
+
+
+class AdaptiveLimiter:
+    """AIMD 방식으로 한도가 변하는 동시성 제한기"""
+
+    def __init__(self, name: str, initial: int, min_limit: int, max_limit: int,
+                 latency_target: float, backoff: float):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.in_flight = 0
+        self.successes = 0
+        self.failures = 0
+        self._waiters = deque()
+        self._last_decrease = 0.0
+
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 슬롯을 받은 직후 취소됨 → 슬롯 반납
+                self.in_flight -= 1
+                self._wake()
+            else:
+                try:
+                    self._waiters.remove(future)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self, latency: float, ok: bool):
+        self.in_flight -= 1
+        if ok and latency <= self.latency_target:
+            self.successes += 1
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        else:
+            if not ok:
+                self.failures += 1
+            # 한 번의 혼잡에 연달아 줄어들지 않도록 목표 지연 시간당 최대 1회만 감소
+            now = time.monotonic()
+            if now - self._last_decrease >= self.latency_target:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "successes": self.successes,
+            "failures": self.failures,
+        }
+
+
+_limiters = {}
+
+
+def get_limiter(url: str) -> AdaptiveLimiter:
+    """업스트림 호스트별 제한기"""
+    host = urlsplit(url).netloc
+    limiter = _limiters.get(host)
+    if limiter is None:
+        limiter = AdaptiveLimiter(
+            host,
+            UPSTREAM_CONCURRENCY_INITIAL,
+            UPSTREAM_CONCURRENCY_MIN,
+            UPSTREAM_CONCURRENCY_MAX,
+            UPSTREAM_LATENCY_TARGET,
+            UPSTREAM_CONCURRENCY_BACKOFF,
+        )
+        _limiters[host] = limiter
+    return limiter
+
+
+# ============ 서킷 브레이커 ============
+# 업스트림이 느리거나 죽었을 때 매 요청이 타임아웃까지 기다리지 않도록 즉시 차단
+# closed(정상) → open(차단, OPEN_DURATION 동안) → half_open(시험 요청 몇 개) → closed/open
+class CircuitBreaker:
+    """실패율/지연 비율 기반 서킷 브레이커 (최근 window초 구간 집계)"""
+
+    def __init__(self, name: str, window: float, min_calls: int, failure_rate: float,
+                 slow_call_duration: float, slow_call_rate: float,
+                 open_duration: float, half_open_calls: int):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        self.state = "closed"
+        self.rejected = 0
+        self.transitions = {}  # "closed->open" → 횟수
+        self._calls = deque()  # (시각, 성공 여부, 느림 여부)
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+
+    def _transition(self, state: str):
+        key = f"{self.state}->{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        log = logger.warning if state == "open" else logger.info
+        log("circuit breaker %s: %s", self.name, key)
+        self.state = state
+        self._calls.clear()
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        if state == "open":
+            self._opened_at = time.monotonic()
+
+    def allow(self) -> bool:
+        """요청 허용 여부 (허용된 요청은 반드시 record 호출)"""
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.open_duration:
+                self.rejected += 1
+                return False
+            self._transition("half_open")
+        if self.state == "half_open":
+            if self._half_open_in_flight >= self.half_open_calls:
+                self.rejected += 1
+                return False
+            self._half_open_in_flight += 1
+        return True
+
+    def record(self, ok, latency: float):
+        """결과 기록 (ok=None이면 취소된 요청 → 집계 제외)"""
+        slow = latency >= self.slow_call_duration
+        if self.state == "half_open":
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            if ok is None:
+                return
+            if not ok or slow:
+                self._transition("open")
+            else:
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_calls:
+                    self._transition("closed")
+            return
+
+        if ok is None or self.state != "closed":
+            return
+        now = time.monotonic()
+        self._calls.append((now, ok, slow))
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+        total = len(self._calls)
+        if total < self.min_calls:
+            return
+        failures = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+        slows = sum(1 for _, _, call_slow in self._calls if call_slow)
+        if failures / total >= self.failure_rate or slows / total >= self.slow_call_rate:
+            self._transition("open")
+
+    def stats(self) -> dict:
+        total = len(self._calls)
+        failures = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+        return {
+            "state": self.state,
+            "window_calls": total,
+            "window_failure_rate": round(failures / total, 4) if total else None,
+            "rejected": self.rejected,
+            "transitions": dict(self.transitions),
+        }
+
+
+# ============ 재시도 (백오프 + 전역 예산 + Retry-After) ============
+# - 재시도 대상: 타임아웃/연결 오류, 429/500/502/503/504 (GET만, POST는 idempotent=True일 때만)
+# - 대기: 지수 백오프 full jitter → uniform(0, min(최대, 기본 * 2^시도))
+# - 전역 예산: 일반 요청마다 RETRY_BUDGET_RATIO만큼 적립, 재시도 1회에 1 차감 (+초당 최소 적립)
+#   → 업스트림 장애 때 재시도가 요청량의 일정 비율을 넘지 않음 (retry storm 방지)
+# - Retry-After(429/503): 그 시각까지 해당 호스트 호출을 보내지 않고 바로 UpstreamUnavailable
+#   (최대 RETRY_AFTER_MAX초 - 점검 응답의 86400초를 그대로 따르면 복구돼도 하루 동안 막히므로 주기적으로 다시 확인)
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))  # 첫 요청 포함
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.2"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "3.0"))
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+RETRY_BUDGET_MIN_PER_SEC = float(os.getenv("RETRY_BUDGET_MIN_PER_SEC", "1.0"))
+RETRY_BUDGET_MAX = float(os.getenv("RETRY_BUDGET_MAX", "20"))
+RETRY_AFTER_MAX = float(os.getenv("RETRY_AFTER_MAX", "300"))
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class UpstreamUnavailable(Exception):
+    """Retry-After 기간이라 호스트 호출을 보내지 않음"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} unavailable for {retry_in:.0f}s (Retry-After)")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class RetryBudget:
+    """전역 재시도 예산 (토큰 버킷)"""
+
+    def __init__(self, ratio: float, min_per_sec: float, max_tokens: float):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.updated_at = time.monotonic()
+        self.retries = 0
+        self.exhausted = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self.updated_at) * self.min_per_sec)
+        self.updated_at = now
+
+    def deposit(self):
+        """일반 요청 1회"""
+        self._refill()
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """재시도 1회 (예산이 없으면 False)"""
+        self._refill()
+        if self.tokens < 1:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1
+        self.retries += 1
+        return True
+
+    def stats(self) -> dict:
+        self._refill()
+        return {"tokens": round(self.tokens, 2), "retries": self.retries, "exhausted": self.exhausted}
+
+
+retry_budget = RetryBudget(RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN_PER_SEC, RETRY_BUDGET_MAX)
+# 호스트 → Retry-After로 막힌 시각 (monotonic)
+_retry_after_until = {}
+
+
+def parse_retry_after(value: str):
+    """Retry-After 헤더 (초 또는 HTTP 날짜) → 초, 없거나 해석 불가면 None"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """attempt번째 재시도 전 대기 (full jitter)"""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def retry_after_remaining(host: str) -> float:
+    until = _retry_after_until.get(host)
+    if until is None:
+        return 0.0
+    remaining = until - time.monotonic()
+    if remaining <= 0:
+        del _retry_after_until[host]
+        return 0.0
+    return remaining
+
+
+async def upstream_get(url: str, timeout: float, action: str = "") -> httpx.Response:
+    """공유 커넥션 풀을 통한 업스트림 GET 요청 (호스트별 동시성 제한 적용)
+
+    action: 메트릭 라벨 (API 서버 action, 다나와 프록시는 "danawa")
     """
-    keyword_lower = keyword.lower()
+    return await upstream_request("GET", url, timeout, action)
 
-    # 낮은 가격순
-    if any(w in keyword_lower for w in ['싼', '저렴', '가성비', '싸게', '최저가', '저가']):
-        return 'LOW'
 
-    # 인기/판매순
-    if any(w in keyword_lower for w in ['인기', '많이팔리', '베스트', '잘팔리', '판매량', '리뷰많', '후기많']):
-        return 'SALE'
+async def upstream_request(method: str, url: str, timeout: float, action: str = "",
+                           idempotent: bool = None, **kwargs) -> httpx.Response:
+    """upstream_get과 같고 메서드/헤더/본문 지정 가능 (kwargs는 httpx request 인자)
+
+    재시도 가능한 실패는 백오프 후 재시도, 마지막 응답(또는 예외)을 그대로 반환
+    idempotent: None이면 메서드로 판단 (GET 등만 재시도)
+    """
+    host = urlsplit(url).netloc
+    retry_in = retry_after_remaining(host)
+    if retry_in:
+        upstream_short_circuits.inc((host,))
+        current_span().set("short_circuit", round(retry_in, 1))
+        raise UpstreamUnavailable(host, retry_in)
+
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    retry_budget.deposit()
+    attempt = 0
+    while True:
+        delay = None
+        try:
+            response = await _upstream_attempt(method, url, timeout, action, attempt, **kwargs)
+        except (httpx.TimeoutException, httpx.NetworkError) as e:
+            error, reason = e, "timeout" if isinstance(e, httpx.TimeoutException) else "network"
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            error, reason = None, str(response.status_code)
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None and response.status_code in (429, 503):
+                # 알려준 시각까지 이 호스트로는 보내지 않음 (짧으면 그만큼 기다렸다가 재시도)
+                _retry_after_until[host] = time.monotonic() + min(retry_after, RETRY_AFTER_MAX)
+                delay = retry_after if retry_after <= RETRY_MAX_DELAY else None
+                if delay is None:
+                    return response
+
+        attempt += 1
+        if not idempotent or attempt >= RETRY_MAX_ATTEMPTS or not retry_budget.withdraw():
+            if error is not None:
+                raise error
+            return response
+        upstream_retries.inc((host, reason))
+        current_span().set("retries", attempt)
+        await asyncio.sleep(backoff_delay(attempt) if delay is None else delay)
+
+
+async def _upstream_attempt(method: str, url: str, timeout: float, action: str, attempt: int,
+                            **kwargs) -> httpx.Response:
+    """업스트림 요청 1회 (호스트별 동시성 제한 + 메트릭 + span)"""
+    limiter = get_limiter(url)
+    with trace_span("upstream", host=limiter.name, action=action) as span:
+        if attempt:
+            span.set("attempt", attempt + 1)
+        queued_at = time.monotonic()
+        await limiter.acquire()
+        start = time.monotonic()
+        span.set("queue_ms", round((start - queued_at) * 1000, 3))
+        ok = False
+        status = "cancelled"
+        try:
+            response = await get_http_client().request(method, url, timeout=timeout, **kwargs)
+            status = str(response.status_code)
+            ok = response.status_code < 500 and response.status_code != 429
+            span.set("bytes", len(response.content))
+            return response
+        except httpx.TimeoutException:
+            status = "timeout"
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            latency = time.monotonic() - start
+            limiter.release(latency, ok)
+            upstream_duration.observe((limiter.name, action, status), latency)
+            span.set("status", status)
+
+
+# 백그라운드 태스크 참조 보관 (GC로 중간에 사라지는 것 방지)
+_background_tasks = set()
+
+
+def spawn_background(coro) -> asyncio.Task:
+    """fire-and-forget 태스크 실행"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+# ============ 메모리 캐시 ============
+class LRUCache:
+    """크기 제한이 있는 LRU 캐시"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        return self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TTLCache:
+    """항목별 만료 시간이 있는 LRU 캐시 (항목 수 제한)"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key → (value, expires_at)
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float):
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        entry = self._data.pop(key, None)
+        return None if entry is None else entry[0]
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+
+# ============ 캐시 백엔드 (프로세스 내 / 워커 공유) ============
+# memory: 프로세스 메모리 (워커마다 따로 → 워커가 N개면 적중률도 그만큼 떨어짐)
+# shared: 같은 호스트의 모든 워커가 SQLite(WAL) 파일 하나를 공유
+# 워커가 여러 개면 기본 shared, 캐시별로 *_CACHE_BACKEND로 따로 지정 가능
+CACHE_BACKEND = os.getenv("CACHE_BACKEND") or ("shared" if WORKERS > 1 else "memory")
+SHARED_CACHE_DB = os.getenv("SHARED_CACHE_DB", os.path.join(CACHE_DIR, "cache.sqlite3"))
+SHARED_CACHE_PRUNE_EVERY = int(os.getenv("SHARED_CACHE_PRUNE_EVERY", "256"))  # 쓰기 N회마다 만료/초과분 정리
 
+
+class CacheBackend:
+    """캐시 백엔드 - 값은 JSON 직렬화 가능해야 함, ttl=None이면 만료 없음
+
+    적중/미스는 프로세스별로 집계
+    """
+
+    kind = ""
+    db_path = None  # 공유 파일 경로 (프로세스 내 백엔드는 None)
+
+    def __init__(self, name: str, max_size: int):
+        self.name = name
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str):
+        """값 반환 (없거나 만료되면 None)"""
+        value = await self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value, ttl: float = None):
+        await self.set_many([(key, value)], ttl)
+
+    async def _get(self, key: str):
+        raise NotImplementedError
+
+    async def set_many(self, items: list, ttl: float = None):
+        """[(key, value)] 한 번에 저장"""
+        raise NotImplementedError
+
+    async def delete(self, key: str = None):
+        """항목 삭제 (key 없으면 전체)"""
+        raise NotImplementedError
+
+    async def count(self) -> int:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    async def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.kind,
+            "entries": await self.count(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "db_path": self.db_path,
+        }
+
+
+class MemoryCacheBackend(CacheBackend):
+    """프로세스 내 백엔드 (TTLCache)"""
+
+    kind = "memory"
+
+    def __init__(self, name: str, max_size: int):
+        super().__init__(name, max_size)
+        self._cache = TTLCache(max_size)
+
+    async def _get(self, key):
+        return self._cache.get(key)
+
+    async def set_many(self, items, ttl=None):
+        for key, value in items:
+            self._cache.set(key, value, float("inf") if ttl is None else ttl)
+
+    async def delete(self, key=None):
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key)
+
+    async def count(self):
+        return len(self._cache)
+
+
+class SqliteCacheBackend(CacheBackend):
+    """워커 공유 백엔드 (SQLite WAL, 캐시 이름별 namespace)
+
+    - 만료 시각(epoch)을 행에 같이 저장하고 조회 조건에 넣음 → 만료 판정이 한 문장 안에서 원자적
+    - 쓰기는 INSERT OR REPLACE 트랜잭션 → 다른 워커는 이전 값 아니면 새 값만 봄
+    - 만료 행 정리 / max_size 초과분(오래 전에 쓴 순) 삭제는 쓰기 SHARED_CACHE_PRUNE_EVERY회마다
+    - 파일을 열 수 없으면 (읽기 전용 파일시스템 등) 프로세스 내 백엔드로 대신 동작
+    """
+
+    kind = "shared"
+
+    def __init__(self, name: str, max_size: int, db_path: str = SHARED_CACHE_DB):
+        super().__init__(name, max_size)
+        self.db_path = db_path
+        self._conn = None
+        self._fallback = None
+        self._writes = 0
+        # SQLite 연결은 이 스레드 하나에서만 사용 (이벤트 루프는 디스크 I/O로 막히지 않음)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"cache-{name}")
+
+    # --- 디스크 작업 (전용 스레드에서 실행) ---
+
+    def _connect(self):
+        if self._conn is None and self._fallback is None:
+            try:
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                # timeout: 다른 워커가 쓰는 중이면 잠금 대기
+                conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL, "
+                    "PRIMARY KEY (ns, key))"
+                )
+                self._conn = conn
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("shared cache %s disabled (%s): %s - using memory", self.name, self.db_path, e)
+                self._fallback = MemoryCacheBackend(self.name, self.max_size)
+                self.db_path = None
+        return self._conn
+
+    def _db_get(self, key: str):
+        conn = self._connect()
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT value FROM cache WHERE ns = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (self.name, key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _db_put_many(self, items: list, ttl):
+        conn = self._connect()
+        if conn is None:
+            return
+        expires_at = None if ttl is None else time.time() + ttl
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache (ns, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                [(self.name, key, json.dumps(value, ensure_ascii=False), expires_at) for key, value in items],
+            )
+        self._writes += len(items)
+        if self._writes >= SHARED_CACHE_PRUNE_EVERY:
+            self._writes = 0
+            self._db_prune(conn)
+
+    def _db_prune(self, conn):
+        with conn:
+            conn.execute("DELETE FROM cache WHERE ns = ? AND expires_at <= ?", (self.name, time.time()))
+            excess = self._db_count() - self.max_size
+            if excess > 0:
+                # INSERT OR REPLACE는 rowid를 새로 받음 → rowid 작은 순 = 오래 전에 쓴 순
+                conn.execute(
+                    "DELETE FROM cache WHERE rowid IN "
+                    "(SELECT rowid FROM cache WHERE ns = ? ORDER BY rowid LIMIT ?)",
+                    (self.name, excess),
+                )
+
+    def _db_delete(self, key: str = None):
+        conn = self._connect()
+        if conn is None:
+            return
+        with conn:
+            if key is None:
+                conn.execute("DELETE FROM cache WHERE ns = ?", (self.name,))
+            else:
+                conn.execute("DELETE FROM cache WHERE ns = ? AND key = ?", (self.name, key))
+
+    def _db_count(self) -> int:
+        conn = self._connect()
+        if conn is None:
+            return 0
+        return conn.execute("SELECT COUNT(*) FROM cache WHERE ns = ?", (self.name,)).fetchone()[0]
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    # --- 비동기 인터페이스 (DB 오류는 캐시 미스/쓰기 생략으로 처리) ---
+
+    async def _get(self, key):
+        if self._fallback is not None:
+            return await self._fallback._get(key)
+        try:
+            return await self._run(self._db_get, key)
+        except sqlite3.Error as e:
+            logger.warning("shared cache %s read failed: %s", self.name, e)
+            return None
+
+    async def set_many(self, items, ttl=None):
+        if self._fallback is not None:
+            return await self._fallback.set_many(items, ttl)
+        try:
+            await self._run(self._db_put_many, items, ttl)
+        except sqlite3.Error as e:
+            logger.warning("shared cache %s write failed: %s", self.name, e)
+
+    async def delete(self, key=None):
+        if self._fallback is not None:
+            return await self._fallback.delete(key)
+        await self._run(self._db_delete, key)
+
+    async def count(self):
+        if self._fallback is not None:
+            return await self._fallback.count()
+        try:
+            return await self._run(self._db_count)
+        except sqlite3.Error:
+            return None
+
+    async def close(self):
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+
+
+def create_cache_backend(kind: str, name: str, max_size: int, **options) -> CacheBackend:
+    """설정 이름(memory/shared)으로 백엔드 생성 (options는 shared 전용)"""
+    if kind == "memory":
+        return MemoryCacheBackend(name, max_size)
+    if kind == "shared":
+        return SqliteCacheBackend(name, max_size, **options)
+    raise ValueError(f"알 수 없는 캐시 백엔드: {kind} (memory | shared)")
+
+
+# ============ 동시 요청 합치기 (single-flight) ============
+class SingleFlight:
+    """같은 키의 동시 요청을 하나의 실행으로 합치고 결과/예외를 모든 호출자에게 전달"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.shared = 0
+        self._inflight = {}  # key → [Task, 대기자 수]
+
+    async def do(self, key, fn, *args):
+        call = self._inflight.get(key)
+        if call is None:
+            task = asyncio.create_task(fn(*args))
+            call = [task, 0]
+            self._inflight[key] = call
+            task.add_done_callback(lambda _, key=key, call=call: self._forget(key, call))
+            self.calls += 1
+            current_span().set("singleflight", "leader")
+        else:
+            self.shared += 1
+            current_span().set("singleflight", "shared")
+
+        call[1] += 1
+        try:
+            # 한 호출자가 취소돼도 공유 Task는 계속 실행 (shield)
+            return await asyncio.shield(call[0])
+        finally:
+            call[1] -= 1
+            # 기다리는 호출자가 모두 취소되면 공유 Task도 취소
+            # (먼저 목록에서 빼야 그 사이 들어온 호출자가 취소 중인 Task에 합류하지 않음)
+            if call[1] == 0 and not call[0].done():
+                self._forget(key, call)
+                call[0].cancel()
+
+    def _forget(self, key, call):
+        if self._inflight.get(key) is call:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {"inflight": len(self._inflight), "calls": self.calls, "shared": self.shared}
+
+
+@asynccontextmanager
+async def app_lifespan(app):
+    """프로세스 수명주기: 시작 시 커넥션 풀 생성, 종료 시 정리"""
+    get_http_client()
+    if PREWARM_ENABLED:
+        prewarmer.start()
+    try:
+        yield
+    finally:
+        # 미리 채우기를 먼저 멈춰야 닫힌 캐시에 쓰지 않음
+        await prewarmer.stop()
+        await link_cache.close()
+        await danawa_cache.close()
+        await response_cache.backend.close()
+        await quota_limiter.close()
+        await close_http_client()
+        if hasattr(trace_exporter, "close"):
+            await asyncio.get_running_loop().run_in_executor(None, trace_exporter.close)
+
+
+def attach_lifespan(app):
+    """Starlette 앱의 기존 lifespan(MCP 세션 매니저)에 app_lifespan을 감싸서 연결"""
+    session_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async with app_lifespan(app):
+            async with session_lifespan(app):
+                yield
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+# 정렬 의도 단어 (위에 있을수록 우선)
+SORT_INTENT_WORDS = [
+    # 낮은 가격순
+    ('LOW', ['싼', '저렴', '가성비', '싸게', '최저가', '저가']),
+    # 인기/판매순
+    ('SALE', ['인기', '많이팔리', '베스트', '잘팔리', '판매량', '리뷰많', '후기많']),
     # 높은 가격순
-    if any(w in keyword_lower for w in ['프리미엄', '고급', '비싼', '최고급']):
-        return 'HIGH'
+    ('HIGH', ['프리미엄', '고급', '비싼', '최고급']),
+]
+
+
+# 정렬 의도 감지
+def detect_sort_intent(keyword: str) -> str:
+    """사용자 키워드에서 정렬 의도 파악
+
+    Returns: SIM(관련성), SALE(인기순), LOW(낮은가격), HIGH(높은가격)
+    """
+    _, sort_type = match_keyword(keyword)
 
     # 기본: 관련성
-    return 'SIM'
+    return sort_type or 'SIM'
 
 
 # 정렬 라벨
@@ -126,7 +1365,126 @@ async def icon_endpoint(request):
     icon_path = os.path.join(os.path.dirname(__file__), "static", "icon.svg")
     return FileResponse(icon_path, media_type="image/svg+xml")
 
-mcp = FastMCP("Coupang")
+def is_admin_request(request) -> bool:
+    """관리자 토큰 확인 (Authorization: Bearer <ADMIN_TOKEN>)"""
+    if not ADMIN_TOKEN:
+        return False
+    auth = request.headers.get("authorization", "")
+    # 상수 시간 비교 (응답 시간으로 토큰이 새지 않게)
+    return hmac.compare_digest(auth.encode(), f"Bearer {ADMIN_TOKEN}".encode())
+
+async def admin_upstreams_endpoint(request):
+    """/admin/upstreams 엔드포인트 (호스트별 동시성 한도/대기열, 서킷 브레이커 상태)"""
+    if not is_admin_request(request):
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+    return JSONResponse({
+        "limiters": {host: limiter.stats() for host, limiter in _limiters.items()},
+        "breakers": {"danawa": danawa_breaker.stats()},
+        "retry_budget": retry_budget.stats(),
+        "retry_after": {host: round(retry_after_remaining(host), 1) for host in list(_retry_after_until)},
+        "quota": await quota_limiter.stats() if QUOTA_ENABLED else None,
+    }, headers=WORKER_HEADERS)
+
+async def admin_pipeline_endpoint(request):
+    """/admin/pipeline 엔드포인트 (tool별 파이프라인 단계 평균 소요 시간, ms)"""
+    if not is_admin_request(request):
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+    return JSONResponse({
+        tool: {stage: {"count": count, "avg_ms": round(total / count * 1000, 3)}
+               for stage, (count, total) in stages.items()}
+        for tool, stages in pipeline_timings.items()
+    }, headers=WORKER_HEADERS)
+
+async def collect_state_metrics():
+    """이미 집계 중인 캐시/제한기/브레이커 값을 메트릭으로 복사 (스크레이프 시점)"""
+    for host, limiter in _limiters.items():
+        upstream_in_flight.set((host,), limiter.in_flight)
+        upstream_queued.set((host,), len(limiter._waiters))
+        upstream_limit.set((host,), round(limiter.limit, 2))
+
+    for state in ("closed", "open", "half_open"):
+        breaker_state.set((danawa_breaker.name, state), 1 if danawa_breaker.state == state else 0)
+
+    cache_requests.set(("danawa", "hit"), danawa_cache.hits)
+    cache_requests.set(("danawa", "miss"), danawa_cache.misses)
+    cache_requests.set(("responses", "hit"), response_cache.fresh_hits)
+    cache_requests.set(("responses", "stale"), response_cache.stale_hits)
+    cache_requests.set(("responses", "fallback"), response_cache.fallback_hits)
+    cache_requests.set(("responses", "miss"), response_cache.misses)
+    cache_requests.set(("links", "memory_hit"), link_cache.memory_hits)
+    cache_requests.set(("links", "disk_hit"), link_cache.disk_hits)
+    cache_requests.set(("links", "miss"), link_cache.misses)
+    cache_entries.set(("danawa",), await danawa_cache.count() or 0)
+    cache_entries.set(("responses",), await response_cache.backend.count() or 0)
+    cache_entries.set(("links",), len(link_cache.memory))
+    cache_entries.set(("product_names",), len(product_name_cache))
+    for name, tokens in quota_limiter.tokens.items():
+        quota_tokens.set((name,), round(tokens, 2))
+
+async def metrics_endpoint(request):
+    """/metrics 엔드포인트 (Prometheus text format)"""
+    await collect_state_metrics()
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8", headers=WORKER_HEADERS)
+
+async def admin_catalog_endpoint(request):
+    """/admin/catalog 엔드포인트 (GET: 카탈로그 정보, POST: 파일 다시 읽기)"""
+    if not is_admin_request(request):
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+    if request.method == "POST":
+        try:
+            catalog = reload_catalog()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # JSON 오류(ValueError 하위)/필드 누락 - 기존 카탈로그 그대로 사용
+            return JSONResponse({"error": f"reload 실패: {e}", "current": get_catalog().stats()}, status_code=400)
+        return JSONResponse(catalog.stats(), headers=WORKER_HEADERS)
+    return JSONResponse(get_catalog().stats(), headers=WORKER_HEADERS)
+
+async def admin_cache_endpoint(request):
+    """/admin/cache 엔드포인트 (GET: 캐시 통계, DELETE: 캐시 삭제)"""
+    if not is_admin_request(request):
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+    if request.method == "DELETE":
+        # ?cache=links|danawa|responses (없으면 전체), ?pageKey=로 단축 링크 개별 삭제
+        target = request.query_params.get("cache", "all")
+        page_key = request.query_params.get("pageKey")
+        if target in ("all", "links"):
+            await link_cache.purge(page_key)
+        if target in ("all", "danawa"):
+            await danawa_cache.delete()
+        if target in ("all", "responses"):
+            await response_cache.clear()
+        return JSONResponse({"purged": target, "pageKey": page_key}, headers=WORKER_HEADERS)
+    return JSONResponse({
+        "links": await link_cache.stats(),
+        "danawa": await danawa_cache.stats(),
+        "responses": await response_cache.stats(),
+        "singleflight": {f.name: f.stats() for f in (api_flight, danawa_flight, link_flight)},
+        "prewarm": prewarmer.stats(),
+    }, headers=WORKER_HEADERS)
+
+class InstrumentedFastMCP(FastMCP):
+    """tool 호출마다 소요 시간 / 실행 중 수를 메트릭에 기록하고 트레이스 루트 span 생성"""
+
+    active_calls = 0  # 실행 중인 tool 호출 수 (미리 채우기가 양보할 때 확인)
+
+    async def call_tool(self, name, arguments):
+        labels = (name,)
+        tool_in_flight.inc(labels)
+        self.active_calls += 1
+        start = time.monotonic()
+        status = "error"
+        try:
+            with trace_tool(name, arguments):
+                result = await super().call_tool(name, arguments)
+            status = "ok"
+            return result
+        finally:
+            tool_in_flight.dec(labels)
+            self.active_calls -= 1
+            tool_duration.observe((name, status), time.monotonic() - start)
+
+
+mcp = InstrumentedFastMCP("Coupang", stateless_http=MCP_STATELESS, json_response=MCP_JSON_RESPONSE)
 
 
 def extract_page_key(url: str) -> str:
@@ -163,6 +1521,158 @@ def format_price_range(price: int) -> str:
 
 import re
 
+# ============ 상품명 토크나이저 ============
+# 상품명을 한 번만 분석해 수량/사이즈/용량/괄호 옵션을 분류하고 상품명별로 캐시
+# (parse_product_name / extract_option_from_name / build_search_keyword 가 같은 결과를 공유)
+
+PRODUCT_NAME_CACHE_SIZE = int(os.getenv("PRODUCT_NAME_CACHE_SIZE", "4096"))
+
+# 숫자 토큰(뒤 공백 포함) | 숫자가 아닌 단어 문자 토큰 - 두 토큰이 붙어 있으면 한 단어(\w+)
+NAME_TOKEN_RE = re.compile(r"(\d+)(\s*)|[^\W\d]+")
+
+# 숫자 뒤 단위 - 어떤 단위도 다른 단위의 접두어가 아니라서 2글자 → 1글자 순 조회로 충분
+OPTION_QTY_UNITS = frozenset(("개", "매", "팩", "세트", "박스", "장", "롤", "입", "p", "P", "ea", "EA"))
+OPTION_VOLUME_UNITS = frozenset(("ml", "ML", "mL", "L", "l", "g", "G", "kg", "KG"))
+OPTION_SIZE_WORDS = frozenset(("XXS", "XS", "S", "M", "L", "XL", "XXL", "XXXL", "소", "중", "대"))
+
+# 상품명 끝에서 떼어내는 옵션
+SUFFIX_QTY_UNITS = ("개", "켤레", "매", "팩", "세트", "박스", "장", "롤", "입")
+SUFFIX_SIZE_WORDS = ("소", "중", "대")
+PAREN_OPTION_WORDS = ("대용량", "소용량", "미니", "대형", "중형", "소형")
+
+
+def unit_at(name: str, pos: int, units: frozenset) -> str:
+    """pos 위치에서 시작하는 단위 (없으면 빈 문자열)"""
+    unit = name[pos:pos + 2]
+    if unit in units:
+        return unit
+    unit = unit[:1]
+    return unit if unit in units else ""
+
+
+def scan_options(name: str) -> str:
+    """상품명 전체를 한 번 훑어 "수량들 마지막사이즈 용량들" 옵션 문자열 생성"""
+    quantities = []
+    volumes = []
+    size = ""
+    candidate = ""  # 사이즈 후보 - 바로 뒤에 숫자가 붙지 않아야 단독 단어
+    prev_end = -1
+
+    for match in NAME_TOKEN_RE.finditer(name):
+        start = match.start()
+        if candidate:
+            if start != prev_end:
+                size = candidate
+            candidate = ""
+
+        if match.group(1) is None:
+            # 문자 토큰: 앞뒤에 다른 단어 문자가 없을 때만 사이즈 (\b사이즈\b)
+            if start != prev_end:
+                word = match.group().upper()
+                if word in OPTION_SIZE_WORDS:
+                    candidate = word
+            prev_end = match.end()
+            continue
+
+        # 숫자 토큰: 공백 뒤 단위가 오면 수량 또는 용량
+        unit_pos = match.end()
+        unit = unit_at(name, unit_pos, OPTION_QTY_UNITS)
+        if unit:
+            quantities.append(name[start:unit_pos + len(unit)])
+        else:
+            unit = unit_at(name, unit_pos, OPTION_VOLUME_UNITS)
+            if unit:
+                volumes.append(name[start:unit_pos + len(unit)])
+        prev_end = match.end(1)
+
+    if candidate:
+        size = candidate
+    if size:
+        quantities.append(size)
+    return " ".join(quantities + volumes)
+
+
+def has_option_hint(text: str) -> bool:
+    """괄호 내용이 숫자/크기 관련인지"""
+    return any(ch.isdecimal() for ch in text) or any(word in text for word in PAREN_OPTION_WORDS)
+
+
+def split_suffix_options(name: str) -> tuple:
+    """쉼표 없는 상품명 끝에서 사이즈 → 수량 → 괄호 옵션 순으로 떼어냄"""
+    options = []
+    base = name
+
+    # 사이즈: "... 중(M)", "... 소 (S)"
+    tail = base.rstrip()
+    open_pos = tail.rfind("(")
+    if tail.endswith(")") and open_pos >= 0:
+        code = tail[open_pos + 1:-1]
+        head = tail[:open_pos].rstrip()
+        if (code.isascii() and code.isalpha() and code.isupper()
+                and head[-1:] in SUFFIX_SIZE_WORDS and head[-2:-1].isspace()):
+            start = len(head[:-1].rstrip())
+            options.append(base[start:].strip())
+            base = base[:start]
+
+    # 수량: "... 5개", "... 10 켤레"
+    tail = base.rstrip()
+    for unit in SUFFIX_QTY_UNITS:
+        if tail.endswith(unit):
+            head = tail[:-len(unit)].rstrip()
+            digits_start = len(head)
+            while digits_start and head[digits_start - 1].isdecimal():
+                digits_start -= 1
+            if digits_start < len(head) and head[digits_start - 1:digits_start].isspace():
+                options.append(tail[digits_start:])
+                base = base[:len(head[:digits_start].rstrip())]
+            break
+
+    # 괄호 안 옵션: (대용량), (10개입) 등 - 마지막 ')' 앞 구간에서 가장 앞의 '('
+    tail = base.rstrip()
+    if tail.endswith(")"):
+        close = len(tail) - 1
+        open_pos = tail.find("(", tail.rfind(")", 0, close) + 1, close)
+        if 0 <= open_pos < close - 1:
+            content = tail[open_pos + 1:close]
+            if has_option_hint(content):
+                options.append(f"({content})")
+                base = base[:len(tail[:open_pos].rstrip())]
+
+    return base, options
+
+
+class ProductName:
+    """상품명 분석 결과 (캐시로 공유되므로 읽기 전용)"""
+
+    __slots__ = ("base", "options", "option_text", "words")
+
+    def __init__(self, name: str):
+        # 1. 쉼표로 분리된 옵션 처리, 2. 쉼표 없으면 상품명 끝에서 옵션 패턴 추출
+        parts = [p.strip() for p in name.split(',')]
+        if len(parts) > 1:
+            base = parts[0]
+            options = [p for p in parts[1:] if p]
+        else:
+            base, options = split_suffix_options(name)
+
+        self.base = base.strip()
+        self.options = tuple(options)
+        self.option_text = scan_options(name)
+        self.words = tuple(name.split())
+
+
+product_name_cache = LRUCache(PRODUCT_NAME_CACHE_SIZE)
+
+
+def analyze_product_name(name: str) -> ProductName:
+    """상품명 분석 (상품명별 캐시)"""
+    parsed = product_name_cache.get(name)
+    if parsed is None:
+        parsed = ProductName(name)
+        product_name_cache.set(name, parsed)
+    return parsed
+
+
 def parse_product_name(name: str) -> dict:
     """상품명에서 기본명과 옵션 분리
 
@@ -174,41 +1684,8 @@ def parse_product_name(name: str) -> dict:
       → base: "마미손 플라워 고무장갑"
       → options: ["중(M)"]
     """
-    options = []
-
-    # 1. 쉼표로 분리된 옵션 처리
-    parts = [p.strip() for p in name.split(',')]
-
-    if len(parts) > 1:
-        base = parts[0]
-        options = [p for p in parts[1:] if p]
-    else:
-        base = name
-
-        # 2. 쉼표 없을 때: 상품명 끝에서 옵션 패턴 추출
-
-        # 사이즈 패턴: 소(S), 중(M), 대(L) 등
-        size_match = re.search(r'\s+(소|중|대)\s*\([A-Z]+\)\s*$', base)
-        if size_match:
-            options.append(size_match.group().strip())
-            base = base[:size_match.start()]
-
-        # 수량 패턴: 5개, 10켤레, 50매 등 (끝에 있을 때)
-        qty_match = re.search(r'\s+(\d+\s*(개|켤레|매|팩|세트|박스|장|롤|입))\s*$', base)
-        if qty_match:
-            options.append(qty_match.group(1).strip())
-            base = base[:qty_match.start()]
-
-        # 괄호 안 옵션: (대용량), (10개입) 등
-        paren_match = re.search(r'\s*\(([^)]+)\)\s*$', base)
-        if paren_match:
-            paren_content = paren_match.group(1)
-            # 숫자나 사이즈 관련이면 옵션으로 추출
-            if re.search(r'\d|대용량|소용량|미니|대형|중형|소형', paren_content):
-                options.append(f"({paren_content})")
-                base = base[:paren_match.start()]
-
-    return {"base": base.strip(), "options": options}
+    parsed = analyze_product_name(name)
+    return {"base": parsed.base, "options": list(parsed.options)}
 
 
 def format_product_display(name: str, price: int) -> str:
@@ -245,30 +1722,7 @@ def extract_option_from_name(name: str) -> str:
     - "물티슈 100매 3팩" → "100매 3팩"
     - "티셔츠 XL" → "XL"
     """
-    option_parts = []
-
-    # 개수 패턴: 숫자+개/매/팩/세트/박스/장/롤/입
-    qty_pattern = r'\d+\s*(개|매|팩|세트|박스|장|롤|입|p|P|ea|EA)'
-    qty_matches = re.findall(qty_pattern, name)
-    if qty_matches:
-        # 전체 매치 추출
-        for match in re.finditer(qty_pattern, name):
-            option_parts.append(match.group())
-
-    # 사이즈 패턴: S/M/L/XL/XXL 또는 소/중/대
-    size_pattern = r'\b(XXS|XS|S|M|L|XL|XXL|XXXL|소|중|대)\b'
-    size_matches = re.findall(size_pattern, name, re.IGNORECASE)
-    if size_matches:
-        option_parts.append(size_matches[-1].upper())  # 마지막 사이즈
-
-    # 용량 패턴: 숫자+ml/L/g/kg
-    vol_pattern = r'\d+\s*(ml|ML|mL|L|l|g|G|kg|KG)'
-    vol_matches = re.findall(vol_pattern, name)
-    if vol_matches:
-        for match in re.finditer(vol_pattern, name):
-            option_parts.append(match.group())
-
-    return " ".join(option_parts) if option_parts else ""
+    return analyze_product_name(name).option_text
 
 
 def build_search_keyword(name: str, max_words: int = 4) -> str:
@@ -277,46 +1731,109 @@ def build_search_keyword(name: str, max_words: int = 4) -> str:
     기존: 앞 4단어만 → "스트픽 끈질긴 니트릴장갑 고무장갑" (5개 누락!)
     개선: 앞 4단어 + 옵션 → "스트픽 끈질긴 니트릴장갑 고무장갑 5개"
     """
-    # 앞 N단어 추출
-    words = name.split()[:max_words]
-    base_keyword = " ".join(words)
-
-    # 옵션 추출 (전체 이름에서)
-    option = extract_option_from_name(name)
+    parsed = analyze_product_name(name)
+    base_keyword = " ".join(parsed.words[:max_words])
 
     # 옵션이 이미 base_keyword에 포함되어 있으면 중복 방지
+    option = parsed.option_text
     if option and option not in base_keyword:
         return f"{base_keyword} {option}"
 
     return base_keyword
 
 
-async def get_danawa_price(keyword: str) -> dict:
-    """다나와에서 실제 가격 조회 (Netlify 도쿄 리전 프록시 경유)
+# 다나와 가격 캐시: 성공은 길게, 실패/미검색은 짧게 (같은 키워드는 TTL 동안 프록시 1회만 조회)
+DANAWA_CACHE_TTL = float(os.getenv("DANAWA_CACHE_TTL", "1800"))
+DANAWA_NEGATIVE_TTL = float(os.getenv("DANAWA_NEGATIVE_TTL", "120"))
+DANAWA_CACHE_SIZE = int(os.getenv("DANAWA_CACHE_SIZE", "10000"))
+DANAWA_CACHE_BACKEND = os.getenv("DANAWA_CACHE_BACKEND", CACHE_BACKEND)
 
-    HF Space는 해외 서버라 다나와 직접 접속 불가 → Netlify 프록시 사용
-    프록시: https://danawa-proxy-test.netlify.app (도쿄 리전, 아시아 IP)
+danawa_cache = create_cache_backend(DANAWA_CACHE_BACKEND, "danawa", DANAWA_CACHE_SIZE)
+danawa_flight = SingleFlight("danawa")
+
+# 다나와 프록시 서킷 브레이커: 열려 있는 동안은 프록시를 건너뛰고 바로 쿠팡 가격 사용
+danawa_breaker = CircuitBreaker(
+    "danawa",
+    window=float(os.getenv("DANAWA_BREAKER_WINDOW", "30")),
+    min_calls=int(os.getenv("DANAWA_BREAKER_MIN_CALLS", "10")),
+    failure_rate=float(os.getenv("DANAWA_BREAKER_FAILURE_RATE", "0.5")),
+    slow_call_duration=float(os.getenv("DANAWA_BREAKER_SLOW_CALL", "3.0")),
+    slow_call_rate=float(os.getenv("DANAWA_BREAKER_SLOW_RATE", "0.8")),
+    open_duration=float(os.getenv("DANAWA_BREAKER_OPEN_DURATION", "30")),
+    half_open_calls=int(os.getenv("DANAWA_BREAKER_HALF_OPEN_CALLS", "3")),
+)
+
+
+def normalize_keyword(keyword: str) -> str:
+    """캐시 키용 키워드 정규화 (대소문자/공백 차이 무시)"""
+    return " ".join(keyword.lower().split())
+
+
+async def fetch_danawa_price(keyword: str) -> tuple:
+    """다나와 프록시 조회 → (결과, 상태)
+
+    상태: "hit"(가격 있음), "miss"(success=false/가격 없음), "error"(타임아웃, JSON 아닌 응답 등)
     """
     from urllib.parse import quote
 
     try:
         encoded_keyword = quote(keyword)
-        proxy_url = f"https://danawa-proxy-test.netlify.app/.netlify/functions/danawa-test?keyword={encoded_keyword}"
+        proxy_url = f"{DANAWA_PROXY_URL}?keyword={encoded_keyword}"
+
+        response = await upstream_get(proxy_url, timeout=10.0, action="danawa")
+        data = response.json()
+        if not isinstance(data, dict):
+            raise ValueError(f"unexpected JSON {type(data).__name__}")
+    except Exception as e:
+        # 브레이커 실패로 집계되고 짧게 음성 캐시됨 - 원인은 로그로 남김
+        logger.warning("danawa lookup failed (%s): %s: %s", keyword, type(e).__name__, e)
+        return {"price": None, "source": None}, "error"
+
+    if data.get("success") and data.get("price"):
+        try:
+            # 프록시가 반환한 가격 문자열을 숫자로 변환
+            price_str = str(data["price"]).replace(",", "")
+            price = int(price_str)
+            return {"price": price, "source": "danawa_proxy"}, "hit"
+        except ValueError:
+            pass
+
+    return {"price": None, "source": None}, "miss"
+
+
+async def _load_danawa_price(key: str, keyword: str) -> dict:
+    if not danawa_breaker.allow():
+        # 차단 중: 캐시하지 않고 바로 폴백 (브레이커가 닫히면 즉시 다시 조회)
+        current_span().set("breaker", "rejected")
+        return {"price": None, "source": None}
+
+    start = time.monotonic()
+    status = None
+    try:
+        result, status = await fetch_danawa_price(keyword)
+    finally:
+        danawa_breaker.record(None if status is None else status != "error", time.monotonic() - start)
+    current_span().set("result", status)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(proxy_url, timeout=10.0)
-            data = response.json()
+    await danawa_cache.set(key, result, DANAWA_CACHE_TTL if status == "hit" else DANAWA_NEGATIVE_TTL)
+    return result
 
-            if data.get("success") and data.get("price"):
-                # 프록시가 반환한 가격 문자열을 숫자로 변환
-                price_str = data["price"].replace(",", "")
-                price = int(price_str)
-                return {"price": price, "source": "danawa_proxy"}
 
-    except Exception as e:
-        pass
+async def get_danawa_price(keyword: str) -> dict:
+    """다나와에서 실제 가격 조회 (Netlify 도쿄 리전 프록시 경유)
+
+    HF Space는 해외 서버라 다나와 직접 접속 불가 → Netlify 프록시 사용
+    프록시: https://danawa-proxy-test.netlify.app (도쿄 리전, 아시아 IP)
+    """
+    key = normalize_keyword(keyword)
+    with trace_span("get_danawa_price", keyword=keyword) as span:
+        cached = await danawa_cache.get(key)
+        span.set("cache", "miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
 
-    return {"price": None, "source": None}
+        # 같은 키워드를 동시에 조회 중이면 그 결과를 함께 기다림
+        return await danawa_flight.do(key, _load_danawa_price, key, keyword)
 
 
 def format_price(price: int) -> str:
@@ -337,808 +1854,223 @@ def format_price(price: int) -> str:
     return f"{price:,}원"
 
 
-# 카테고리별 구매 체크리스트 (팩트 기반, 할루시네이션 X)
-# - 변하지 않는 스펙 항목만
-# - 일반적인 조언만
-# - 구체적 수치/가격 X
-# - related: 연관 검색어 (같이 많이 사는 것)
-BUYING_TIPS = {
-    # ============ 전자기기 ============
-    "모니터": {
-        "keywords": ["모니터", "monitor", "디스플레이"],
-        "checks": ["해상도 (FHD/QHD/4K)", "주사율 (게임용은 높을수록)", "패널 종류 (IPS/VA/TN)"],
-        "tip": "받으면 빛샘/데드픽셀 점검 (교환 기한 내)",
-        "related": ["모니터암", "모니터 받침대", "HDMI 케이블"]
-    },
-    "노트북": {
-        "keywords": ["노트북", "laptop", "맥북", "macbook", "그램", "갤럭시북", "thinkpad"],
-        "checks": ["CPU 세대", "RAM 용량", "SSD 용량", "무게"],
-        "tip": "배터리 실사용시간은 후기에서 확인",
-        "related": ["노트북 파우치", "노트북 거치대", "USB허브", "충전기"]
-    },
-    "TV": {
-        "keywords": ["tv", "티비", "텔레비전", "올레드", "qled"],
-        "checks": ["패널 종류 (OLED/QLED/LED)", "화면 크기", "스마트TV 기능"],
-        "tip": "설치비, 벽걸이 비용 별도인지 확인",
-        "related": ["사운드바", "TV 거치대", "HDMI 케이블"]
-    },
-    "스마트폰": {
-        "keywords": ["폰", "phone", "아이폰", "iphone", "갤럭시", "galaxy"],
-        "checks": ["저장용량", "카메라 성능", "배터리 용량"],
-        "tip": "자급제 vs 약정 가격 비교",
-        "related": ["폰케이스", "강화유리", "충전기", "보조배터리"]
-    },
-    "태블릿": {
-        "keywords": ["태블릿", "아이패드", "ipad", "갤럭시탭"],
-        "checks": ["화면 크기", "저장용량", "펜슬 지원 여부", "셀룰러 유무"],
-        "tip": "키보드, 펜슬 별매인지 확인",
-        "related": ["태블릿 케이스", "펜슬", "키보드", "거치대"]
-    },
-    "이어폰": {
-        "keywords": ["이어폰", "에어팟", "airpods", "버즈", "헤드폰", "헤드셋"],
-        "checks": ["노이즈캔슬링 유무", "배터리 시간", "방수등급"],
-        "tip": "이어팁 사이즈 후기 참고",
-        "related": ["이어폰 케이스", "이어팁", "이어폰 줄"]
-    },
-    "스피커": {
-        "keywords": ["스피커", "speaker", "블루투스스피커", "사운드바"],
-        "checks": ["출력 (W)", "연결 방식 (블루투스/유선)", "방수 여부"],
-        "tip": "실사용 음질은 후기 영상으로 확인",
-        "related": ["오디오 케이블", "스피커 스탠드", "서브우퍼"]
-    },
-    "키보드": {
-        "keywords": ["키보드", "keyboard", "기계식", "무접점"],
-        "checks": ["스위치 타입", "배열 (풀배열/텐키리스)", "유선/무선"],
-        "tip": "타건감은 직접 체험이 best",
-        "related": ["손목받침대", "키캡", "키보드 파우치"]
-    },
-    "마우스": {
-        "keywords": ["마우스", "mouse", "로지텍", "버티컬"],
-        "checks": ["유선/무선", "그립감", "DPI"],
-        "tip": "손목 불편하면 버티컬 마우스 고려",
-        "related": ["마우스패드", "손목받침대", "마우스 번지"]
-    },
-    "웹캠": {
-        "keywords": ["웹캠", "webcam", "화상카메라"],
-        "checks": ["해상도 (720p/1080p/4K)", "프레임 (30fps/60fps)", "마이크 내장"],
-        "tip": "화각(시야각)도 확인",
-        "related": ["삼각대", "링라이트", "마이크"]
-    },
-    "외장하드": {
-        "keywords": ["외장하드", "외장ssd", "ssd", "hdd", "저장장치"],
-        "checks": ["용량", "읽기/쓰기 속도", "연결 방식 (USB/썬더볼트)"],
-        "tip": "SSD가 HDD보다 빠르고 충격에 강함",
-        "related": ["외장하드 케이스", "USB허브", "케이블"]
-    },
-    "충전기": {
-        "keywords": ["충전기", "어댑터", "케이블", "고속충전"],
-        "checks": ["출력 (W)", "포트 개수", "호환 기기"],
-        "tip": "정품 인증 제품인지 확인",
-        "related": ["보조배터리", "케이블정리함", "멀티탭"]
-    },
-    "프린터": {
-        "keywords": ["프린터", "복합기", "잉크젯", "레이저"],
-        "checks": ["잉크젯/레이저", "컬러/흑백", "복합기능 (스캔/복사)"],
-        "tip": "잉크/토너 가격도 미리 확인",
-        "related": ["잉크", "토너", "A4용지", "복사지"]
-    },
+# ============ 키워드 매칭 오토마톤 (Aho-Corasick) ============
+# 카테고리 × 키워드마다 부분 문자열 검사를 반복하지 않고,
+# 모든 키워드를 카탈로그 로드 시 하나의 오토마톤으로 컴파일 → 키워드를 한 번만 훑어서
+# 구매 팁 카테고리와 정렬 의도를 동시에 찾음 (기존 우선순위 그대로: 먼저 정의된 것이 우선)
+class KeywordAutomaton:
+    """여러 패턴 동시 검색 - 채널별로 가장 우선순위가 높은(값이 작은) 매치 반환"""
+
+    def __init__(self, channels: int):
+        self.channels = channels
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [[None] * channels]  # 노드별 (실패 링크 포함) 채널별 최고 우선순위
+
+    def add(self, pattern: str, channel: int, priority: int):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append([None] * self.channels)
+            node = nxt
+        current = self._best[node][channel]
+        if current is None or priority < current:
+            self._best[node][channel] = priority
+
+    def build(self):
+        """실패 링크 계산 (BFS) + 출력 우선순위 병합"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                best, inherited = self._best[nxt], self._best[self._fail[nxt]]
+                for c in range(self.channels):
+                    if inherited[c] is not None and (best[c] is None or inherited[c] < best[c]):
+                        best[c] = inherited[c]
+                queue.append(nxt)
+        return self
+
+    def search(self, text: str) -> list:
+        """채널별 최고 우선순위 (매치 없으면 None)"""
+        goto, fail, best_of = self._goto, self._fail, self._best
+        result = [None] * self.channels
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if node:
+                for c, priority in enumerate(best_of[node]):
+                    if priority is not None and (result[c] is None or priority < result[c]):
+                        result[c] = priority
+        return result
+
+
+TIP_CHANNEL, SORT_CHANNEL = 0, 1
+
+
+def render_buying_tip(category: str, data: dict) -> str:
+    """구매 팁 문자열 생성 (카탈로그 로드 시 미리 만들어 둠)"""
+    checks = data.get("checks", [])
+    tip = data.get("tip", "")
+    related = data.get("related", [])
+
+    result = f"\n📋 **{category} 살 때 체크할 것**\n"
+    for check in checks:
+        result += f"  - {check}\n"
+    if tip:
+        result += f"\n💡 {tip}\n"
+    if related:
+        result += f"\n🔗 **같이 많이 사는 것:** {', '.join(related)}\n"
+    return result
+
+
+def build_keyword_automaton(tips: dict, sort_words: list) -> KeywordAutomaton:
+    """구매 팁 키워드 + 정렬 의도 단어를 하나의 오토마톤으로 컴파일"""
+    automaton = KeywordAutomaton(channels=2)
+    for priority, data in enumerate(tips.values()):
+        for kw in data["keywords"]:
+            automaton.add(kw, TIP_CHANNEL, priority)
+    for priority, (_, words) in enumerate(sort_words):
+        for word in words:
+            automaton.add(word, SORT_CHANNEL, priority)
+    return automaton.build()
 
-    # ============ 가전제품 ============
-    "냉장고": {
-        "keywords": ["냉장고", "김치냉장고"],
-        "checks": ["용량 (L)", "에너지 효율 등급", "도어 타입"],
-        "tip": "효율등급 따라 전기세 차이 있음",
-        "related": ["냉장고 정리함", "탈취제", "냉장고 매트"]
-    },
-    "세탁기": {
-        "keywords": ["세탁기", "건조기", "워시타워"],
-        "checks": ["용량 (kg)", "에너지 효율", "통세척 기능"],
-        "tip": "건조기는 히트펌프 방식이 효율 좋음",
-        "related": ["세탁세제", "섬유유연제", "세탁망", "건조기시트"]
-    },
-    "청소기": {
-        "keywords": ["청소기", "로봇청소기", "무선청소기", "다이슨"],
-        "checks": ["흡입력", "배터리 시간", "먼지통 용량"],
-        "tip": "소모품 가격도 미리 확인",
-        "related": ["청소기 필터", "먼지봉투", "물걸레"]
-    },
-    "에어컨": {
-        "keywords": ["에어컨", "에어콘", "냉난방기"],
-        "checks": ["냉방 면적 (평수)", "에너지 효율", "인버터 유무"],
-        "tip": "설치비 별도인 경우 많음",
-        "related": ["에어컨 필터", "서큘레이터", "에어컨 커버"]
-    },
-    "공기청정기": {
-        "keywords": ["공기청정기", "미세먼지"],
-        "checks": ["청정 면적", "필터 타입", "소음"],
-        "tip": "필터 교체 주기/가격도 확인",
-        "related": ["공기청정기 필터", "가습기"]
-    },
-    "제습기": {
-        "keywords": ["제습기", "가습기"],
-        "checks": ["제습/가습 용량", "적정 면적", "물통 크기"],
-        "tip": "연속배수 가능하면 물 버리기 편함",
-        "related": ["제습제", "습도계", "호스"]
-    },
-    "전자레인지": {
-        "keywords": ["전자레인지", "오븐", "광파오븐"],
-        "checks": ["용량 (L)", "출력 (W)", "부가기능 (그릴/오븐)"],
-        "tip": "내부 크기가 실제 조리 용량",
-        "related": ["전자레인지 용기", "오븐장갑", "오븐팬"]
-    },
-    "밥솥": {
-        "keywords": ["밥솥", "압력밥솥", "전기밥솥"],
-        "checks": ["인원수 (인분)", "압력/일반", "내솥 재질"],
-        "tip": "내솥 코팅 수명도 고려",
-        "related": ["내솥", "주걱", "쌀"]
-    },
-    "선풍기": {
-        "keywords": ["선풍기", "서큘레이터", "에어컨선풍기"],
-        "checks": ["날개 유무 (일반/날개없는)", "풍량 단계", "타이머"],
-        "tip": "소음 dB 확인 (침실용)",
-        "related": ["선풍기 커버", "멀티탭"]
-    },
-    "드라이기": {
-        "keywords": ["드라이기", "헤어드라이어", "고데기"],
-        "checks": ["출력 (W)", "온도/풍량 조절", "무게"],
-        "tip": "머리카락 손상 적은 이온 기능 확인",
-        "related": ["고데기", "헤어롤", "열보호제"]
-    },
 
-    # ============ 가구/인테리어 ============
-    "의자": {
-        "keywords": ["의자", "체어", "chair", "게이밍체어", "사무용의자"],
-        "checks": ["등받이 각도", "팔걸이 조절", "메쉬/쿠션"],
-        "tip": "허리 안 좋으면 요추 지지대 확인",
-        "related": ["등받이쿠션", "발받침", "좌식의자"]
-    },
-    "책상": {
-        "keywords": ["책상", "데스크", "컴퓨터책상", "모션데스크", "스탠딩"],
-        "checks": ["가로 길이", "높이 조절 여부", "상판 두께"],
-        "tip": "모니터암 쓸 거면 상판 두께 확인",
-        "related": ["모니터암", "책상정리함", "케이블정리"]
-    },
-    "매트리스": {
-        "keywords": ["매트리스", "침대", "토퍼"],
-        "checks": ["경도 (단단함 정도)", "소재", "사이즈"],
-        "tip": "개인차 크니 체험 가능 제품 추천",
-        "related": ["토퍼", "베개", "침대프레임", "매트리스커버"]
-    },
-    "소파": {
-        "keywords": ["소파", "쇼파", "리클라이너"],
-        "checks": ["크기 (인용)", "소재 (가죽/패브릭)", "조립 필요 여부"],
-        "tip": "배송 시 문 통과 가능한지 확인",
-        "related": ["소파쿠션", "소파커버", "사이드테이블"]
-    },
-    "수납장": {
-        "keywords": ["수납장", "서랍장", "옷장", "행거"],
-        "checks": ["크기", "칸 개수", "조립 필요 여부"],
-        "tip": "조립 난이도 후기 확인",
-        "related": ["옷걸이", "수납박스", "리빙박스"]
-    },
-    "커튼": {
-        "keywords": ["커튼", "블라인드", "암막"],
-        "checks": ["크기 (창문에 맞는지)", "암막/일반", "세탁 가능 여부"],
-        "tip": "창문 실측 후 구매",
-        "related": ["커튼봉", "커튼고리", "레일"]
-    },
+def render_recommendations(recommendations: dict) -> tuple:
+    """카테고리별 인기 검색어 응답 미리 생성 → (카테고리별 응답, 전체 목록 응답)"""
+    pages = {}
+    for category, cat_data in recommendations.items():
+        result = [
+            f"# {cat_data['emoji']} {category} 인기 검색어\n",
+            "| 순위 | 검색어 |",
+            "|:---:|:---|"
+        ]
+        for idx, item in enumerate(cat_data["items"], 1):
+            result.append(f"| {idx} | {item} |")
+        result.append("\n> 검색하고 싶은 번호나 검색어를 말해주세요!")
+        pages[category] = "\n".join(result)
 
-    # ============ 건강/뷰티 ============
-    "영양제": {
-        "keywords": ["영양제", "비타민", "오메가3", "유산균", "프로바이오틱스"],
-        "checks": ["함량", "원료", "인증마크"],
-        "tip": "복용 중인 약과 상호작용 확인",
-        "related": ["비타민", "유산균", "오메가3", "밀크씨슬"]
-    },
-    "화장품": {
-        "keywords": ["화장품", "스킨케어", "선크림", "에센스", "로션"],
-        "checks": ["피부 타입", "성분", "유통기한"],
-        "tip": "병행수입은 정품 여부 확인",
-        "related": ["토너", "세럼", "크림", "클렌저"]
-    },
-    "체중계": {
-        "keywords": ["체중계", "인바디", "체지방"],
-        "checks": ["측정 항목 (체중만/체지방)", "앱 연동", "최대 측정 무게"],
-        "tip": "체지방 수치는 참고용",
-        "related": ["줄자", "다이어트식품"]
-    },
-    "안마기": {
-        "keywords": ["안마기", "안마의자", "마사지기", "어깨안마기"],
-        "checks": ["부위 (전신/부분)", "강도 조절", "크기"],
-        "tip": "소음과 실제 마사지 강도 후기 확인",
-        "related": ["마사지볼", "폼롤러", "지압기"]
-    },
+    result = [
+        "# 🛍️ 카테고리별 인기 검색어\n",
+        "어떤 카테고리가 궁금하세요?\n"
+    ]
+    for cat_name, cat_data in recommendations.items():
+        top3 = ", ".join(cat_data["items"][:3])
+        result.append(f"**{cat_data['emoji']} {cat_name}**: {top3}...")
+    result.append("\n---")
+    result.append("> 카테고리 이름을 말해주세요! (예: 전자기기, 가전, 식품...)")
+    return pages, "\n".join(result)
 
-    # ============ 식품 ============
-    "과일": {
-        "keywords": ["사과", "배", "귤", "딸기", "포도", "수박", "과일", "망고", "바나나"],
-        "checks": ["등급", "산지", "중량"],
-        "tip": "제철 과일이 맛도 좋고 가격도 저렴",
-        "related": ["과일세척제", "과일바구니", "견과류"]
-    },
-    "고기": {
-        "keywords": ["소고기", "돼지고기", "닭고기", "한우", "삼겹살", "목살"],
-        "checks": ["등급", "부위", "냉장/냉동", "원산지"],
-        "tip": "g당 가격으로 비교",
-        "related": ["고기양념", "쌈채소", "그릴팬"]
-    },
-    "해산물": {
-        "keywords": ["새우", "연어", "고등어", "참치", "회", "해산물", "전복"],
-        "checks": ["원산지", "양식/자연산", "냉장/냉동"],
-        "tip": "냉동이 오히려 신선할 수 있음 (선상냉동)",
-        "related": ["초장", "와사비", "회칼"]
-    },
-    "쌀": {
-        "keywords": ["쌀", "현미", "잡곡"],
-        "checks": ["품종", "도정일", "중량"],
-        "tip": "도정일 최근일수록 신선",
-        "related": ["잡곡", "쌀통", "계량컵"]
-    },
-    "커피": {
-        "keywords": ["커피", "원두", "캡슐커피", "드립백"],
-        "checks": ["로스팅 날짜", "원산지", "분쇄 여부"],
-        "tip": "원두는 로스팅 날짜 최근일수록 신선",
-        "related": ["커피머신", "커피그라인더", "드리퍼", "텀블러"]
-    },
-    "생수": {
-        "keywords": ["생수", "물", "탄산수", "미네랄워터"],
-        "checks": ["용량", "경도 (연수/경수)", "원산지"],
-        "tip": "무거우니 배송 추천",
-        "related": ["탄산수메이커", "물병"]
-    },
-    "라면": {
-        "keywords": ["라면", "컵라면", "봉지라면"],
-        "checks": ["개수", "맛", "유통기한"],
-        "tip": "박스 단위가 개당 가격 저렴",
-        "related": ["라면냄비", "라면그릇", "만두"]
-    },
 
-    # ============ 유아용품 ============
-    "기저귀": {
-        "keywords": ["기저귀", "팬티기저귀", "하기스", "팸퍼스"],
-        "checks": ["사이즈 (체중 기준)", "흡수력", "피부 자극"],
-        "tip": "아기마다 맞는 브랜드 다름",
-        "related": ["물티슈", "기저귀크림", "기저귀가방"]
-    },
-    "분유": {
-        "keywords": ["분유", "앱솔루트", "남양", "매일"],
-        "checks": ["단계 (개월수)", "성분"],
-        "tip": "아기마다 맞는 분유 다르니 소량 테스트",
-        "related": ["젖병", "분유포트", "젖꼭지"]
-    },
-    "유모차": {
-        "keywords": ["유모차", "휴대용유모차", "디럭스유모차"],
-        "checks": ["무게", "접이식 여부", "바퀴 크기"],
-        "tip": "직접 접어보고 무게 확인 추천",
-        "related": ["유모차시트", "유모차가방", "모기장"]
-    },
-    "카시트": {
-        "keywords": ["카시트", "주니어카시트", "신생아카시트"],
-        "checks": ["연령/체중 범위", "ISOFIX 지원", "인증마크"],
-        "tip": "차량 시트와 호환되는지 확인",
-        "related": ["카시트보호매트", "목베개", "햇빛가리개"]
-    },
+def render_seasonal(seasonal: dict) -> tuple:
+    """시즌별 추천 응답 미리 생성 → (시즌별 응답, 시즌 목록 응답)"""
+    pages = {}
+    for season, data in seasonal["seasons"].items():
+        result = [
+            f"# {data['emoji']} {season} 추천 상품\n",
+            f"**시기:** {data['period']}\n",
+            "| 순위 | 추천 검색어 |",
+            "|:---:|:---|"
+        ]
+        for idx, item in enumerate(data["items"], 1):
+            result.append(f"| {idx} | {item} |")
+        result.append(f"\n💡 **Tip:** {data['tip']}")
+        result.append("\n> 검색하고 싶은 상품을 말해주세요!")
+        pages[season] = "\n".join(result)
 
-    # ============ 반려동물 ============
-    "사료": {
-        "keywords": ["사료", "강아지사료", "고양이사료", "습식", "건식"],
-        "checks": ["주원료", "연령별", "알러지 성분"],
-        "tip": "새 사료는 기존 것과 섞어서 천천히 전환",
-        "related": ["밥그릇", "사료통", "급식기"]
-    },
-    "간식": {
-        "keywords": ["강아지간식", "고양이간식", "덴탈껌", "츄르"],
-        "checks": ["원료", "칼로리", "급여량"],
-        "tip": "급여량 지키기 (비만 주의)",
-        "related": ["간식통", "노즈워크", "장난감"]
-    },
-    "배변패드": {
-        "keywords": ["배변패드", "패드", "배변판"],
-        "checks": ["사이즈", "흡수력", "매수"],
-        "tip": "대용량이 장당 가격 저렴",
-        "related": ["배변판", "탈취제", "집게"]
-    },
+    # 현재 시즌 / 다가오는 이벤트는 카탈로그의 overview에서 관리
+    overview = seasonal["overview"]
+    result = [
+        "# 📅 시즌별 추천\n",
+        f"**현재:** {overview['current']}\n",
+        f"**다가오는 이벤트:** {overview['upcoming']}\n",
+        "",
+        "어떤 시즌이 궁금하세요?\n"
+    ]
+    for name, data in seasonal["seasons"].items():
+        result.append(f"**{data['emoji']} {name}** ({data['period']})")
+    result.append("\n---")
+    result.append("> 시즌 이름을 말해주세요! (예: 겨울, 설날, 발렌타인...)")
+    return pages, "\n".join(result)
 
-    # ============ 자동차용품 ============
-    "블랙박스": {
-        "keywords": ["블랙박스", "dashcam", "차량카메라"],
-        "checks": ["채널 (전방/후방)", "화질", "주차모드"],
-        "tip": "메모리 카드 별매인지 확인",
-        "related": ["SD카드", "상시전원케이블", "거치대"]
-    },
-    "타이어": {
-        "keywords": ["타이어", "사계절타이어", "겨울타이어"],
-        "checks": ["사이즈 (차량에 맞는지)", "계절", "제조일"],
-        "tip": "제조일 최근일수록 좋음",
-        "related": ["타이어공기주입기", "스노우체인", "휠클리너"]
-    },
-    "차량용품": {
-        "keywords": ["차량용충전기", "거치대", "방향제", "핸들커버"],
-        "checks": ["호환 차종", "크기"],
-        "tip": "차량 내부 크기에 맞는지 확인",
-        "related": ["방향제", "트렁크정리함", "썬바이저"]
-    },
 
-    # ============ 패션 ============
-    "신발": {
-        "keywords": ["신발", "운동화", "스니커즈", "구두", "슬리퍼"],
-        "checks": ["사이즈", "발볼 (넓음/좁음)", "용도"],
-        "tip": "브랜드마다 사이즈 다르니 후기 참고",
-        "related": ["깔창", "신발장", "슈케어"]
-    },
-    "가방": {
-        "keywords": ["가방", "백팩", "크로스백", "토트백"],
-        "checks": ["크기", "수납 공간", "무게"],
-        "tip": "실제 수납력은 후기 사진 참고",
-        "related": ["파우치", "이너백", "가방정리함"]
-    },
-    "시계": {
-        "keywords": ["시계", "손목시계", "스마트워치"],
-        "checks": ["사이즈 (손목 둘레)", "방수 등급", "배터리/충전"],
-        "tip": "스마트워치는 폰 호환 여부 확인",
-        "related": ["시계줄", "충전기", "보호필름"]
-    },
+# ============ 구매 팁 / 추천 / 시즌 카탈로그 (data/catalog.json) ============
+# 데이터는 코드 밖 JSON 파일로 관리 (version 필드로 버전 관리)
+# 첫 사용 시 한 번 읽어서 오토마톤 + 미리 렌더링한 응답으로 컴파일 → 호출마다 dict를 다시 만들지 않음
+# POST /admin/catalog 로 재시작 없이 다시 읽음 (실패하면 기존 카탈로그 유지)
+CATALOG_PATH = os.getenv("CATALOG_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "catalog.json")
+CATALOG_SCHEMA = 1
 
-    # ============ 생활용품 ============
-    "수건": {
-        "keywords": ["수건", "타월", "목욕타월"],
-        "checks": ["사이즈", "소재 (면/극세사)", "중량"],
-        "tip": "중량 높을수록 두껍고 흡수력 좋음",
-        "related": ["수건걸이", "목욕가운", "바디타월"]
-    },
-    "이불": {
-        "keywords": ["이불", "침구", "베개", "토퍼"],
-        "checks": ["사이즈", "충전재", "세탁 가능 여부"],
-        "tip": "계절에 맞는 충전재 선택",
-        "related": ["이불커버", "베개커버", "침대패드"]
-    },
-    "세제": {
-        "keywords": ["세제", "세탁세제", "섬유유연제", "주방세제"],
-        "checks": ["용량", "액체/캡슐", "향"],
-        "tip": "대용량이 ml당 저렴",
-        "related": ["세탁조클리너", "표백제", "빨래망"]
-    },
-    "휴지": {
-        "keywords": ["휴지", "화장지", "키친타월", "물티슈"],
-        "checks": ["롤수/매수", "겹수", "평량"],
-        "tip": "대용량 박스가 롤당 저렴",
-        "related": ["휴지케이스", "물티슈캡"]
-    },
 
-    # ============ 운동/레저 ============
-    "운동복": {
-        "keywords": ["운동복", "레깅스", "트레이닝", "짐웨어"],
-        "checks": ["사이즈", "소재 (흡습/속건)", "신축성"],
-        "tip": "세탁 후 줄어듦 후기 확인",
-        "related": ["스포츠브라", "운동양말", "운동화"]
-    },
-    "요가매트": {
-        "keywords": ["요가매트", "필라테스매트", "운동매트"],
-        "checks": ["두께", "소재 (TPE/PVC/NBR)", "미끄럼방지"],
-        "tip": "바닥 쿠션감과 미끄럼 후기 확인",
-        "related": ["요가블럭", "스트랩", "매트가방"]
-    },
-    "덤벨": {
-        "keywords": ["덤벨", "아령", "케틀벨", "바벨"],
-        "checks": ["무게", "재질 (고무/철)", "그립감"],
-        "tip": "무게 조절형이 공간 절약됨",
-        "related": ["운동장갑", "스트랩", "벤치"]
-    },
-    "자전거": {
-        "keywords": ["자전거", "전기자전거", "mtb", "로드바이크"],
-        "checks": ["프레임 크기 (키에 맞는지)", "기어 단수", "용도"],
-        "tip": "조립 상태/배송 방식 확인",
-        "related": ["헬멧", "자전거잠금장치", "안장커버", "라이트"]
-    },
+class Catalog:
+    """카탈로그 파일을 조회용 구조로 컴파일한 결과 (읽기 전용, 다시 읽으면 통째로 교체)"""
 
-    # ============ 캠핑 ============
-    "텐트": {
-        "keywords": ["텐트", "캠핑텐트", "백패킹텐트"],
-        "checks": ["인원수", "방수등급", "무게"],
-        "tip": "설치 난이도 후기 확인",
-        "related": ["타프", "그라운드시트", "텐트팩"]
-    },
-    "침낭": {
-        "keywords": ["침낭", "캠핑침낭", "슬리핑백"],
-        "checks": ["적정 온도", "충전재 (구스다운/화학솜)", "무게"],
-        "tip": "사용 온도 범위 확인",
-        "related": ["매트", "베개", "침낭라이너"]
-    },
-    "캠핑의자": {
-        "keywords": ["캠핑의자", "릴렉스체어", "접이식의자"],
-        "checks": ["무게 (휴대성)", "하중", "접었을 때 크기"],
-        "tip": "차에 싣는 크기 확인",
-        "related": ["캠핑테이블", "캠핑매트", "파라솔"]
-    },
-    "쿨러": {
-        "keywords": ["쿨러", "아이스박스", "보냉백"],
-        "checks": ["용량 (L)", "보냉 시간", "무게"],
-        "tip": "실제 보냉 시간 후기 확인",
-        "related": ["아이스팩", "드라이아이스"]
-    },
-
-    # ============ 문구/오피스 ============
-    "펜": {
-        "keywords": ["펜", "볼펜", "만년필", "사인펜"],
-        "checks": ["잉크 타입", "굵기", "그립감"],
-        "tip": "손 피로도 후기 확인",
-        "related": ["잉크", "노트", "펜케이스"]
-    },
-    "노트": {
-        "keywords": ["노트", "다이어리", "플래너", "수첩"],
-        "checks": ["크기", "속지 타입 (무지/줄/모눈)", "페이지 수"],
-        "tip": "펜 번짐 후기 확인",
-        "related": ["펜", "스티커", "인덱스탭"]
-    },
-    "데스크용품": {
-        "keywords": ["파일", "화일", "정리함", "스테이플러"],
-        "checks": ["크기", "재질", "수납 용량"],
-        "tip": "실제 수납력 후기 확인",
-        "related": ["연필꽂이", "메모지", "클립"]
-    },
-
-    # ============ 완구/취미 ============
-    "레고": {
-        "keywords": ["레고", "블록", "나노블록"],
-        "checks": ["피스 수", "권장 연령", "크기"],
-        "tip": "조립 난이도와 완성 크기 확인",
-        "related": ["레고판", "진열장", "조명"]
-    },
-    "보드게임": {
-        "keywords": ["보드게임", "카드게임", "퍼즐"],
-        "checks": ["인원수", "플레이 시간", "권장 연령"],
-        "tip": "재미 요소 후기 확인",
-        "related": ["카드슬리브", "다이스", "게임매트"]
-    },
-    "인형": {
-        "keywords": ["인형", "봉제인형", "피규어"],
-        "checks": ["크기", "소재", "세탁 가능 여부"],
-        "tip": "실제 크기 후기 사진 확인",
-        "related": ["인형옷", "진열장"]
-    },
-    "RC카": {
-        "keywords": ["rc카", "무선자동차", "드론"],
-        "checks": ["배터리 시간", "조작 거리", "속도"],
-        "tip": "배터리 충전 시간도 확인",
-        "related": ["여분배터리", "충전기", "케이스"]
-    },
-
-    # ============ 건강기기 ============
-    "혈압계": {
-        "keywords": ["혈압계", "혈압측정기"],
-        "checks": ["측정 방식 (손목/팔뚝)", "메모리 기능", "정확도"],
-        "tip": "올바른 측정 자세 중요",
-        "related": ["혈압수첩", "건강관리앱"]
-    },
-    "체온계": {
-        "keywords": ["체온계", "비접촉체온계", "귀체온계"],
-        "checks": ["측정 방식", "측정 시간", "정확도"],
-        "tip": "비접촉식이 편하지만 오차 있을 수 있음",
-        "related": ["귀체온계 필터", "체온기록지"]
-    },
-    "마스크": {
-        "keywords": ["마스크", "kf94", "kf80", "덴탈마스크"],
-        "checks": ["등급 (KF94/KF80)", "사이즈", "매수"],
-        "tip": "얼굴형에 맞는 제품 찾기",
-        "related": ["마스크줄", "마스크보관함", "손소독제"]
-    },
-
-    # ============ 주방용품 ============
-    "냄비": {
-        "keywords": ["냄비", "프라이팬", "후라이팬", "웍"],
-        "checks": ["사이즈", "코팅 종류", "인덕션 호환"],
-        "tip": "코팅 수명 후기 확인",
-        "related": ["뚜껑", "냄비받침", "조리도구세트"]
-    },
-    "칼": {
-        "keywords": ["칼", "식도", "가위", "도마"],
-        "checks": ["재질", "용도", "관리법"],
-        "tip": "세척/관리 편의성 확인",
-        "related": ["도마", "칼갈이", "칼꽂이"]
-    },
-    "그릇": {
-        "keywords": ["그릇", "접시", "식기", "수저"],
-        "checks": ["재질", "전자레인지/식세기 사용 가능 여부", "개수"],
-        "tip": "파손 위험 배송 후기 확인",
-        "related": ["수저세트", "식기건조대", "밀폐용기"]
-    },
-    "텀블러": {
-        "keywords": ["텀블러", "보온병", "물병", "보냉컵"],
-        "checks": ["용량", "보온/보냉 시간", "세척 편의성"],
-        "tip": "세척 용이성 후기 확인",
-        "related": ["텀블러세척솔", "빨대", "파우치"]
-    },
-
-    # ============ 전자기기 추가 ============
-    "게임기": {
-        "keywords": ["플스", "ps5", "닌텐도", "스위치", "엑박", "xbox", "게임기"],
-        "checks": ["버전 (디스크/디지털)", "저장용량", "컨트롤러 포함 여부"],
-        "tip": "정품 여부와 보증 확인",
-        "related": ["게임타이틀", "컨트롤러", "충전독", "케이스"]
-    },
-    "모니터암": {
-        "keywords": ["모니터암", "모니터거치대", "듀얼모니터"],
-        "checks": ["하중 (모니터 무게)", "VESA 규격", "조절 범위"],
-        "tip": "책상 두께/클램프 호환 확인",
-        "related": ["모니터", "케이블정리", "노트북거치대"]
-    },
-    "공유기": {
-        "keywords": ["공유기", "와이파이", "wifi", "라우터", "메시"],
-        "checks": ["속도 (Wi-Fi 6/7)", "커버리지", "포트 수"],
-        "tip": "집 평수에 맞는 커버리지 확인",
-        "related": ["랜케이블", "메시공유기", "중계기"]
-    },
+    def __init__(self, data: dict, path: str):
+        if data.get("schema") != CATALOG_SCHEMA:
+            raise ValueError(f"지원하지 않는 카탈로그 schema: {data.get('schema')}")
+        self.path = path
+        self.version = data["version"]
+        self.loaded_at = time.time()
 
-    # ============ 가전 추가 ============
-    "정수기": {
-        "keywords": ["정수기", "냉온정수기", "직수형"],
-        "checks": ["필터 종류", "냉온수 기능", "직수/탱크형"],
-        "tip": "필터 교체 주기/비용 확인",
-        "related": ["정수기필터", "물병"]
-    },
-    "비데": {
-        "keywords": ["비데", "전자비데"],
-        "checks": ["기능 (온수/건조/탈취)", "사이즈 호환", "전기/무전원"],
-        "tip": "변기 사이즈 호환 확인",
-        "related": ["비데필터", "비데청소제"]
-    },
-    "식기세척기": {
-        "keywords": ["식기세척기", "식세기"],
-        "checks": ["용량 (인분)", "설치형/빌트인", "건조 방식"],
-        "tip": "설치 공간과 급수 방식 확인",
-        "related": ["식세기세제", "린스", "전용바구니"]
-    },
-    "전기포트": {
-        "keywords": ["전기포트", "커피포트", "주전자"],
-        "checks": ["용량", "온도 조절", "재질"],
-        "tip": "빈 공간에서 끓이면 안 됨",
-        "related": ["커피드리퍼", "전기포트세척제"]
-    },
+        self.buying_tips = data["buying_tips"]
+        self.tip_texts = [render_buying_tip(category, tip) for category, tip in self.buying_tips.items()]
+        self.automaton = build_keyword_automaton(self.buying_tips, SORT_INTENT_WORDS)
+        self.recommendation_pages, self.recommendation_overview = render_recommendations(data["recommendations"])
+        self.seasonal_pages, self.seasonal_overview = render_seasonal(data["seasonal"])
 
-    # ============ 패션 추가 ============
-    "지갑": {
-        "keywords": ["지갑", "카드지갑", "머니클립", "반지갑"],
-        "checks": ["크기", "수납 칸 수", "재질"],
-        "tip": "카드 수납 개수 확인",
-        "related": ["카드케이스", "키홀더", "명함지갑"]
-    },
-    "선글라스": {
-        "keywords": ["선글라스", "안경", "블루라이트"],
-        "checks": ["UV 차단", "렌즈 색상", "프레임 재질"],
-        "tip": "얼굴형에 맞는 프레임 후기 확인",
-        "related": ["안경닦이", "안경케이스", "안경줄"]
-    },
-    "모자": {
-        "keywords": ["모자", "볼캡", "버킷햇", "비니"],
-        "checks": ["사이즈", "소재", "조절 가능 여부"],
-        "tip": "머리 둘레 측정 후 구매",
-        "related": ["모자걸이", "모자세탁망"]
-    },
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "loaded_at": datetime.fromtimestamp(self.loaded_at, timezone.utc).isoformat(),
+            "buying_tips": len(self.buying_tips),
+            "recommendations": len(self.recommendation_pages),
+            "seasons": len(self.seasonal_pages),
+        }
 
-    # ============ 식품 추가 ============
-    "과자": {
-        "keywords": ["과자", "스낵", "초콜릿", "젤리", "사탕"],
-        "checks": ["용량", "유통기한", "원산지"],
-        "tip": "대용량이 개당 저렴",
-        "related": ["음료", "견과류"]
-    },
-    "냉동식품": {
-        "keywords": ["냉동식품", "만두", "피자", "치킨너겟"],
-        "checks": ["조리법", "용량", "유통기한"],
-        "tip": "에어프라이어 조리 가능 여부 확인",
-        "related": ["에어프라이어", "전자레인지용기"]
-    },
-    "반찬": {
-        "keywords": ["반찬", "밑반찬", "김치", "젓갈"],
-        "checks": ["용량", "보관법", "유통기한"],
-        "tip": "맛 후기 확인",
-        "related": ["밀폐용기", "김치통"]
-    },
-    "음료": {
-        "keywords": ["음료", "주스", "탄산음료", "이온음료"],
-        "checks": ["용량", "개수", "칼로리"],
-        "tip": "박스 단위가 개당 저렴",
-        "related": ["얼음틀", "텀블러"]
-    },
 
-    # ============ 인테리어 ============
-    "조명": {
-        "keywords": ["조명", "스탠드", "led등", "무드등", "취침등"],
-        "checks": ["밝기 (루멘)", "색온도 (전구색/주백색)", "조절 기능"],
-        "tip": "용도에 맞는 밝기 선택",
-        "related": ["전구", "스위치", "멀티탭"]
-    },
-    "화분": {
-        "keywords": ["화분", "화초", "관엽식물", "다육이"],
-        "checks": ["크기", "배수구 유무", "재질"],
-        "tip": "식물 크기에 맞는 화분 선택",
-        "related": ["흙", "비료", "물조리개", "화분받침"]
-    },
-    "액자": {
-        "keywords": ["액자", "포스터", "그림", "캔버스"],
-        "checks": ["사이즈", "프레임 재질", "유리/아크릴"],
-        "tip": "벽 크기와 비율 확인",
-        "related": ["액자걸이", "포스터"]
-    },
-    "벽시계": {
-        "keywords": ["벽시계", "탁상시계", "알람시계"],
-        "checks": ["크기", "소음 (무소음)", "전원 방식"],
-        "tip": "침실용은 무소음 추천",
-        "related": ["건전지", "시계걸이"]
-    },
+_catalog = None
 
-    # ============ 욕실 ============
-    "샤워기": {
-        "keywords": ["샤워기", "샤워헤드", "샤워기세트"],
-        "checks": ["수압", "필터 유무", "호스 길이"],
-        "tip": "기존 연결부 호환 확인",
-        "related": ["샤워기필터", "샤워기호스", "욕실용품"]
-    },
-    "욕실용품": {
-        "keywords": ["수건걸이", "비누받침", "샴푸", "바디워시"],
-        "checks": ["크기", "설치 방식", "용량"],
-        "tip": "욕실 벽면 호환 확인",
-        "related": ["샴푸", "바디워시", "치약"]
-    },
 
-    # ============ 계절용품 ============
-    "난방기": {
-        "keywords": ["히터", "난방기", "전기장판", "온풍기", "라디에이터"],
-        "checks": ["난방 면적", "전력 소비", "안전 기능"],
-        "tip": "과열 방지 기능 확인",
-        "related": ["전기요", "핫팩", "담요"]
-    },
-    "썬크림": {
-        "keywords": ["썬크림", "자외선차단제", "선블록"],
-        "checks": ["SPF/PA 지수", "용량", "백탁 여부"],
-        "tip": "피부 타입에 맞는 제형 선택",
-        "related": ["선스틱", "에프터선", "모자"]
-    },
-    "우산": {
-        "keywords": ["우산", "장우산", "접이식우산", "양산"],
-        "checks": ["크기", "자동/수동", "무게"],
-        "tip": "강풍에 강한지 후기 확인",
-        "related": ["우산꽂이", "우산커버", "레인부츠"]
-    },
+def load_catalog(path: str = None) -> Catalog:
+    path = path or CATALOG_PATH
+    with open(path, encoding="utf-8") as f:
+        return Catalog(json.load(f), path)
 
-    # ============ 청소용품 ============
-    "대걸레": {
-        "keywords": ["대걸레", "밀대", "물걸레", "스팀청소기"],
-        "checks": ["종류 (밀대/회전)", "헤드 크기", "교체 패드"],
-        "tip": "바닥재에 맞는 종류 선택",
-        "related": ["걸레패드", "바닥세정제", "청소기"]
-    },
-    "세정제": {
-        "keywords": ["세정제", "욕실세정제", "유리세정제", "곰팡이"],
-        "checks": ["용도", "용량", "성분"],
-        "tip": "용도에 맞는 전용 세정제 사용",
-        "related": ["고무장갑", "스펀지", "솔"]
-    },
 
-    # ============ 악기 ============
-    "기타": {
-        "keywords": ["기타", "어쿠스틱기타", "일렉기타", "우쿨렐레"],
-        "checks": ["종류", "사이즈", "바디 재질"],
-        "tip": "초보자는 입문용부터 시작",
-        "related": ["기타줄", "기타케이스", "피크", "카포"]
-    },
-    "피아노": {
-        "keywords": ["피아노", "전자피아노", "디지털피아노", "키보드"],
-        "checks": ["건반 수 (61/76/88)", "터치감", "내장 음색"],
-        "tip": "해머액션 건반이 피아노 터치에 가까움",
-        "related": ["피아노의자", "헤드폰", "건반커버", "악보"]
-    },
+def get_catalog() -> Catalog:
+    """카탈로그 (첫 사용 시 로드)"""
+    global _catalog
+    if _catalog is None:
+        _catalog = load_catalog()
+    return _catalog
 
-    # ============ 의류 ============
-    "티셔츠": {
-        "keywords": ["티셔츠", "반팔", "긴팔", "맨투맨", "후드"],
-        "checks": ["사이즈", "소재", "세탁법"],
-        "tip": "실측 사이즈 후기 확인",
-        "related": ["청바지", "면바지", "양말"]
-    },
-    "바지": {
-        "keywords": ["바지", "청바지", "슬랙스", "면바지", "조거팬츠"],
-        "checks": ["허리/기장 사이즈", "소재", "신축성"],
-        "tip": "키에 맞는 기장 후기 확인",
-        "related": ["벨트", "양말", "티셔츠"]
-    },
-    "아우터": {
-        "keywords": ["자켓", "코트", "패딩", "점퍼", "가디건", "바람막이"],
-        "checks": ["사이즈", "소재", "충전재 (패딩)"],
-        "tip": "레이어링 고려해서 사이즈 선택",
-        "related": ["후드티", "목도리", "장갑"]
-    },
-    "속옷": {
-        "keywords": ["속옷", "팬티", "브라", "런닝", "내의"],
-        "checks": ["사이즈", "소재", "세탁법"],
-        "tip": "세트 구매가 개당 저렴",
-        "related": ["양말", "내복"]
-    },
-    "양말": {
-        "keywords": ["양말", "스타킹", "덧신"],
-        "checks": ["사이즈", "소재", "세트 구성"],
-        "tip": "세트 구매가 켤레당 저렴",
-        "related": ["신발", "깔창"]
-    },
 
-    # ============ 소형가전 ============
-    "에어프라이어": {
-        "keywords": ["에어프라이어", "오븐프라이어"],
-        "checks": ["용량 (L)", "출력 (W)", "바스켓 타입"],
-        "tip": "식구 수에 맞는 용량 선택",
-        "related": ["종이호일", "실리콘용기", "집게"]
-    },
-    "믹서기": {
-        "keywords": ["믹서기", "블렌더", "핸드블렌더", "착즙기"],
-        "checks": ["용량", "출력 (W)", "날 재질"],
-        "tip": "세척 편의성 후기 확인",
-        "related": ["텀블러", "유리컵"]
-    },
-    "토스터": {
-        "keywords": ["토스터", "토스트기", "샌드위치메이커"],
-        "checks": ["슬롯 수", "굽기 단계", "크기"],
-        "tip": "식빵 두께 호환 확인",
-        "related": ["식빵", "버터", "잼"]
-    },
-    "커피머신": {
-        "keywords": ["커피머신", "에스프레소머신", "캡슐커피머신"],
-        "checks": ["타입 (캡슐/반자동/전자동)", "압력 (bar)", "물탱크 용량"],
-        "tip": "캡슐 호환성/가격도 확인",
-        "related": ["캡슐", "원두", "우유거품기"]
-    },
-    "전기면도기": {
-        "keywords": ["전기면도기", "면도기", "트리머"],
-        "checks": ["날 타입 (로터리/왕복)", "방수등급", "배터리 시간"],
-        "tip": "세척 편의성 후기 확인",
-        "related": ["면도날", "쉐이빙폼", "애프터쉐이브"]
-    },
+def reload_catalog() -> Catalog:
+    """카탈로그 파일 다시 읽기 - 읽기/검증이 끝난 뒤에만 교체"""
+    global _catalog
+    _catalog = load_catalog()
+    logger.info("카탈로그 다시 읽음: version=%s", _catalog.version)
+    return _catalog
 
-    # ============ 액세서리 ============
-    "목걸이": {
-        "keywords": ["목걸이", "팔찌", "반지", "귀걸이", "악세사리"],
-        "checks": ["소재 (925/도금)", "길이", "알러지 여부"],
-        "tip": "금속 알러지 있으면 소재 확인",
-        "related": ["보석함", "세척제"]
-    },
-    "넥타이": {
-        "keywords": ["넥타이", "타이핀", "커프스"],
-        "checks": ["소재", "폭", "길이"],
-        "tip": "셔츠 색상과 코디 고려",
-        "related": ["셔츠", "정장", "타이핀"]
-    },
-    "스카프": {
-        "keywords": ["스카프", "목도리", "머플러", "숄"],
-        "checks": ["소재", "크기", "세탁법"],
-        "tip": "소재별 촉감 후기 확인",
-        "related": ["장갑", "모자", "코트"]
-    },
-    "장갑": {
-        "keywords": ["장갑", "니트장갑", "가죽장갑", "스마트폰장갑"],
-        "checks": ["사이즈", "소재", "터치 가능 여부"],
-        "tip": "손 크기 맞는지 후기 확인",
-        "related": ["목도리", "모자", "핫팩"]
-    },
 
-    # ============ 여행용품 ============
-    "캐리어": {
-        "keywords": ["캐리어", "여행가방", "트렁크"],
-        "checks": ["크기 (인치)", "소재 (하드/소프트)", "바퀴 타입"],
-        "tip": "기내용/위탁용 크기 확인",
-        "related": ["여행파우치", "네임택", "자물쇠"]
-    },
-    "여권케이스": {
-        "keywords": ["여권케이스", "여행지갑", "트래블월렛"],
-        "checks": ["수납 공간", "RFID 차단", "소재"],
-        "tip": "카드/티켓 수납 가능한지 확인",
-        "related": ["여권", "목베개", "안대"]
-    },
-    "보조배터리": {
-        "keywords": ["보조배터리", "파워뱅크"],
-        "checks": ["용량 (mAh)", "출력 (W)", "포트 수"],
-        "tip": "비행기 반입 용량 제한 확인",
-        "related": ["충전케이블", "충전기"]
-    },
-}
+def match_keyword(keyword: str) -> tuple:
+    """키워드 한 번 훑어서 (구매 팁 카테고리 번호, 정렬 의도) 반환 - 없으면 None"""
+    tip_index, sort_index = get_catalog().automaton.search(keyword.lower())
+    sort_type = SORT_INTENT_WORDS[sort_index][0] if sort_index is not None else None
+    return tip_index, sort_type
 
 
 def get_coupang_secret(keyword: str) -> str:
@@ -1148,23 +2080,231 @@ def get_coupang_secret(keyword: str) -> str:
 
 def get_buying_tip(keyword: str) -> str:
     """검색 키워드에 맞는 구매 팁 반환 (가독성 좋게)"""
-    keyword_lower = keyword.lower()
-    for category, data in BUYING_TIPS.items():
-        for kw in data["keywords"]:
-            if kw in keyword_lower:
-                checks = data.get("checks", [])
-                tip = data.get("tip", "")
-                related = data.get("related", [])
-
-                result = f"\n📋 **{category} 살 때 체크할 것**\n"
-                for check in checks:
-                    result += f"  - {check}\n"
-                if tip:
-                    result += f"\n💡 {tip}\n"
-                if related:
-                    result += f"\n🔗 **같이 많이 사는 것:** {', '.join(related)}\n"
-                return result
-    return ""
+    tip_index, _ = match_keyword(keyword)
+    if tip_index is None:
+        return ""
+    return get_catalog().tip_texts[tip_index]
+
+
+# ============ 딥링크 배치 변환 ============
+# 딥링크 API는 coupangUrls 배열을 받으므로, 짧은 시간 창 안에 들어온 요청을
+# (여러 상품 + 동시에 실행 중인 여러 tool 호출) 한 번의 업스트림 요청으로 묶음
+# 배열을 받는 건 직접 호출(direct) 모드뿐 - API 서버(proxy)는 url 하나만 받으므로 proxy 모드는 URL마다 단건 요청
+DEEPLINK_BATCH_WINDOW = float(os.getenv("DEEPLINK_BATCH_WINDOW", "0.02"))
+DEEPLINK_BATCH_MAX = int(os.getenv("DEEPLINK_BATCH_MAX", "20"))
+DEEPLINK_BATCH_ENABLED = COUPANG_API_MODE == "direct"
+
+
+async def fetch_deeplinks(original_urls: list) -> dict:
+    """딥링크 API 호출 → {원본 URL: 단축 URL} (실패 시 예외)"""
+    if len(original_urls) == 1:
+        params = {"url": original_urls[0]}
+    else:
+        # direct 모드 전용 (direct_request가 coupangUrls 배열로 보냄)
+        params = {"urls": original_urls}
+
+    data = await call_api("deeplink", params)
+    if data.get("error") == "quota_exhausted":
+        raise QuotaExhausted("deeplink")
+    if data.get("rCode") != "0" or not data.get("data"):
+        raise ValueError(f"deeplink 실패: {data.get('rMessage') or data.get('error')}")
+
+    links = data["data"]
+    result = {}
+    for idx, link in enumerate(links):
+        short = link.get("shortenUrl")
+        if not short:
+            continue
+        original = link.get("originalUrl")
+        if original not in original_urls and len(links) == len(original_urls):
+            # originalUrl이 정규화되어 돌아오면 순서로 매칭
+            original = original_urls[idx]
+        if original in original_urls:
+            result[original] = short
+    return result
+
+
+class DeeplinkBatcher:
+    """딥링크 요청을 모아서 한 번에 변환하고 결과를 대기자들에게 분배"""
+
+    def __init__(self, window: float, max_size: int):
+        self.window = window
+        self.max_size = max_size
+        self._pending = {}  # 원본 URL → Future
+        self._flush_handle = None
+
+    async def resolve(self, original_url: str):
+        """단축 URL 반환 (실패 시 None)"""
+        loop = asyncio.get_running_loop()
+        future = self._pending.get(original_url)
+        if future is None:
+            future = loop.create_future()
+            self._pending[original_url] = future
+            if len(self._pending) >= self.max_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._flush)
+        # 한 호출자가 취소돼도 같은 배치를 기다리는 다른 호출자에게 영향 없도록 shield
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            spawn_background(self._run_batch(batch))
+
+    async def _run_batch(self, batch: dict):
+        urls = list(batch)
+        retry_singles = len(urls) > 1
+        results = {}
+        try:
+            try:
+                results = await fetch_deeplinks(urls)
+            except QuotaExhausted:
+                # 호출 한도 소진: 개별 재시도 없이 원본 URL 사용 (링크 캐시에 안 남으므로 다음에 다시 변환)
+                retry_singles = False
+            except Exception:
+                pass
+
+            # 배치 실패/누락분은 URL별 개별 요청으로 폴백
+            missing = [url for url in urls if url not in results]
+            if missing and retry_singles:
+                singles = await asyncio.gather(
+                    *[fetch_deeplinks([url]) for url in missing],
+                    return_exceptions=True,
+                )
+                for single in singles:
+                    if isinstance(single, dict):
+                        results.update(single)
+        finally:
+            # 중간에 취소돼도 (종료 등) 대기자가 영원히 기다리지 않도록 모든 Future 완료 (못 받은 건 None)
+            for url, future in batch.items():
+                if not future.done():
+                    future.set_result(results.get(url))
+
+
+# 배치를 못 쓰면 크기 1 → 요청마다 바로 단건 변환
+deeplink_batcher = DeeplinkBatcher(DEEPLINK_BATCH_WINDOW, DEEPLINK_BATCH_MAX if DEEPLINK_BATCH_ENABLED else 1)
+
+
+# ============ 단축 링크 캐시 (pageKey → 단축 URL) ============
+# 같은 pageKey의 단축 링크는 바뀌지 않음 → 메모리 LRU + 캐시 백엔드 2단 캐시 (만료 없음)
+# 기본은 shared (SQLite 파일 → 재시작 후에도 유지, 워커끼리 공유), memory면 메모리 LRU만 사용
+# 백엔드 쓰기는 모아서 한 번에 (write-behind)
+LINK_CACHE_MEMORY_SIZE = int(os.getenv("LINK_CACHE_MEMORY_SIZE", "5000"))
+LINK_CACHE_BACKEND = os.getenv("LINK_CACHE_BACKEND", "shared")
+LINK_CACHE_DB = os.getenv("LINK_CACHE_DB", os.path.join(CACHE_DIR, "links.sqlite3"))
+LINK_CACHE_DB_SIZE = int(os.getenv("LINK_CACHE_DB_SIZE", "1000000"))
+LINK_CACHE_FLUSH_INTERVAL = float(os.getenv("LINK_CACHE_FLUSH_INTERVAL", "1.0"))
+
+
+class LinkCache:
+    """pageKey → 단축 URL 2단 캐시 (메모리 LRU + 캐시 백엔드 write-behind)"""
+
+    def __init__(self, store: CacheBackend, memory_size: int, flush_interval: float):
+        self.store = store  # None이면 메모리 LRU만
+        self.flush_interval = flush_interval
+        self.memory = LRUCache(memory_size)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._dirty = {}
+        self._flush_task = None
+
+    async def get(self, page_key: str):
+        """캐시된 단축 URL 반환 (없으면 None)"""
+        short_url = self.memory.get(page_key) or self._dirty.get(page_key)
+        if short_url:
+            self.memory_hits += 1
+            return short_url
+        if self.store is not None:
+            short_url = await self.store.get(page_key)
+            if short_url:
+                self.disk_hits += 1
+                self.memory.set(page_key, short_url)
+                return short_url
+        self.misses += 1
+        return None
+
+    def put(self, page_key: str, short_url: str):
+        """메모리에 즉시 저장, 백엔드는 write-behind"""
+        self.memory.set(page_key, short_url)
+        if self.store is None:
+            return
+        self._dirty[page_key] = short_url
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = spawn_background(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self):
+        """쌓인 쓰기를 백엔드에 반영"""
+        if not self._dirty:
+            return
+        items, self._dirty = list(self._dirty.items()), {}
+        await self.store.set_many(items)
+
+    async def purge(self, page_key: str = None) -> None:
+        """캐시 삭제 (page_key 없으면 전체)
+
+        다른 워커의 메모리 LRU는 그대로 남음 (단축 링크는 바뀌지 않으므로 삭제는 복구용)
+        """
+        if page_key:
+            self.memory.pop(page_key)
+            self._dirty.pop(page_key, None)
+        else:
+            self.memory.clear()
+            self._dirty.clear()
+        if self.store is not None:
+            await self.store.delete(page_key)
+
+    async def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "backend": "memory" if self.store is None else self.store.kind,
+            "memory_entries": len(self.memory),
+            "stored_entries": None if self.store is None else await self.store.count(),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else None,
+            "db_path": None if self.store is None else self.store.db_path,
+        }
+
+    async def close(self):
+        """남은 쓰기 반영 후 연결 종료"""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        if self.store is not None:
+            await self.flush()
+            await self.store.close()
+
+
+link_cache = LinkCache(
+    None if LINK_CACHE_BACKEND == "memory" else create_cache_backend(
+        LINK_CACHE_BACKEND, "links", LINK_CACHE_DB_SIZE, db_path=LINK_CACHE_DB),
+    LINK_CACHE_MEMORY_SIZE,
+    LINK_CACHE_FLUSH_INTERVAL,
+)
+link_flight = SingleFlight("links")
+
+
+async def _load_short_url(page_key: str):
+    cached = await link_cache.get(page_key)
+    current_span().set("cache", "hit" if cached else "miss")
+    if cached:
+        return cached
+
+    original_url = f"https://www.coupang.com/vp/products/{page_key}"
+
+    short_url = await deeplink_batcher.resolve(original_url)
+    if short_url:
+        link_cache.put(page_key, short_url)
+    return short_url
 
 
 async def shorten_url(product_url: str) -> str:
@@ -1173,27 +2313,790 @@ async def shorten_url(product_url: str) -> str:
     if not page_key:
         return product_url
 
-    original_url = f"https://www.coupang.com/vp/products/{page_key}"
+    with trace_span("shorten_url", page_key=page_key):
+        short_url = await link_flight.do(page_key, _load_short_url, page_key)
+    return short_url or product_url
+
+
+# ============ 쿠팡 API 호출 한도 (토큰 버킷 + 사용량 장부) ============
+# 파트너스 API는 키별 호출 한도가 있음 → 엔드포인트 클래스별 토큰 버킷으로 미리 제한
+# - 버킷 상태/사용량 장부는 SQLite 파일 (워커끼리 공유, 재시작 후에도 유지)
+# - 토큰이 없으면 QUOTA_WAIT_BUDGET 안에서 대기, 넘으면 QuotaExhausted → 캐시된 응답으로 대신 응답
+# - 백그라운드 갱신은 대기하지 않고, 버킷에 QUOTA_REFRESH_RESERVE 비율 이상 남았을 때만 사용
+#   (한도는 캐시 미스에 먼저 쓰이도록)
+# 한도 형식: "호출 수/초" (예: 50/60 = 분당 50회, 버스트 50) - 키 등급에 맞게 조정
+QUOTA_ENABLED = os.getenv("QUOTA_ENABLED", "1" if COUPANG_API_MODE == "direct" else "0") == "1"
+QUOTA_DB = os.getenv("QUOTA_DB", os.path.join(CACHE_DIR, "quota.sqlite3"))
+QUOTA_WAIT_BUDGET = float(os.getenv("QUOTA_WAIT_BUDGET", "3.0"))
+QUOTA_REFRESH_RESERVE = float(os.getenv("QUOTA_REFRESH_RESERVE", "0.5"))
+QUOTA_LEDGER_RETENTION_DAYS = int(os.getenv("QUOTA_LEDGER_RETENTION_DAYS", "14"))
+QUOTA_LIMITS = {
+    "search": os.getenv("QUOTA_SEARCH", "50/60"),
+    "products": os.getenv("QUOTA_PRODUCTS", "100/60"),  # best / goldbox
+    "deeplink": os.getenv("QUOTA_DEEPLINK", "100/60"),
+}
+# action → 엔드포인트 클래스
+QUOTA_CLASSES = {"search": "search", "best": "products", "goldbox": "products", "deeplink": "deeplink"}
+
+
+class QuotaExhausted(Exception):
+    """대기 예산 안에 호출 한도 토큰을 받지 못함"""
+
+
+def parse_quota(spec: str) -> tuple:
+    """"50/60" → (용량, 초당 충전량)"""
+    calls, _, period = spec.partition("/")
+    capacity = float(calls)
+    return capacity, capacity / float(period or 1)
+
+
+class QuotaLimiter:
+    """엔드포인트 클래스별 토큰 버킷 + 시간별 사용량 장부 (SQLite, 한 트랜잭션에서 잔량 확인/차감)"""
+
+    def __init__(self, db_path: str, limits: dict):
+        self.db_path = db_path
+        self.buckets = {name: parse_quota(spec) for name, spec in limits.items()}
+        self.tokens = {}  # 마지막으로 본 잔량 (메트릭용)
+        self.counts = {}  # (클래스, 결과) → 프로세스별 횟수
+        self._conn = None
+        self._memory = None  # DB를 못 쓰면 프로세스 내 버킷 {클래스: (잔량, 갱신 시각)}
+        self._pruned_hour = None
+        # SQLite 연결은 이 스레드 하나에서만 사용
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quota")
+
+    # --- 디스크 작업 (전용 스레드에서 실행) ---
+
+    def _connect(self):
+        if self._conn is None and self._memory is None:
+            try:
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                # isolation_level=None: BEGIN IMMEDIATE를 직접 걸어 다른 워커와 잔량 확인/차감이 겹치지 않게
+                conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS quota_buckets ("
+                    "endpoint TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS quota_usage ("
+                    "endpoint TEXT NOT NULL, hour INTEGER NOT NULL, granted INTEGER NOT NULL DEFAULT 0, "
+                    "waited INTEGER NOT NULL DEFAULT 0, rejected INTEGER NOT NULL DEFAULT 0, "
+                    "PRIMARY KEY (endpoint, hour))"
+                )
+                self._conn = conn
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("quota ledger disabled (%s): %s - using per-process buckets", self.db_path, e)
+                self._memory = {}
+        return self._conn
+
+    def _refill(self, name: str, tokens, updated_at, now: float) -> float:
+        capacity, rate = self.buckets[name]
+        if tokens is None:
+            return capacity
+        return min(capacity, tokens + (now - updated_at) * rate)
+
+    def _take(self, name: str, reserve: float, waited: bool) -> tuple:
+        """토큰 1개 차감 시도 → (성공 여부, 다시 시도까지 대기 초)"""
+        capacity, rate = self.buckets[name]
+        need = 1 + reserve * capacity
+        now = time.time()
+        conn = self._connect()
+        if conn is None:
+            tokens = self._refill(name, *self._memory.get(name, (None, None)), now)
+            granted = tokens >= need
+            self._memory[name] = (tokens - 1 if granted else tokens, now)
+            self.tokens[name] = self._memory[name][0]
+            return granted, 0.0 if granted else (need - tokens) / rate
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM quota_buckets WHERE endpoint = ?", (name,)).fetchone()
+            tokens = self._refill(name, *(row or (None, None)), now)
+            granted = tokens >= need
+            if granted:
+                tokens -= 1
+                column = "waited" if waited else "granted"
+                conn.execute(
+                    f"INSERT INTO quota_usage (endpoint, hour, {column}) VALUES (?, ?, 1) "
+                    f"ON CONFLICT (endpoint, hour) DO UPDATE SET {column} = {column} + 1",
+                    (name, int(now // 3600)),
+                )
+            conn.execute("INSERT OR REPLACE INTO quota_buckets (endpoint, tokens, updated_at) VALUES (?, ?, ?)",
+                         (name, tokens, now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.tokens[name] = tokens
+        self._prune(conn, now)
+        return granted, 0.0 if granted else (need - tokens) / rate
+
+    def _record_rejected(self, name: str):
+        conn = self._connect()
+        if conn is None:
+            return
+        conn.execute(
+            "INSERT INTO quota_usage (endpoint, hour, rejected) VALUES (?, ?, 1) "
+            "ON CONFLICT (endpoint, hour) DO UPDATE SET rejected = rejected + 1",
+            (name, int(time.time() // 3600)),
+        )
+
+    def _prune(self, conn, now: float):
+        """보관 기간 지난 장부 삭제 (시간이 바뀔 때 1회)"""
+        hour = int(now // 3600)
+        if hour != self._pruned_hour:
+            self._pruned_hour = hour
+            conn.execute("DELETE FROM quota_usage WHERE hour < ?", (hour - QUOTA_LEDGER_RETENTION_DAYS * 24,))
+
+    def _usage(self, hours: int) -> dict:
+        conn = self._connect()
+        if conn is None:
+            return {}
+        since = int(time.time() // 3600) - hours + 1
+        rows = conn.execute(
+            "SELECT endpoint, SUM(granted), SUM(waited), SUM(rejected) FROM quota_usage "
+            "WHERE hour >= ? GROUP BY endpoint", (since,),
+        ).fetchall()
+        return {name: {"granted": g, "waited": w, "rejected": r} for name, g, w, r in rows}
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    # --- 비동기 인터페이스 ---
+
+    async def acquire(self, name: str, wait_budget: float, reserve: float = 0.0) -> str:
+        """토큰 1개 받기 → "granted" | "waited" (대기 예산 초과 시 QuotaExhausted)
+
+        reserve: 이 비율(용량 대비)만큼은 남겨 두고 받음 (백그라운드 갱신용)
+        DB 오류 시에는 제한 없이 통과 (장부 때문에 API 호출이 막히지 않게)
+        """
+        deadline = time.monotonic() + wait_budget
+        waited = False
+        while True:
+            try:
+                granted, wait = await self._run(self._take, name, reserve, waited)
+            except sqlite3.Error as e:
+                logger.warning("quota ledger failed: %s", e)
+                granted = True
+            if granted:
+                result = "waited" if waited else "granted"
+                break
+            if time.monotonic() + wait > deadline:
+                result = "rejected"
+                try:
+                    await self._run(self._record_rejected, name)
+                except sqlite3.Error:
+                    pass
+                break
+            waited = True
+            # 같은 시각에 깨어난 대기자끼리 몰리지 않도록 약간 흩뜨림
+            await asyncio.sleep(wait * random.uniform(1.0, 1.2))
+
+        self.counts[(name, result)] = self.counts.get((name, result), 0) + 1
+        quota_requests.inc((name, result))
+        if result == "rejected":
+            raise QuotaExhausted(name)
+        return result
+
+    async def stats(self) -> dict:
+        try:
+            usage = await self._run(self._usage, 24)
+        except sqlite3.Error:
+            usage = {}
+        return {
+            "db_path": None if self._memory is not None else self.db_path,
+            "buckets": {
+                name: {
+                    "capacity": capacity,
+                    "refill_per_sec": round(rate, 4),
+                    "tokens": None if name not in self.tokens else round(self.tokens[name], 2),
+                    "last_24h": usage.get(name, {}),
+                }
+                for name, (capacity, rate) in self.buckets.items()
+            },
+            "process": {f"{name}:{result}": count for (name, result), count in self.counts.items()},
+        }
+
+    async def close(self):
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+
+
+quota_limiter = QuotaLimiter(QUOTA_DB, QUOTA_LIMITS)
+
+
+# ============ 쿠팡 Open API 직접 호출 (HMAC 서명) ============
+# 서명 방식은 server.py와 동일: signed-date + method + path + query 를 시크릿 키로 HmacSHA256
+COUPANG_API_PATH = "/v2/providers/affiliate_open_api/apis/openapi"
+COUPANG_SEARCH_LIMIT_MAX = 10  # 검색 API limit 상한
+
+
+def generate_hmac(method: str, url_path: str, datetime: str) -> str:
+    """HMAC 서명 생성 - 쿠팡 API 형식"""
+    # 형식: datetime + method + path + query (공백 없이 연결)
+    message = datetime + method + url_path
+    return hmac.new(COUPANG_SECRET_KEY.encode("utf-8"), message.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def get_authorization_header(method: str, path: str, query_string: str = "") -> dict:
+    """인증 헤더 생성"""
+    # GMT 시간 사용: yymmddTHHmmssZ 형식
+    datetime = time.strftime("%y%m%dT%H%M%SZ", time.gmtime())
+    # path + query_string 조합 (? 없이 직접 연결)
+    signature = generate_hmac(method, path + query_string, datetime)
+    authorization = (f"CEA algorithm=HmacSHA256, access-key={COUPANG_ACCESS_KEY}, "
+                     f"signed-date={datetime}, signature={signature}")
+    return {"Authorization": authorization, "Content-Type": "application/json;charset=UTF-8"}
+
 
+def direct_request(action: str, params: dict) -> tuple:
+    """API 서버 action/파라미터 → Open API (method, path, query, JSON 본문)"""
+    if action == "search":
+        # 정렬(sort)은 Open API에 없음 → 받아온 뒤 클라이언트에서 정렬
+        query = {"keyword": params["keyword"], "limit": min(int(params.get("limit", 10)), COUPANG_SEARCH_LIMIT_MAX)}
+        return "GET", f"{COUPANG_API_PATH}/v1/products/search", query, None
+    if action == "best":
+        query = {"limit": min(int(params.get("limit", 10)), 100)}
+        return "GET", f"{COUPANG_API_PATH}/products/bestcategories/{int(params['category_id'])}", query, None
+    if action == "goldbox":
+        query = {"limit": min(int(params.get("limit", 10)), 100)}
+        return "GET", f"{COUPANG_API_PATH}/products/goldbox", query, None
+    if action == "deeplink":
+        urls = list(params["urls"]) if "urls" in params else [params["url"]]
+        return "POST", f"{COUPANG_API_PATH}/v1/deeplink", {}, {"coupangUrls": urls}
+    raise ValueError(f"지원하지 않는 action: {action}")
+
+
+def response_data(response: httpx.Response) -> dict:
+    """응답 JSON, 오류 상태인데 rCode가 없으면 {"error", "message"}
+
+    게이트웨이 오류(서명 만료, 키 오류 등)나 API 서버 점검 응답은 {"code"/"status", "message"} 형식
+    정상 상태인데 JSON 객체가 아니면 (프록시 오류 페이지 등) {"error": "invalid_response"}
+    """
     try:
-        data = await call_api("deeplink", {"url": original_url})
-        if data.get("rCode") == "0" and data.get("data"):
-            return data["data"][0].get("shortenUrl", product_url)
-    except:
-        pass
+        data = response.json()
+    except ValueError:
+        data = None
+    if response.status_code >= 400 and not (isinstance(data, dict) and "rCode" in data):
+        message = data.get("message") if isinstance(data, dict) else None
+        return {"error": f"HTTP {response.status_code}", "message": message or f"HTTP {response.status_code}"}
+    if not isinstance(data, dict):
+        return {"error": "invalid_response", "message": "쿠팡 API 서버 응답을 해석할 수 없습니다."}
+    return data
 
-    return product_url
 
+async def fetch_direct(action: str, params: dict) -> dict:
+    """쿠팡 Open API 직접 호출 → API 서버와 같은 응답 형식 (rCode/rMessage/data)"""
+    method, path, query, body = direct_request(action, params)
+    query_string = urlencode(query)
+    headers = get_authorization_header(method, path, query_string)
+    url = f"{COUPANG_API_DOMAIN}{path}" + (f"?{query_string}" if query_string else "")
 
-async def call_api(action: str, params: dict = None) -> dict:
-    """API 서버 호출"""
-    params = params or {}
+    response = await upstream_request(method, url, timeout=30.0, action=action, headers=headers, json=body)
+    return response_data(response)
+
+
+async def fetch_api(action: str, params: dict = None, background: bool = False) -> dict:
+    """쿠팡 API 호출 (캐시 없이 항상 업스트림 요청, COUPANG_API_MODE에 따라 직접 / API 서버 경유)
+
+    호출 한도를 먼저 받음 (background면 대기 없이 예비분을 남기고, 못 받으면 QuotaExhausted)
+    """
+    if QUOTA_ENABLED and action in QUOTA_CLASSES:
+        if background:
+            result = await quota_limiter.acquire(QUOTA_CLASSES[action], 0.0, QUOTA_REFRESH_RESERVE)
+        else:
+            result = await quota_limiter.acquire(QUOTA_CLASSES[action], QUOTA_WAIT_BUDGET)
+        current_span().set("quota", result)
+
+    if COUPANG_API_MODE == "direct":
+        return await fetch_direct(action, dict(params or {}))
+
+    params = dict(params or {})
     params["action"] = action
     url = f"{API_SERVER}?{urlencode(params)}"
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, timeout=30.0)
-        return response.json()
+    response = await upstream_get(url, timeout=30.0, action=action)
+    return response_data(response)
+
+
+# ============ 업스트림 응답 캐시 (stale-while-revalidate) ============
+# 같은 (keyword, limit, sort) 요청이 몇 초 간격으로 반복됨 → action별 만료 정책으로 캐시
+# 만료 후에도 STALE 기간 동안은 캐시를 즉시 반환하고, 백그라운드에서 한 번만 갱신
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+RESPONSE_CACHE_STALE_TTL = float(os.getenv("RESPONSE_CACHE_STALE_TTL", "600"))
+# stale 기간이 지난 응답도 이만큼 더 보관 → 호출 한도 소진 / 업스트림 장애 시 대신 응답
+RESPONSE_CACHE_FALLBACK_TTL = float(os.getenv("RESPONSE_CACHE_FALLBACK_TTL", "86400"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", CACHE_BACKEND)
+GOLDBOX_RESET_HOUR_KST = int(os.getenv("GOLDBOX_RESET_HOUR_KST", "7"))
+
+KST = timezone(timedelta(hours=9))
+
+
+def next_kst_reset(hour: int) -> float:
+    """다음 KST 기준 일일 리셋 시각 (epoch 초)"""
+    now = datetime.now(KST)
+    reset = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if reset <= now:
+        reset += timedelta(days=1)
+    return reset.timestamp()
+
+
+def next_hour_boundary() -> float:
+    """다음 정각 (epoch 초)"""
+    return (time.time() // 3600 + 1) * 3600
+
+
+# action별 신선도 만료 시각 계산
+RESPONSE_CACHE_EXPIRY = {
+    "search": lambda: time.time() + SEARCH_CACHE_TTL,  # 검색: 몇 분
+    "best": next_hour_boundary,  # 베스트: 매 정각
+    "goldbox": lambda: next_kst_reset(GOLDBOX_RESET_HOUR_KST),  # 골드박스: KST 일일 리셋
+}
+
+
+def request_key(action: str, params: dict = None) -> str:
+    """요청 정규화 키 (action + 정렬된 파라미터)"""
+    items = sorted((k, str(v)) for k, v in (params or {}).items() if k != "action")
+    return f"{action}?{urlencode(items)}"
+
+
+def is_ok_response(data: dict) -> bool:
+    """캐시해도 되는 정상 응답인지"""
+    return isinstance(data, dict) and "error" not in data and data.get("rCode") == "0"
+
+
+class ResponseCache:
+    """stale-while-revalidate 응답 캐시 (저장은 캐시 백엔드에 위임)"""
+
+    def __init__(self, backend: CacheBackend, stale_ttl: float, fallback_ttl: float = 0.0):
+        self.backend = backend
+        self.stale_ttl = stale_ttl
+        self.fallback_ttl = fallback_ttl
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.fallback_hits = 0
+        self.misses = 0
+        self._refreshing = set()
+
+    async def lookup(self, key: str):
+        """(data, is_fresh) 반환, 없거나 완전히 만료되면 (None, False)"""
+        # 백엔드 항목은 stale(+fallback) 기간까지 살아 있음 → 값에 신선도 만료 시각을 같이 저장
+        entry = await self.backend.get(key)
+        now = time.time()
+        if entry is None or now >= entry[1] + self.stale_ttl:
+            self.misses += 1
+            return None, False
+        data, fresh_until = entry
+        if now < fresh_until:
+            self.fresh_hits += 1
+            return data, True
+        self.stale_hits += 1
+        return data, False
+
+    async def fallback(self, key: str):
+        """stale 기간이 지났어도 보관 중인 응답 (호출 한도 소진 시), 없으면 None"""
+        entry = await self.backend.get(key)
+        if entry is None:
+            return None
+        self.fallback_hits += 1
+        return entry[0]
+
+    async def store(self, key: str, data: dict, fresh_until: float):
+        ttl = fresh_until + self.stale_ttl + self.fallback_ttl - time.time()
+        if ttl > 0:
+            await self.backend.set(key, [data, fresh_until], ttl)
+
+    def revalidate(self, key: str, action: str, params: dict):
+        """백그라운드 갱신 (키당 동시에 하나만)"""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        spawn_background(self._refresh(key, action, params))
+
+    async def _refresh(self, key: str, action: str, params: dict):
+        try:
+            await api_flight.do(key, fetch_and_store, key, action, params, True)
+        except (QuotaExhausted, UpstreamUnavailable) as e:
+            # 한도 예비분 보호 / Retry-After 기간 - stale 응답을 계속 쓰고 다음 조회 때 다시 시도
+            logger.debug("background refresh skipped (%s): %s", key, type(e).__name__)
+        except Exception as e:
+            logger.warning("background refresh failed (%s): %s", key, e)
+        finally:
+            self._refreshing.discard(key)
+
+    async def clear(self):
+        await self.backend.delete()
+
+    async def stats(self) -> dict:
+        lookups = self.fresh_hits + self.stale_hits + self.misses
+        hits = self.fresh_hits + self.stale_hits
+        return {
+            "backend": self.backend.kind,
+            "entries": await self.backend.count(),
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "fallback_hits": self.fallback_hits,
+            "misses": self.misses,
+            "refreshing": len(self._refreshing),
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+        }
+
+
+response_cache = ResponseCache(
+    create_cache_backend(RESPONSE_CACHE_BACKEND, "responses", RESPONSE_CACHE_SIZE),
+    RESPONSE_CACHE_STALE_TTL,
+    RESPONSE_CACHE_FALLBACK_TTL,
+)
+api_flight = SingleFlight("api")
+
+
+async def fetch_and_store(key: str, action: str, params: dict, background: bool = False) -> dict:
+    """업스트림 조회 후 정상 응답이면 캐시에 저장"""
+    data = await fetch_api(action, params, background)
+    if action in RESPONSE_CACHE_EXPIRY and is_ok_response(data):
+        await response_cache.store(key, data, RESPONSE_CACHE_EXPIRY[action]())
+    return data
+
+
+async def call_api(action: str, params: dict = None) -> dict:
+    """API 서버 호출 (search/best/goldbox는 응답 캐시 경유, 동일 요청은 하나로 합침)"""
+    params = dict(params or {})
+    key = request_key(action, params)
+
+    with trace_span("call_api", action=action) as span:
+        if action in RESPONSE_CACHE_EXPIRY:
+            data, is_fresh = await response_cache.lookup(key)
+            if data is not None:
+                span.set("cache", "fresh" if is_fresh else "stale")
+                if not is_fresh:
+                    response_cache.revalidate(key, action, params)
+                return data
+        span.set("cache", "miss")
+
+        try:
+            data = await api_flight.do(key, fetch_and_store, key, action, params)
+        except QuotaExhausted:
+            data = {"error": "quota_exhausted", "message": "요청이 많아 잠시 후 다시 시도해주세요. (API 호출 한도)"}
+        except UpstreamUnavailable as e:
+            data = {"error": "upstream_unavailable",
+                    "message": f"쿠팡 API 서버가 일시 중단 상태입니다. {e.retry_in:.0f}초 후 다시 시도해주세요."}
+        except httpx.HTTPError as e:
+            data = {"error": "upstream_error", "message": f"쿠팡 API 서버 응답 없음 ({type(e).__name__})"}
+
+        if "error" in data:
+            span.set("error", data["error"])
+            # 한도 소진 / 업스트림 장애: 오래된 캐시라도 있으면 그걸로 응답
+            if action in RESPONSE_CACHE_EXPIRY:
+                cached = await response_cache.fallback(key)
+                if cached is not None:
+                    span.set("cache", "fallback")
+                    return cached
+        return data
+
+
+# ============ 상품 파이프라인 ============
+# 모든 상품 tool이 같은 단계를 거침: fetch → dedupe → filter/sort → enrich(가격, 링크) → parse → render
+# 캐시/동시성 제한/마감 시간/progress 알림을 한 곳에서 처리하고, 단계별 소요 시간을 집계
+#
+# 마감 시간: 느린 조회 하나가 전체를 붙잡지 않도록, tool 호출마다 지연 예산(기본 1.5초)을 두고
+# 그때까지 끝난 결과만 사용: 가격 미도착 → 쿠팡 가격, 단축 링크 미도착 → 원본 productUrl
+# 늦게 끝난 조회는 백그라운드에서 계속 진행되어 캐시를 채움 → 다음 호출은 완전한 결과
+TOOL_DEADLINE_SEC = float(os.getenv("TOOL_DEADLINE_SEC", "1.5"))
+ENRICH_MIN_WAIT = 0.05  # 예산을 다 써도 캐시 히트 정도는 반영되도록 최소 대기
+
+
+def tool_deadline(tool_name: str) -> float:
+    """tool별 지연 예산 (초) - TOOL_DEADLINE_<TOOL 이름 대문자>로 개별 설정"""
+    return float(os.getenv(f"TOOL_DEADLINE_{tool_name.upper()}", TOOL_DEADLINE_SEC))
+
+
+def _task_result(task, default):
+    """끝난 Task의 결과 (미완료/실패면 default)"""
+    if task is None or not task.done() or task.cancelled() or task.exception() is not None:
+        return default
+    return task.result()
+
+
+def _finish_in_background(task):
+    """마감 후에도 계속 실행되도록 참조를 보관 (결과는 캐시에만 반영)"""
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+# progressive 모드: 원본 목록/각 enrichment 단계가 끝날 때마다 MCP progress 알림으로 중간 결과 전송
+# (클라이언트가 progressToken을 보낸 요청에만 전송, 최종 마크다운은 기존처럼 tool 결과로 반환)
+# JSON 응답 모드에서는 응답 전 알림이 버려지므로 끔
+PROGRESSIVE_RESULTS = os.getenv("PROGRESSIVE_RESULTS", "0") == "1" and not MCP_JSON_RESPONSE
+
+
+class ProgressReporter:
+    """tool 호출 중간 결과를 progress 알림으로 전송"""
+
+    def __init__(self, ctx, total: int = 0):
+        self.ctx = ctx
+        self.total = total
+        self.progress = 0
+        meta = ctx.request_context.meta if ctx is not None and PROGRESSIVE_RESULTS else None
+        self.enabled = meta is not None and meta.progressToken is not None
+
+    async def report(self, message: str):
+        if not self.enabled:
+            return
+        self.progress += 1
+        try:
+            await self.ctx.report_progress(self.progress, self.total or None, message)
+        except Exception as e:
+            # 알림 실패가 tool 결과에 영향을 주지 않도록
+            logger.debug("progress notification failed: %s", e)
+            self.enabled = False
+
+
+class ProductItem:
+    """파이프라인에서 다루는 상품 한 개"""
+
+    __slots__ = ("name", "url", "short_url", "price", "discount_rate", "rank", "base", "options")
+
+    def __init__(self, product: dict):
+        self.name = product.get("productName", "")
+        self.url = product.get("productUrl", "")
+        self.short_url = self.url
+        # 다나와 가격이 오면 덮어씀, 없으면 쿠팡 API 가격 사용
+        coupang_price = product.get("productPrice", 0)
+        self.price = coupang_price if coupang_price > 0 else None
+        self.discount_rate = product.get("discountRate", 0)
+        self.rank = product.get("rank")
+        self.base = self.name
+        self.options = []
+
+
+class Enricher:
+    """상품 보강 단계 - 새 보강 항목은 상속 후 ENRICHERS에 등록"""
+
+    name = ""
+    label = ""  # 단계 완료 시 progress 알림 제목
+
+    def start(self, item: ProductItem):
+        """보강용 코루틴 반환 (None이면 이 상품은 건너뜀)"""
+        raise NotImplementedError
+
+    def apply(self, item: ProductItem, result):
+        """도착한 결과를 상품에 반영"""
+        raise NotImplementedError
+
+
+class PriceEnricher(Enricher):
+    """다나와 가격"""
+
+    name = "price"
+    label = "가격 조회 완료"
+
+    def start(self, item):
+        return get_danawa_price(build_search_keyword(item.name))
+
+    def apply(self, item, result):
+        if result.get("price"):
+            item.price = result["price"]
+
+
+class LinkEnricher(Enricher):
+    """단축 링크"""
+
+    name = "link"
+    label = "링크 변환 완료"
+
+    def start(self, item):
+        return shorten_url(item.url)
+
+    def apply(self, item, result):
+        item.short_url = result
+
+
+ENRICHERS = {enricher.name: enricher for enricher in (PriceEnricher(), LinkEnricher())}
+
+# tool별 단계 소요 시간 집계: {tool: {stage: [횟수, 누적 초]}}
+pipeline_timings = {}
+
+
+def dedupe_products(products: list) -> list:
+    """같은 상품(productId, 없으면 pageKey/URL) 중복 제거 - 먼저 나온 것 유지"""
+    seen = set()
+    unique = []
+    for product in products:
+        key = product.get("productId") or extract_page_key(product.get("productUrl", "")) or product.get("productUrl")
+        if key and key in seen:
+            continue
+        seen.add(key)
+        unique.append(product)
+    return unique
+
+
+def extract_products(action: str, data: dict) -> list:
+    """API 응답에서 상품 목록 추출"""
+    if action == "search":
+        return data.get("data", {}).get("productData", [])
+    return data.get("data", [])
+
+
+class ProductPipeline:
+    """상품 tool 공통 실행 파이프라인"""
+
+    def __init__(self, tool_name: str, ctx=None, enrichers=("price", "link")):
+        self.tool_name = tool_name
+        self.deadline = time.monotonic() + tool_deadline(tool_name)
+        self.enrichers = [ENRICHERS[name] for name in enrichers]
+        self.progress = ProgressReporter(ctx)
+        self.timings = {}
+        self._stage_started = None
+
+    def _mark(self, stage: str):
+        """이전 단계 종료 + 새 단계 시작"""
+        now = time.perf_counter()
+        if self._stage_started is not None:
+            name, started = self._stage_started
+            self.timings[name] = self.timings.get(name, 0.0) + (now - started)
+        self._stage_started = (stage, now) if stage else None
+
+    def _record_timings(self):
+        self._mark(None)
+        tool_stats = pipeline_timings.setdefault(self.tool_name, {})
+        for stage, seconds in self.timings.items():
+            stat = tool_stats.setdefault(stage, [0, 0.0])
+            stat[0] += 1
+            stat[1] += seconds
+        logger.debug("pipeline %s: %s", self.tool_name,
+                     {stage: round(sec * 1000, 2) for stage, sec in self.timings.items()})
+
+    async def run(self, action: str, params: dict, select, render) -> str:
+        """파이프라인 실행
+
+        select(products) → [(섹션 제목 또는 None, 상품 리스트), ...] 또는 빈 결과 안내 문자열
+        render(sections) → 최종 마크다운 (sections: [(섹션 제목, [ProductItem])])
+        """
+        try:
+            self._mark("fetch")
+            data = await call_api(action, params)
+            if "error" in data:
+                return f"오류: {data.get('message', data['error'])}"
+            if data.get("rCode") != "0":
+                return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
+            products = extract_products(action, data)
+
+            # 중복 제거를 필터보다 먼저 해야 limit 개수가 중복으로 줄어들지 않음
+            self._mark("dedupe")
+            products = dedupe_products(products)
+
+            self._mark("filter")
+            selected = select(products)
+            if isinstance(selected, str):
+                return selected
+            sections = [(title, [ProductItem(p) for p in group]) for title, group in selected]
+            items = [item for _, group in sections for item in group]
+
+            self._mark("enrich")
+            await self.enrich(items)
+
+            self._mark("parse")
+            for item in items:
+                parsed = analyze_product_name(item.name)
+                item.base = parsed.base
+                item.options = parsed.options
+
+            self._mark("render")
+            return render(sections)
+        finally:
+            self._record_timings()
+
+    async def enrich(self, items: list):
+        """보강 단계 실행 (deadline까지 끝난 결과만 반영)"""
+        stages = []
+        for enricher in self.enrichers:
+            pairs = []
+            for item in items:
+                coro = enricher.start(item)
+                if coro is not None:
+                    pairs.append((item, asyncio.ensure_future(coro)))
+            stages.append((enricher, pairs))
+
+        def apply_done():
+            for enricher, pairs in stages:
+                for item, task in pairs:
+                    if task.done():
+                        result = _task_result(task, None)
+                        if result is not None:
+                            enricher.apply(item, result)
+
+        pending = {task for _, pairs in stages for _, task in pairs}
+        end = max(self.deadline, time.monotonic() + ENRICH_MIN_WAIT)
+
+        if not self.progress.enabled:
+            if pending:
+                _, pending = await asyncio.wait(pending, timeout=end - time.monotonic())
+        else:
+            self.progress.total = 1 + len(stages)
+            await self.progress.report(render_preview("쿠팡 검색 결과 (가격/링크 조회 중)", items))
+            waiting = list(stages)
+            # 단계(가격/링크)별로 끝나는 대로 알림
+            while pending:
+                timeout = end - time.monotonic()
+                if timeout <= 0:
+                    break
+                _, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for stage in list(waiting):
+                    enricher, pairs = stage
+                    if all(task.done() for _, task in pairs):
+                        waiting.remove(stage)
+                        apply_done()
+                        await self.progress.report(render_preview(enricher.label, items))
+
+        for task in pending:
+            _finish_in_background(task)
+        apply_done()
+
+
+def render_preview(title: str, items: list) -> str:
+    """progress 알림용 간단한 중간 결과 목록"""
+    lines = [title]
+    for idx, item in enumerate(items, 1):
+        price_str = f" | {format_price(item.price)}" if item.price else ""
+        lines.append(f"{idx}) {item.name}{price_str}")
+        lines.append(f"   {item.short_url}")
+    return "\n".join(lines)
+
+
+def render_item(lines: list, label, item: ProductItem, show_price: bool = True, suffix: str = ""):
+    """상품 한 개 출력 (이름/옵션/가격/링크)"""
+    lines.append(f"{label}) {item.base}{suffix}")
+    if item.options:
+        lines.append(f"   옵션: {' / '.join(item.options)}")
+    if show_price and item.price:
+        lines.append(f"   가격: {format_price(item.price)}")
+    lines.append(f"   보러가기: {item.short_url}")
+    lines.append("")
+
+
+def render_sections(header: str, sections: list) -> str:
+    """섹션별 상품 목록 출력 (제목 없는 섹션은 헤더 없이 목록만)"""
+    lines = [header]
+    for title, items in sections:
+        if not items:
+            continue
+        if title:
+            lines.append(f"## {title} ({len(items)})\n")
+        for idx, item in enumerate(items, 1):
+            render_item(lines, idx, item)
+    return "\n".join(lines) + PRICE_DISCLAIMER
+
+
+def split_rocket(products: list) -> list:
+    """로켓배송 / 일반배송 섹션 분리"""
+    rocket_products = [p for p in products if p.get("isRocket", False)]
+    normal_products = [p for p in products if not p.get("isRocket", False)]
+    return [("rocket", rocket_products), ("normal", normal_products)]
 
 
 def get_search_cta(keyword: str) -> str:
@@ -1235,61 +3138,13 @@ async def get_coupang_recommendations(category: str = "") -> str:
     Args:
         category: 카테고리 (전자기기, 가전, 식품, 패션, 뷰티, 생활 중 선택)
     """
-    recommendations = {
-        "전자기기": {
-            "emoji": "📱",
-            "items": ["아이폰", "갤럭시", "에어팟", "맥북", "아이패드", "닌텐도 스위치", "로지텍 마우스", "기계식 키보드"]
-        },
-        "가전": {
-            "emoji": "🏠",
-            "items": ["다이슨 청소기", "로봇청소기", "공기청정기", "에어프라이어", "전기포트", "커피머신", "안마기"]
-        },
-        "식품": {
-            "emoji": "🍎",
-            "items": ["사과", "한우", "삼겹살", "커피", "견과류", "냉동만두", "라면", "생수"]
-        },
-        "패션": {
-            "emoji": "👕",
-            "items": ["나이키 운동화", "뉴발란스", "맨투맨", "청바지", "패딩", "백팩", "스니커즈"]
-        },
-        "뷰티": {
-            "emoji": "💄",
-            "items": ["선크림", "마스크팩", "클렌징폼", "비타민", "유산균", "오메가3", "샴푸"]
-        },
-        "생활": {
-            "emoji": "🛒",
-            "items": ["휴지", "세탁세제", "물티슈", "수건", "이불", "매트리스", "청소용품"]
-        }
-    }
-
-    if category and category in recommendations:
+    catalog = get_catalog()
+    if category and category in catalog.recommendation_pages:
         # 특정 카테고리 추천
-        cat_data = recommendations[category]
-        result = [
-            f"# {cat_data['emoji']} {category} 인기 검색어\n",
-            "| 순위 | 검색어 |",
-            "|:---:|:---|"
-        ]
-        for idx, item in enumerate(cat_data["items"], 1):
-            result.append(f"| {idx} | {item} |")
-
-        result.append(f"\n> 검색하고 싶은 번호나 검색어를 말해주세요!")
-        return "\n".join(result)
+        return catalog.recommendation_pages[category]
 
     # 전체 카테고리 보여주기
-    result = [
-        "# 🛍️ 카테고리별 인기 검색어\n",
-        "어떤 카테고리가 궁금하세요?\n"
-    ]
-
-    for cat_name, cat_data in recommendations.items():
-        top3 = ", ".join(cat_data["items"][:3])
-        result.append(f"**{cat_data['emoji']} {cat_name}**: {top3}...")
-
-    result.append("\n---")
-    result.append("> 카테고리 이름을 말해주세요! (예: 전자기기, 가전, 식품...)")
-
-    return "\n".join(result)
+    return catalog.recommendation_overview
 
 
 @mcp.tool()
@@ -1304,105 +3159,16 @@ async def get_coupang_seasonal(season: str = "") -> str:
     Args:
         season: 시즌/상황 (겨울, 설날, 발렌타인, 입학, 여름, 추석 등)
     """
-    # 2026년 1월 기준 시즌 데이터
-    seasonal_data = {
-        "겨울": {
-            "emoji": "❄️",
-            "period": "12월~2월",
-            "items": ["롱패딩", "핫팩", "전기장판", "가습기", "목도리", "장갑", "부츠", "히터"],
-            "tip": "한파 대비! 보온용품 미리 준비"
-        },
-        "설날": {
-            "emoji": "🧧",
-            "period": "2026년 2월 14일~18일 (설연휴)",
-            "items": ["한우세트", "과일세트", "홍삼", "상품권", "안마기", "건강식품", "차세트"],
-            "tip": "설 선물은 2주 전에 주문해야 연휴 전 도착!"
-        },
-        "발렌타인": {
-            "emoji": "💝",
-            "period": "2월 14일",
-            "items": ["초콜릿", "케이크", "꽃다발", "향수", "커플템", "와인", "디저트"],
-            "tip": "수제 초콜릿은 일찍 품절되니 미리 주문"
-        },
-        "입학": {
-            "emoji": "🎒",
-            "period": "2월~3월",
-            "items": ["노트북", "책가방", "필통", "신발", "교복", "태블릿", "문구세트"],
-            "tip": "입학 시즌에는 가격 오르니 미리 준비"
-        },
-        "봄": {
-            "emoji": "🌸",
-            "period": "3월~5월",
-            "items": ["트렌치코트", "가디건", "운동화", "피크닉매트", "자전거", "선크림"],
-            "tip": "환절기 대비 가벼운 아우터 준비"
-        },
-        "여름": {
-            "emoji": "☀️",
-            "period": "6월~8월",
-            "items": ["에어컨", "선풍기", "제습기", "썬크림", "수영복", "샌들", "아이스박스"],
-            "tip": "에어컨은 여름 전에 미리 사야 설치 빠름"
-        },
-        "추석": {
-            "emoji": "🥮",
-            "period": "2026년 9월 25일~27일",
-            "items": ["한우세트", "굴비세트", "과일세트", "송편", "식용유세트", "홍삼"],
-            "tip": "추석 선물도 2주 전 주문 필수!"
-        },
-        "가을": {
-            "emoji": "🍂",
-            "period": "9월~11월",
-            "items": ["가을자켓", "니트", "등산화", "캠핑용품", "고구마", "밤"],
-            "tip": "야외활동 시즌! 캠핑/등산용품 인기"
-        },
-        "블프": {
-            "emoji": "🏷️",
-            "period": "11월 넷째주",
-            "items": ["전자기기", "가전", "패션", "화장품", "생활용품"],
-            "tip": "블랙프라이데이 전 미리 찜해두기"
-        },
-        "크리스마스": {
-            "emoji": "🎄",
-            "period": "12월 25일",
-            "items": ["케이크", "와인", "장난감", "트리", "선물세트", "파티용품"],
-            "tip": "인기 장난감은 11월에 품절되니 미리!"
-        }
-    }
-
-    if season and season in seasonal_data:
-        data = seasonal_data[season]
-        result = [
-            f"# {data['emoji']} {season} 추천 상품\n",
-            f"**시기:** {data['period']}\n",
-            "| 순위 | 추천 검색어 |",
-            "|:---:|:---|"
-        ]
-        for idx, item in enumerate(data["items"], 1):
-            result.append(f"| {idx} | {item} |")
+    catalog = get_catalog()
+    if season and season in catalog.seasonal_pages:
+        return catalog.seasonal_pages[season]
 
-        result.append(f"\n💡 **Tip:** {data['tip']}")
-        result.append("\n> 검색하고 싶은 상품을 말해주세요!")
-        return "\n".join(result)
-
-    # 현재 시즌 자동 추천 (1월 = 겨울 + 설날 임박)
-    result = [
-        "# 📅 시즌별 추천\n",
-        "**현재:** 2026년 1월 (겨울)\n",
-        "**다가오는 이벤트:** 설날 (2/17), 발렌타인 (2/14)\n",
-        "",
-        "어떤 시즌이 궁금하세요?\n"
-    ]
-
-    for name, data in seasonal_data.items():
-        result.append(f"**{data['emoji']} {name}** ({data['period']})")
-
-    result.append("\n---")
-    result.append("> 시즌 이름을 말해주세요! (예: 겨울, 설날, 발렌타인...)")
-
-    return "\n".join(result)
+    # 시즌 목록 + 현재 시즌 / 다가오는 이벤트
+    return catalog.seasonal_overview
 
 
 @mcp.tool()
-async def search_coupang_rocket(keyword: str, limit: int = 10) -> str:
+async def search_coupang_rocket(keyword: str, limit: int = 10, ctx: Context = None) -> str:
     """
     로켓배송 상품만 검색합니다.
 
@@ -1414,72 +3180,27 @@ async def search_coupang_rocket(keyword: str, limit: int = 10) -> str:
         keyword: 검색 키워드
         limit: 결과 개수 (기본 10)
     """
-    import asyncio
-
     # 쿠팡 API limit 상한선 (최대 10)
     api_limit = min(limit * 2, 10)
     sort_type = detect_sort_intent(keyword)
-    data = await call_api("search", {"keyword": keyword, "limit": api_limit, "sort": sort_type})
-
-    if "error" in data:
-        return f"오류: {data.get('message', data['error'])}"
-
-    if data.get("rCode") != "0":
-        return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
-
-    products = data.get("data", {}).get("productData", [])
-
-    # 클라이언트 정렬 적용
-    products = sort_products(products, sort_type)
-
-    # 로켓배송만 필터
-    rocket_products = [p for p in products if p.get("isRocket", False)][:limit]
 
-    if not rocket_products:
-        return f"'{keyword}' 로켓배송 상품이 없습니다. 일반 검색을 시도해보세요."
+    def select(products):
+        # 클라이언트 정렬 적용 후 로켓배송만 필터
+        products = sort_products(products, sort_type)
+        rocket_products = [p for p in products if p.get("isRocket", False)][:limit]
+        if not rocket_products:
+            return f"'{keyword}' 로켓배송 상품이 없습니다. 일반 검색을 시도해보세요."
+        return [(None, rocket_products)]
 
-    # 상품별 다나와 가격 + 단축URL 병렬 조회
-    async def get_product_info(product):
-        name = product.get("productName", "")
-        url = product.get("productUrl", "")
-        coupang_price = product.get("productPrice", 0)
-        search_keyword = build_search_keyword(name)
-
-        danawa_task = get_danawa_price(search_keyword)
-        url_task = shorten_url(url)
-        danawa_result, short_url = await asyncio.gather(danawa_task, url_task)
-
-        final_price = danawa_result.get("price") or (coupang_price if coupang_price > 0 else None)
-
-        return {
-            "name": name,
-            "short_url": short_url,
-            "danawa_price": final_price
-        }
-
-    product_infos = await asyncio.gather(*[get_product_info(p) for p in rocket_products])
-
-    lines = [f"# {keyword} rocket TOP {len(rocket_products)}\n"]
-
-    for idx, info in enumerate(product_infos, 1):
-        parsed = parse_product_name(info["name"])
-        base_name = parsed["base"]
-        options = parsed["options"]
-        price_str = format_price(info['danawa_price']) if info["danawa_price"] else ""
-
-        lines.append(f"{idx}) {base_name}")
-        if options:
-            lines.append(f"   옵션: {' / '.join(options)}")
-        if price_str:
-            lines.append(f"   가격: {price_str}")
-        lines.append(f"   보러가기: {info['short_url']}")
-        lines.append("")
+    def render(sections):
+        return render_sections(f"# {keyword} rocket TOP {len(sections[0][1])}\n", sections)
 
-    return "\n".join(lines) + PRICE_DISCLAIMER
+    pipeline = ProductPipeline("search_coupang_rocket", ctx)
+    return await pipeline.run("search", {"keyword": keyword, "limit": api_limit, "sort": sort_type}, select, render)
 
 
 @mcp.tool()
-async def search_coupang_budget(keyword: str, max_price: int = 50000, limit: int = 10) -> str:
+async def search_coupang_budget(keyword: str, max_price: int = 50000, limit: int = 10, ctx: Context = None) -> str:
     """
     가격대별 상품 검색. (로켓배송 + 일반배송 분리 표시)
 
@@ -1492,88 +3213,27 @@ async def search_coupang_budget(keyword: str, max_price: int = 50000, limit: int
         max_price: 최대 가격 (기본 50000원)
         limit: 결과 개수 (기본 10)
     """
-    import asyncio
-
     # 쿠팡 API limit 상한선 (최대 10)
     api_limit = min(limit, 10)
     sort_type = detect_sort_intent(keyword)
-    data = await call_api("search", {"keyword": keyword, "limit": api_limit, "sort": sort_type})
-
-    if "error" in data:
-        return f"오류: {data.get('message', data['error'])}"
-
-    if data.get("rCode") != "0":
-        return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
-
-    products = data.get("data", {}).get("productData", [])
 
-    # 가격 필터 적용
-    budget_products = [p for p in products if p.get("productPrice", 0) <= max_price]
-    budget_products.sort(key=lambda x: x.get("productPrice", 0))
+    def select(products):
+        # 가격 필터 적용
+        budget_products = [p for p in products if p.get("productPrice", 0) <= max_price]
+        budget_products.sort(key=lambda x: x.get("productPrice", 0))
+        if not budget_products:
+            return f"'{keyword}' {max_price:,}원 이하 상품이 없습니다."
+        return split_rocket(budget_products)
 
-    if not budget_products:
-        return f"'{keyword}' {max_price:,}원 이하 상품이 없습니다."
+    def render(sections):
+        return render_sections(f"# {keyword} under {max_price:,}\n", sections)
 
-    # 로켓배송 / 일반배송 분리
-    rocket_products = [p for p in budget_products if p.get("isRocket", False)]
-    normal_products = [p for p in budget_products if not p.get("isRocket", False)]
-
-    # 상품별 다나와 가격 + 단축URL 병렬 조회
-    async def get_product_info(product):
-        name = product.get("productName", "")
-        url = product.get("productUrl", "")
-        coupang_price = product.get("productPrice", 0)
-        search_keyword = build_search_keyword(name)
-
-        danawa_task = get_danawa_price(search_keyword)
-        url_task = shorten_url(url)
-        danawa_result, short_url = await asyncio.gather(danawa_task, url_task)
-
-        final_price = danawa_result.get("price") or (coupang_price if coupang_price > 0 else None)
-
-        return {
-            "name": name,
-            "short_url": short_url,
-            "danawa_price": final_price
-        }
-
-    all_products = rocket_products + normal_products
-    product_infos = await asyncio.gather(*[get_product_info(p) for p in all_products])
-
-    rocket_infos = product_infos[:len(rocket_products)]
-    normal_infos = product_infos[len(rocket_products):]
-
-    lines = [f"# {keyword} under {max_price:,}\n"]
-
-    if rocket_infos:
-        lines.append(f"## rocket ({len(rocket_infos)})\n")
-        for idx, info in enumerate(rocket_infos, 1):
-            parsed = parse_product_name(info["name"])
-            lines.append(f"{idx}) {parsed['base']}")
-            if parsed["options"]:
-                lines.append(f"   옵션: {' / '.join(parsed['options'])}")
-            if info["danawa_price"]:
-                lines.append(f"   가격: {format_price(info['danawa_price'])}")
-            lines.append(f"   보러가기: {info['short_url']}")
-            lines.append("")
-
-    if normal_infos:
-        lines.append(f"## normal ({len(normal_infos)})\n")
-        for idx, info in enumerate(normal_infos, 1):
-            parsed = parse_product_name(info["name"])
-            lines.append(f"{idx}) {parsed['base']}")
-            if parsed["options"]:
-                lines.append(f"   옵션: {' / '.join(parsed['options'])}")
-            if info["danawa_price"]:
-                lines.append(f"   가격: {format_price(info['danawa_price'])}")
-            lines.append(f"   보러가기: {info['short_url']}")
-            lines.append("")
-
-    return "\n".join(lines) + PRICE_DISCLAIMER
+    pipeline = ProductPipeline("search_coupang_budget", ctx)
+    return await pipeline.run("search", {"keyword": keyword, "limit": api_limit, "sort": sort_type}, select, render)
 
 
 @mcp.tool()
-async def compare_coupang_products(keyword: str, limit: int = 5) -> str:
+async def compare_coupang_products(keyword: str, limit: int = 5, ctx: Context = None) -> str:
     """
     쿠팡 상품을 비교표로 보여줍니다. (로켓배송 + 일반배송 분리 표시)
 
@@ -1585,90 +3245,29 @@ async def compare_coupang_products(keyword: str, limit: int = 5) -> str:
         keyword: 검색 키워드
         limit: 비교할 상품 수 (기본 5, 최대 10)
     """
-    import asyncio
-
     if limit > 10:
         limit = 10
 
     # 쿠팡 API limit 상한선 (최대 10)
     api_limit = min(limit, 10)
     sort_type = detect_sort_intent(keyword)
-    data = await call_api("search", {"keyword": keyword, "limit": api_limit, "sort": sort_type})
-
-    if "error" in data:
-        return f"오류: {data.get('message', data['error'])}"
-
-    if data.get("rCode") != "0":
-        return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
-
-    products = data.get("data", {}).get("productData", [])
-
-    # 클라이언트 정렬 적용
-    products = sort_products(products, sort_type)
 
-    if not products:
-        return f"'{keyword}' 검색 결과가 없습니다."
-
-    # 로켓배송 / 일반배송 분리
-    rocket_products = [p for p in products if p.get("isRocket", False)]
-    normal_products = [p for p in products if not p.get("isRocket", False)]
-
-    # 상품별 다나와 가격 + 단축URL 병렬 조회
-    async def get_product_info(product):
-        name = product.get("productName", "")
-        url = product.get("productUrl", "")
-        coupang_price = product.get("productPrice", 0)
-        search_keyword = build_search_keyword(name)
-
-        danawa_task = get_danawa_price(search_keyword)
-        url_task = shorten_url(url)
-        danawa_result, short_url = await asyncio.gather(danawa_task, url_task)
-
-        final_price = danawa_result.get("price") or (coupang_price if coupang_price > 0 else None)
-
-        return {
-            "name": name,
-            "short_url": short_url,
-            "danawa_price": final_price
-        }
+    def select(products):
+        # 클라이언트 정렬 적용
+        products = sort_products(products, sort_type)
+        if not products:
+            return f"'{keyword}' 검색 결과가 없습니다."
+        return split_rocket(products)
 
-    all_products = rocket_products + normal_products
-    product_infos = await asyncio.gather(*[get_product_info(p) for p in all_products])
-
-    rocket_infos = product_infos[:len(rocket_products)]
-    normal_infos = product_infos[len(rocket_products):]
-
-    lines = [f"# {keyword} compare\n"]
-
-    if rocket_infos:
-        lines.append(f"## rocket ({len(rocket_infos)})\n")
-        for idx, info in enumerate(rocket_infos, 1):
-            parsed = parse_product_name(info["name"])
-            lines.append(f"{idx}) {parsed['base']}")
-            if parsed["options"]:
-                lines.append(f"   옵션: {' / '.join(parsed['options'])}")
-            if info["danawa_price"]:
-                lines.append(f"   가격: {format_price(info['danawa_price'])}")
-            lines.append(f"   보러가기: {info['short_url']}")
-            lines.append("")
-
-    if normal_infos:
-        lines.append(f"## normal ({len(normal_infos)})\n")
-        for idx, info in enumerate(normal_infos, 1):
-            parsed = parse_product_name(info["name"])
-            lines.append(f"{idx}) {parsed['base']}")
-            if parsed["options"]:
-                lines.append(f"   옵션: {' / '.join(parsed['options'])}")
-            if info["danawa_price"]:
-                lines.append(f"   가격: {format_price(info['danawa_price'])}")
-            lines.append(f"   보러가기: {info['short_url']}")
-            lines.append("")
+    def render(sections):
+        return render_sections(f"# {keyword} compare\n", sections)
 
-    return "\n".join(lines) + PRICE_DISCLAIMER
+    pipeline = ProductPipeline("compare_coupang_products", ctx)
+    return await pipeline.run("search", {"keyword": keyword, "limit": api_limit, "sort": sort_type}, select, render)
 
 
 @mcp.tool()
-async def search_coupang_products(keyword: str, limit: int = 10) -> str:
+async def search_coupang_products(keyword: str, limit: int = 10, ctx: Context = None) -> str:
     """
     쿠팡에서 상품을 검색합니다. (로켓배송 + 일반배송 분리 표시)
 
@@ -1680,95 +3279,35 @@ async def search_coupang_products(keyword: str, limit: int = 10) -> str:
         keyword: 검색 키워드
         limit: 결과 개수 (기본 10)
     """
-    import asyncio
-
     # 쿠팡 API limit 상한선 (최대 10)
     api_limit = min(limit, 10)
     sort_type = detect_sort_intent(keyword)
-    data = await call_api("search", {"keyword": keyword, "limit": api_limit, "sort": sort_type})
-
-    if "error" in data:
-        return f"오류: {data.get('message', data['error'])}"
-
-    if data.get("rCode") != "0":
-        return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
-
-    products = data.get("data", {}).get("productData", [])
-
-    # 클라이언트 정렬 적용
-    products = sort_products(products, sort_type)
-
-    if not products:
-        return f"'{keyword}' 검색 결과가 없습니다."
-
-    # 로켓배송 / 일반배송 분리
-    rocket_products = [p for p in products if p.get("isRocket", False)]
-    normal_products = [p for p in products if not p.get("isRocket", False)]
 
-    # 상품별 다나와 가격 + 단축URL 병렬 조회
-    async def get_product_info(product):
-        name = product.get("productName", "")
-        url = product.get("productUrl", "")
-        coupang_price = product.get("productPrice", 0)  # 쿠팡 API 가격 (폴백용)
-        search_keyword = build_search_keyword(name)
+    def select(products):
+        # 클라이언트 정렬 적용
+        products = sort_products(products, sort_type)
+        if not products:
+            return f"'{keyword}' 검색 결과가 없습니다."
+        return split_rocket(products)
 
-        danawa_task = get_danawa_price(search_keyword)
-        url_task = shorten_url(url)
-        danawa_result, short_url = await asyncio.gather(danawa_task, url_task)
+    def render(sections):
+        return render_sections(f"# {keyword}\n", sections)
 
-        # 다나와 가격 우선, 없으면 쿠팡 API 가격 사용
-        final_price = danawa_result.get("price") or (coupang_price if coupang_price > 0 else None)
+    pipeline = ProductPipeline("search_coupang_products", ctx)
+    return await pipeline.run("search", {"keyword": keyword, "limit": api_limit, "sort": sort_type}, select, render)
 
-        return {
-            "name": name,
-            "short_url": short_url,
-            "danawa_price": final_price
-        }
-
-    # 모든 상품 정보 병렬 조회
-    all_products = rocket_products + normal_products
-    product_infos = await asyncio.gather(*[get_product_info(p) for p in all_products])
-
-    # 결과 분리
-    rocket_infos = product_infos[:len(rocket_products)]
-    normal_infos = product_infos[len(rocket_products):]
-
-    lines = [f"# {keyword}\n"]
-
-    # 로켓배송 섹션
-    if rocket_infos:
-        lines.append(f"## rocket ({len(rocket_infos)})\n")
-        for idx, info in enumerate(rocket_infos, 1):
-            parsed = parse_product_name(info["name"])
-            lines.append(f"{idx}) {parsed['base']}")
-            if parsed["options"]:
-                lines.append(f"   옵션: {' / '.join(parsed['options'])}")
-            if info["danawa_price"]:
-                lines.append(f"   가격: {format_price(info['danawa_price'])}")
-            lines.append(f"   보러가기: {info['short_url']}")
-            lines.append("")
-
-    # 일반배송 섹션
-    if normal_infos:
-        lines.append(f"## normal ({len(normal_infos)})\n")
-        for idx, info in enumerate(normal_infos, 1):
-            parsed = parse_product_name(info["name"])
-            lines.append(f"{idx}) {parsed['base']}")
-            if parsed["options"]:
-                lines.append(f"   옵션: {' / '.join(parsed['options'])}")
-            if info["danawa_price"]:
-                lines.append(f"   가격: {format_price(info['danawa_price'])}")
-            lines.append(f"   보러가기: {info['short_url']}")
-            lines.append("")
-
-    if not rocket_infos and not normal_infos:
-        return f"'{keyword}' 검색 결과가 없습니다."
 
-    return "\n".join(lines) + PRICE_DISCLAIMER
+BEST_CATEGORY_NAMES = {
+    1001: "여성패션", 1002: "남성패션", 1010: "뷰티",
+    1011: "출산/유아동", 1012: "식품", 1013: "주방용품",
+    1014: "생활용품", 1015: "홈인테리어", 1016: "가전디지털",
+    1017: "스포츠/레저", 1018: "자동차용품", 1024: "헬스/건강식품",
+    1029: "반려동물용품"
+}
 
 
 @mcp.tool()
-async def get_coupang_best_products(category_id: int = 1016, limit: int = 10) -> str:
+async def get_coupang_best_products(category_id: int = 1016, limit: int = 10, ctx: Context = None) -> str:
     """
     쿠팡 카테고리별 베스트 상품 조회.
 
@@ -1780,53 +3319,29 @@ async def get_coupang_best_products(category_id: int = 1016, limit: int = 10) ->
         category_id: 1012(식품), 1016(전자), 1001(패션), 1010(뷰티), 1015(홈), 1011(육아)
         limit: 결과 개수 (기본 10)
     """
-    category_names = {
-        1001: "여성패션", 1002: "남성패션", 1010: "뷰티",
-        1011: "출산/유아동", 1012: "식품", 1013: "주방용품",
-        1014: "생활용품", 1015: "홈인테리어", 1016: "가전디지털",
-        1017: "스포츠/레저", 1018: "자동차용품", 1024: "헬스/건강식품",
-        1029: "반려동물용품"
-    }
-
-    data = await call_api("best", {"category_id": category_id, "limit": limit * 2})
-
-    if "error" in data:
-        return f"오류: {data.get('message', data['error'])}"
-
-    if data.get("rCode") != "0":
-        return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
-
-    products = data.get("data", [])
+    category_name = BEST_CATEGORY_NAMES.get(category_id, str(category_id))
 
-    if not products:
-        return f"카테고리 {category_id} 베스트 상품이 없습니다."
+    def select(products):
+        if not products:
+            return f"카테고리 {category_id} 베스트 상품이 없습니다."
+        # 로켓배송만 필터
+        rocket_products = [p for p in products if p.get("isRocket", False)][:limit]
+        return [(None, rocket_products)]
 
-    # 로켓배송만 필터
-    rocket_products = [p for p in products if p.get("isRocket", False)][:limit]
+    def render(sections):
+        items = sections[0][1]
+        lines = [f"# {category_name} best TOP {len(items)}\n"]
+        for idx, item in enumerate(items, 1):
+            render_item(lines, item.rank if item.rank is not None else idx, item, show_price=False)
+        return "\n".join(lines) + PRICE_DISCLAIMER
 
-    category_name = category_names.get(category_id, str(category_id))
-
-    lines = [f"# {category_name} best TOP {len(rocket_products)}\n"]
-
-    for idx, product in enumerate(rocket_products, 1):
-        name = product.get("productName", "")
-        url = product.get("productUrl", "")
-        rank = product.get("rank", idx)
-
-        short_url = await shorten_url(url)
-        parsed = parse_product_name(name)
-
-        lines.append(f"{rank}) {parsed['base']}")
-        if parsed["options"]:
-            lines.append(f"   옵션: {' / '.join(parsed['options'])}")
-        lines.append(f"   보러가기: {short_url}")
-        lines.append("")
-
-    return "\n".join(lines) + PRICE_DISCLAIMER
+    # 베스트는 단축 링크만 조회
+    pipeline = ProductPipeline("get_coupang_best_products", ctx, enrichers=("link",))
+    return await pipeline.run("best", {"category_id": category_id, "limit": limit * 2}, select, render)
 
 
 @mcp.tool()
-async def get_coupang_goldbox(limit: int = 10) -> str:
+async def get_coupang_goldbox(limit: int = 10, ctx: Context = None) -> str:
     """
     쿠팡 골드박스 (오늘의 특가/할인) 상품을 조회합니다.
 
@@ -1837,81 +3352,259 @@ async def get_coupang_goldbox(limit: int = 10) -> str:
     Args:
         limit: 결과 개수 (기본 10개)
     """
-    import asyncio
-
-    data = await call_api("goldbox", {"limit": limit * 2})
-
-    if "error" in data:
-        return f"오류: {data.get('message', data['error'])}"
-
-    if data.get("rCode") != "0":
-        return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
-
-    products = data.get("data", [])
-
-    if not products:
-        return "골드박스 상품이 없습니다."
-
-    # 로켓배송만 필터 + 할인율순 정렬
-    rocket_products = [p for p in products if p.get("isRocket", False)]
-    sorted_products = sorted(rocket_products, key=lambda x: x.get("discountRate", 0), reverse=True)[:limit]
-
-    if not sorted_products:
-        return "로켓배송 골드박스 상품이 없습니다."
-
-    # 상품별 다나와 가격 + 단축URL 병렬 조회
-    async def get_product_info(product):
-        name = product.get("productName", "")
-        url = product.get("productUrl", "")
-        discount_rate = product.get("discountRate", 0)
-        coupang_price = product.get("productPrice", 0)
-
-        # 상품명에서 핵심 키워드 추출 (앞 3-4단어)
-        search_keyword = build_search_keyword(name)
-
-        # 병렬로 다나와 가격 + 단축URL 조회
-        danawa_task = get_danawa_price(search_keyword)
-        url_task = shorten_url(url)
-        danawa_result, short_url = await asyncio.gather(danawa_task, url_task)
-
-        # 다나와 가격 우선, 없으면 쿠팡 API 가격 사용
-        final_price = danawa_result.get("price") or (coupang_price if coupang_price > 0 else None)
-
+    def select(products):
+        if not products:
+            return "골드박스 상품이 없습니다."
+        # 로켓배송만 필터 + 할인율순 정렬
+        rocket_products = [p for p in products if p.get("isRocket", False)]
+        sorted_products = sorted(rocket_products, key=lambda x: x.get("discountRate", 0), reverse=True)[:limit]
+        if not sorted_products:
+            return "로켓배송 골드박스 상품이 없습니다."
+        return [(None, sorted_products)]
+
+    def render(sections):
+        items = sections[0][1]
+        # 최대 할인율
+        discounts = [item.discount_rate for item in items if item.discount_rate > 0]
+        max_discount = max(discounts) if discounts else 0
+
+        lines = [f"# goldbox TOP {len(items)} (max {max_discount}% off)\n"]
+        for idx, item in enumerate(items, 1):
+            discount = f" -{item.discount_rate}%" if item.discount_rate > 0 else ""
+            render_item(lines, idx, item, suffix=discount)
+        return "\n".join(lines) + PRICE_DISCLAIMER
+
+    pipeline = ProductPipeline("get_coupang_goldbox", ctx)
+    return await pipeline.run("goldbox", {"limit": limit * 2}, select, render)
+
+
+# ============ 미리 채우기 (골드박스 + 카테고리별 베스트) ============
+# 골드박스/베스트는 요청마다가 아니라 일정에 따라 바뀜 → 주기적으로 미리 조회해서
+# 응답 캐시 + 단축 링크 (+ 골드박스는 다나와 가격) 캐시를 채워 두면 tool은 캐시만 읽고 응답
+# - 낮은 우선순위: 동시에 PREWARM_CONCURRENCY개만, 작업마다 실행 중인 tool 호출이 끝날 때까지 양보
+#   (최대 PREWARM_YIELD_MAX초 - 계속 바쁘면 그냥 진행), API 호출은 background (호출 한도 예비분 보호)
+# - 주기: PREWARM_INTERVAL초마다 + 매 정각 직후 (베스트 신선도 만료, 골드박스 리셋도 정각)
+#   워커마다 깨어나는 시각을 PREWARM_JITTER초 안에서 흩뜨림
+# - 워커 여러 개면 SQLite 임대(lease) 행을 가진 워커 하나만 실행, 그 워커가 죽으면 임대 만료 후 다른 워커가 이어받음
+# - 아직 신선한 응답은 다시 조회하지 않음
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "1") == "1"
+PREWARM_INTERVAL = float(os.getenv("PREWARM_INTERVAL", "300"))
+PREWARM_START_DELAY = float(os.getenv("PREWARM_START_DELAY", "5"))
+PREWARM_JITTER = float(os.getenv("PREWARM_JITTER", "10"))
+PREWARM_LEASE_DB = os.getenv("PREWARM_LEASE_DB", SHARED_CACHE_DB)
+PREWARM_LIMIT = int(os.getenv("PREWARM_LIMIT", "10"))  # 이 limit으로 부른 tool 호출이 캐시만 읽도록 (tool 기본값)
+PREWARM_CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", "2"))
+PREWARM_YIELD_MAX = float(os.getenv("PREWARM_YIELD_MAX", "2.0"))
+PREWARM_YIELD_POLL = 0.05
+
+
+def prewarm_targets() -> list:
+    """(이름, action, params, 보강 단계) - params/보강 단계는 해당 tool과 같게"""
+    targets = [("goldbox", "goldbox", {"limit": PREWARM_LIMIT * 2}, ("price", "link"))]
+    targets += [(f"best:{category_id}", "best", {"category_id": category_id, "limit": PREWARM_LIMIT * 2}, ("link",))
+                for category_id in BEST_CATEGORY_NAMES]
+    return targets
+
+
+class Lease:
+    """워커 여러 개 중 하나만 작업하도록 SQLite 행 하나로 임대 (보유 워커가 주기마다 갱신)"""
+
+    def __init__(self, db_path: str, name: str, ttl: float):
+        self.db_path = db_path
+        self.name = name
+        self.ttl = ttl
+        self.owner = str(os.getpid())
+        self.held = False
+        self._conn = None
+        self._disabled = False  # DB를 못 쓰면 임대 없이 실행 (워커마다 중복될 수 있음)
+        # SQLite 연결은 이 스레드 하나에서만 사용
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lease")
+
+    def _connect(self):
+        if self._conn is None and not self._disabled:
+            try:
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS leases ("
+                    "name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._conn = conn
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("lease disabled (%s): %s - every worker runs %s", self.db_path, e, self.name)
+                self._disabled = True
+        return self._conn
+
+    def _acquire(self) -> bool:
+        """비었거나 만료됐거나 내 임대면 (다시) 가져감"""
+        conn = self._connect()
+        if conn is None:
+            return True
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (self.name,)).fetchone()
+            held = row is None or row[0] == self.owner or row[1] <= now
+            if held:
+                conn.execute("INSERT OR REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)",
+                             (self.name, self.owner, now + self.ttl))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return held
+
+    def _release(self):
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (self.name, self.owner))
+
+    async def _run(self, fn):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn)
+
+    async def acquire(self) -> bool:
+        try:
+            self.held = await self._run(self._acquire)
+        except sqlite3.Error as e:
+            logger.warning("lease %s check failed: %s", self.name, e)
+            self.held = False
+        return self.held
+
+    async def close(self):
+        try:
+            if self.held:
+                await self._run(self._release)
+            if self._conn is not None:
+                await self._run(self._conn.close)
+        except sqlite3.Error as e:
+            logger.warning("lease %s release failed: %s", self.name, e)
+        self._conn = None
+        self.held = False
+        self._executor.shutdown(wait=False)
+
+
+class Prewarmer:
+    """주기적 미리 채우기 (백그라운드 태스크 하나, app_lifespan에서 시작/정지)"""
+
+    def __init__(self, concurrency: int, lease=None):
+        self.lease = lease  # None이면 항상 실행 (워커 1개)
+        self.task = None
+        self.runs = 0
+        self.fetched = 0  # 업스트림에서 새로 조회한 응답 수
+        self.fresh = 0  # 아직 신선해서 건너뛴 응답 수
+        self.enriched = 0  # 미리 조회한 가격/링크 수 (캐시 히트 포함)
+        self.errors = 0
+        self.yielded = 0  # tool 호출에 양보한 횟수
+        self.last_run_at = None
+        self.last_run_sec = None
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        if self.lease is not None:
+            await self.lease.close()
+
+    async def _loop(self):
+        await asyncio.sleep(PREWARM_START_DELAY + random.uniform(0, PREWARM_JITTER))
+        while True:
+            if self.lease is None or await self.lease.acquire():
+                await self.run_once()
+            # 다음 주기와 다음 정각 직후 중 빠른 쪽
+            wait = min(PREWARM_INTERVAL, next_hour_boundary() - time.time() + 1.0)
+            await asyncio.sleep(wait + random.uniform(0, PREWARM_JITTER))
+
+    async def run_once(self):
+        started = time.monotonic()
+        for name, action, params, enrichers in prewarm_targets():
+            try:
+                await self.warm(action, params, enrichers)
+            except (QuotaExhausted, UpstreamUnavailable) as e:
+                # 한도 예비분 보호 / Retry-After 기간 → 이번 주기는 여기까지
+                self.errors += 1
+                logger.debug("prewarm stopped at %s: %s", name, type(e).__name__)
+                break
+            except Exception as e:
+                self.errors += 1
+                logger.warning("prewarm failed (%s): %s", name, e)
+        self.runs += 1
+        self.last_run_at = time.time()
+        self.last_run_sec = round(time.monotonic() - started, 3)
+
+    async def warm(self, action: str, params: dict, enrichers: tuple):
+        key = request_key(action, params)
+        # 신선도만 보면 되므로 lookup(히트율 집계) 대신 백엔드 직접 조회
+        entry = await response_cache.backend.get(key)
+        if entry is not None and time.time() < entry[1]:
+            data = entry[0]
+            self.fresh += 1
+        else:
+            await self.yield_to_tools()
+            data = await api_flight.do(key, fetch_and_store, key, action, params, True)
+            if not is_ok_response(data):
+                raise RuntimeError(data.get("message") or data.get("rMessage") or str(data))
+            self.fetched += 1
+
+        # tool은 로켓배송만 보여줌 → limit과 상관없이 로켓배송 상품 전부
+        items = [ProductItem(p) for p in dedupe_products(extract_products(action, data)) if p.get("isRocket", False)]
+        await asyncio.gather(*(self.enrich(ENRICHERS[name], item) for name in enrichers for item in items))
+
+    async def enrich(self, enricher: Enricher, item: ProductItem):
+        async with self._semaphore:
+            await self.yield_to_tools()
+            coro = enricher.start(item)
+            if coro is not None:
+                await coro
+                self.enriched += 1
+
+    async def yield_to_tools(self):
+        """실행 중인 tool 호출이 있으면 끝날 때까지 대기 (최대 PREWARM_YIELD_MAX초)"""
+        if not mcp.active_calls:
+            return
+        self.yielded += 1
+        deadline = time.monotonic() + PREWARM_YIELD_MAX
+        while mcp.active_calls and time.monotonic() < deadline:
+            await asyncio.sleep(PREWARM_YIELD_POLL)
+
+    def stats(self) -> dict:
         return {
-            "name": name,
-            "short_url": short_url,
-            "discount_rate": discount_rate,
-            "danawa_price": final_price
+            "enabled": PREWARM_ENABLED,
+            "running": self.task is not None and not self.task.done(),
+            "leader": self.lease.held if self.lease is not None else True,
+            "runs": self.runs,
+            "fetched": self.fetched,
+            "fresh": self.fresh,
+            "enriched": self.enriched,
+            "errors": self.errors,
+            "yielded": self.yielded,
+            "last_run_at": self.last_run_at,
+            "last_run_sec": self.last_run_sec,
         }
 
-    # 모든 상품 정보 병렬 조회
-    product_infos = await asyncio.gather(*[get_product_info(p) for p in sorted_products])
-
-    # 최대 할인율
-    discounts = [p.get("discountRate", 0) for p in sorted_products if p.get("discountRate", 0) > 0]
-    max_discount = max(discounts) if discounts else 0
-
-    lines = [f"# goldbox TOP {len(sorted_products)} (max {max_discount}% off)\n"]
-
-    for idx, info in enumerate(product_infos, 1):
-        parsed = parse_product_name(info["name"])
-        discount = f" -{info['discount_rate']}%" if info["discount_rate"] > 0 else ""
-
-        lines.append(f"{idx}) {parsed['base']}{discount}")
-        if parsed["options"]:
-            lines.append(f"   옵션: {' / '.join(parsed['options'])}")
-        if info["danawa_price"]:
-            lines.append(f"   가격: {format_price(info['danawa_price'])}")
-        lines.append(f"   보러가기: {info['short_url']}")
-        lines.append("")
 
-    return "\n".join(lines) + PRICE_DISCLAIMER
+# 임대는 다음 주기(+흩뜨림)까지 넉넉히 유지 → 보유 워커가 죽으면 그 뒤 다른 워커가 이어받음
+prewarmer = Prewarmer(
+    PREWARM_CONCURRENCY,
+    Lease(PREWARM_LEASE_DB, "prewarm", 2 * (PREWARM_INTERVAL + PREWARM_JITTER)) if WORKERS > 1 else None,
+)
 
 
-if __name__ == "__main__":
-    import uvicorn
+def create_app():
+    """MCP 앱 + 부가 라우트 + 수명주기 연결
 
-    # 포트 설정 (Hugging Face Spaces는 7860 사용)
+    워커 여러 개로 실행할 때는 워커마다 호출됨 (uvicorn http_server:create_app --factory)
+    """
     port = int(os.getenv("PORT", "7860"))
 
     # FastMCP 설정
@@ -1926,5 +3619,27 @@ if __name__ == "__main__":
     # server-card 및 icon 라우트를 MCP 앱에 직접 추가
     mcp_app.routes.insert(0, Route("/.well-known/mcp/server-card.json", server_card_endpoint, methods=["GET"]))
     mcp_app.routes.insert(0, Route("/icon.svg", icon_endpoint, methods=["GET"]))
+    mcp_app.routes.insert(0, Route("/admin/cache", admin_cache_endpoint, methods=["GET", "DELETE"]))
+    mcp_app.routes.insert(0, Route("/admin/upstreams", admin_upstreams_endpoint, methods=["GET"]))
+    mcp_app.routes.insert(0, Route("/admin/pipeline", admin_pipeline_endpoint, methods=["GET"]))
+    mcp_app.routes.insert(0, Route("/admin/catalog", admin_catalog_endpoint, methods=["GET", "POST"]))
+    if METRICS_ENABLED:
+        mcp_app.routes.insert(0, Route("/metrics", metrics_endpoint, methods=["GET"]))
 
-    uvicorn.run(mcp_app, host="0.0.0.0", port=port)
+    # 공유 커넥션 풀을 앱 수명주기에 연결
+    attach_lifespan(mcp_app)
+    return mcp_app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # 포트 설정 (Hugging Face Spaces는 7860 사용)
+    port = int(os.getenv("PORT", "7860"))
+
+    if WORKERS > 1:
+        # 워커 프로세스마다 모듈을 새로 import해서 앱 생성 (리스닝 소켓은 부모 프로세스가 공유)
+        logger.info("워커 %d개, stateless=%s, json_response=%s", WORKERS, MCP_STATELESS, MCP_JSON_RESPONSE)
+        uvicorn.run("http_server:create_app", factory=True, host="0.0.0.0", port=port, workers=WORKERS)
+    else:
+        uvicorn.run(create_app(), host="0.0.0.0", port=port)
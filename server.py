@@ -1,8 +1,13 @@
 import os
+import random
+import logging
+import asyncio
 import hmac
 import hashlib
 import httpx
-from time import strftime, gmtime
+from contextlib import asynccontextmanager
+from time import strftime, gmtime, monotonic, time
+from email.utils import parsedate_to_datetime
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
 from urllib.parse import urlencode
@@ -10,24 +15,223 @@ from urllib.parse import urlencode
 # .env 파일 로드
 load_dotenv()
 
+# stdio MCP라 stdout은 프로토콜 전용 → 로그는 stderr (FastMCP 기본 로깅 설정)
+logger = logging.getLogger("coupang_mcp")
+
 COUPANG_ACCESS_KEY = os.getenv("COUPANG_ACCESS_KEY")
 COUPANG_SECRET_KEY = os.getenv("COUPANG_SECRET_KEY")
 
-if not COUPANG_ACCESS_KEY or not COUPANG_SECRET_KEY:
-    raise ValueError("Error: .env 파일에 COUPANG_ACCESS_KEY와 COUPANG_SECRET_KEY를 설정해주세요.")
+# 추가 키: "access:secret,access:secret" (키마다 호출 한도가 따로 있으므로 등록한 키 수만큼 처리량 증가)
+COUPANG_KEYS = os.getenv("COUPANG_KEYS", "")
+# 키별 호출 한도 "호출 수/초" (예: 50/60 = 분당 50회)
+COUPANG_KEY_QUOTA = os.getenv("COUPANG_KEY_QUOTA", "50/60")
+# 스로틀링(429) 후 그 키를 쉬게 하는 시간 (연속이면 2배씩, 최대 COUPANG_KEY_COOLDOWN_MAX)
+COUPANG_KEY_COOLDOWN = float(os.getenv("COUPANG_KEY_COOLDOWN", "60"))
+COUPANG_KEY_COOLDOWN_MAX = float(os.getenv("COUPANG_KEY_COOLDOWN_MAX", "900"))
+# 인증 실패(401/403, 키 만료/오류) 후 쉬는 시간
+COUPANG_KEY_AUTH_COOLDOWN = float(os.getenv("COUPANG_KEY_AUTH_COOLDOWN", "600"))
+
+
+def load_credentials() -> list:
+    """(access, secret) 목록 - COUPANG_ACCESS_KEY/SECRET_KEY 한 쌍 + COUPANG_KEYS"""
+    pairs = []
+    if COUPANG_ACCESS_KEY and COUPANG_SECRET_KEY:
+        pairs.append((COUPANG_ACCESS_KEY, COUPANG_SECRET_KEY))
+    for item in COUPANG_KEYS.split(","):
+        access_key, _, secret_key = item.strip().partition(":")
+        if access_key and secret_key and (access_key, secret_key) not in pairs:
+            pairs.append((access_key, secret_key))
+    return pairs
+
+
+CREDENTIALS = load_credentials()
+
+if not CREDENTIALS:
+    raise ValueError("Error: .env 파일에 COUPANG_ACCESS_KEY와 COUPANG_SECRET_KEY(또는 COUPANG_KEYS)를 설정해주세요.")
 
 DOMAIN = "https://api-gateway.coupang.com"
 
-mcp = FastMCP("Coupang")
+
+# ============ API 키 풀 ============
+class Credential:
+    """API 키 한 쌍 + 남은 호출 한도(토큰 버킷) + 상태"""
+
+    def __init__(self, access_key: str, secret_key: str, capacity: float, rate: float):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated_at = monotonic()
+        self.cooldown_until = 0.0
+        self.strikes = 0  # 연속 스로틀링 횟수
+        self.calls = 0
+        self.throttled = 0
+        self.auth_failures = 0
+        self.server_errors = 0
+
+    def budget(self, now: float) -> float:
+        """지금 남은 한도 (충전 반영)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        return self.tokens
+
+    def available(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def cool_down(self, seconds: float, now: float):
+        self.cooldown_until = max(self.cooldown_until, now + seconds)
+
+    def stats(self, now: float) -> dict:
+        return {
+            "access_key": self.access_key[:8] + "…",
+            "budget": round(self.budget(now), 2),
+            "cooldown_sec": round(max(self.cooldown_until - now, 0.0), 1),
+            "calls": self.calls,
+            "throttled": self.throttled,
+            "auth_failures": self.auth_failures,
+            "server_errors": self.server_errors,
+        }
+
+
+def parse_retry_after(value: str):
+    """Retry-After 헤더 (초 또는 HTTP 날짜) → 초, 없거나 해석 불가면 None"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class CredentialPool:
+    """여러 API 키 중 쉬는 중이 아니고 남은 한도가 가장 많은 키를 골라 서명"""
+
+    def __init__(self, pairs: list, quota: str):
+        calls, _, period = quota.partition("/")
+        capacity = float(calls)
+        rate = capacity / float(period or 1)
+        self.keys = [Credential(access_key, secret_key, capacity, rate) for access_key, secret_key in pairs]
+        self._by_access_key = {credential.access_key: credential for credential in self.keys}
+
+    def pick(self) -> Credential:
+        """서명할 키 선택 후 한도 1 차감 (모두 쉬는 중이면 가장 먼저 풀리는 키)"""
+        now = monotonic()
+        available = [credential for credential in self.keys if credential.available(now)]
+        if available:
+            credential = max(available, key=lambda c: c.budget(now))
+        else:
+            credential = min(self.keys, key=lambda c: c.cooldown_until)
+            credential.budget(now)
+        credential.tokens -= 1
+        credential.calls += 1
+        return credential
+
+    def record(self, access_key: str, status_code: int, retry_after: str = None):
+        """응답 결과를 키 상태에 반영"""
+        credential = self._by_access_key.get(access_key)
+        if credential is None:
+            return
+        now = monotonic()
+        if status_code == 429:
+            credential.throttled += 1
+            credential.strikes += 1
+            cooldown = min(COUPANG_KEY_COOLDOWN * 2 ** (credential.strikes - 1), COUPANG_KEY_COOLDOWN_MAX)
+            credential.cool_down(max(cooldown, parse_retry_after(retry_after) or 0.0), now)
+            # 실제 한도가 설정보다 작다는 뜻 → 남은 한도를 비움
+            credential.budget(now)
+            credential.tokens = min(credential.tokens, 0.0)
+            logger.warning("API 키 스로틀링(429) → 쉬는 중: %s", credential.stats(now))
+        elif status_code in (401, 403):
+            credential.auth_failures += 1
+            credential.cool_down(COUPANG_KEY_AUTH_COOLDOWN, now)
+            logger.warning("API 키 인증 실패(%d) → 쉬는 중: %s", status_code, credential.stats(now))
+        elif status_code >= 500:
+            # 게이트웨이/서버 오류는 키 문제가 아님 → 집계만
+            credential.server_errors += 1
+        else:
+            credential.strikes = 0
+
+    def stats(self) -> list:
+        now = monotonic()
+        return [credential.stats(now) for credential in self.keys]
+
+
+credential_pool = CredentialPool(CREDENTIALS, COUPANG_KEY_QUOTA)
+
+
+async def record_key_response(response: httpx.Response):
+    """쿠팡 API 응답을 서명한 키의 상태에 반영 (공유 클라이언트 response hook)"""
+    authorization = response.request.headers.get("Authorization", "")
+    if "access-key=" not in authorization:
+        return
+    access_key = authorization.split("access-key=", 1)[1].split(",", 1)[0]
+    credential_pool.record(access_key, response.status_code, response.headers.get("Retry-After"))
+
+# 공유 커넥션 풀 설정 (요청마다 TCP+TLS 핸드셰이크 방지)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") == "1"
+
+_http_client = None
+
+
+def http2_available() -> bool:
+    """HTTP/2 사용 가능 여부 (h2 패키지가 없으면 HTTP/1.1로 동작)"""
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """프로세스 공유 클라이언트 반환 (없으면 생성)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+        _http_client = httpx.AsyncClient(
+            http2=http2_available(), limits=limits,
+            event_hooks={"response": [record_key_response]},
+        )
+    return _http_client
+
+
+@asynccontextmanager
+async def app_lifespan(server):
+    """서버 수명주기: 시작 시 커넥션 풀 생성, 종료 시 정리"""
+    global _http_client
+    get_http_client()
+    try:
+        yield {}
+    finally:
+        logger.info("API 키 상태: %s", credential_pool.stats())
+        if _http_client is not None:
+            await _http_client.aclose()
+            _http_client = None
 
 
-def generate_hmac(method: str, url_path: str, datetime: str) -> str:
+mcp = FastMCP("Coupang", lifespan=app_lifespan)
+
+
+def generate_hmac(method: str, url_path: str, datetime: str, secret_key: str = None) -> str:
     """HMAC 서명 생성 - 쿠팡 API 형식"""
     # 형식: datetime + method + path + query (공백 없이 연결)
     # url_path에는 쿼리스트링이 포함될 수 있음 (예: /path?param=value)
     message = datetime + method + url_path
     signature = hmac.new(
-        COUPANG_SECRET_KEY.encode('utf-8'),
+        (secret_key or CREDENTIALS[0][1]).encode('utf-8'),
         message.encode('utf-8'),
         hashlib.sha256
     ).hexdigest()
@@ -39,25 +243,26 @@ async def get_real_image_url(image_url: str) -> str:
     if not image_url:
         return ""
     try:
-        async with httpx.AsyncClient(follow_redirects=False) as client:
-            response = await client.head(image_url, timeout=5.0)
-            if response.status_code == 302:
-                return response.headers.get("location", image_url)
-    except:
+        response = await get_http_client().head(image_url, timeout=5.0)
+        if response.status_code == 302:
+            return response.headers.get("location", image_url)
+    except Exception:
         pass
     return image_url
 
 
 def get_authorization_header(method: str, path: str, query_string: str = "") -> dict:
-    """인증 헤더 생성"""
+    """인증 헤더 생성 (키 풀에서 남은 한도가 가장 많은 키로 서명)"""
+    credential = credential_pool.pick()
+
     # GMT 시간 사용: yymmddTHHmmssZ 형식
     datetime = strftime('%y%m%d', gmtime()) + 'T' + strftime('%H%M%S', gmtime()) + 'Z'
 
     # path + query_string 조합 (? 없이 직접 연결)
     url_path = path + query_string
-    signature = generate_hmac(method, url_path, datetime)
+    signature = generate_hmac(method, url_path, datetime, credential.secret_key)
 
-    authorization = f"CEA algorithm=HmacSHA256, access-key={COUPANG_ACCESS_KEY}, signed-date={datetime}, signature={signature}"
+    authorization = f"CEA algorithm=HmacSHA256, access-key={credential.access_key}, signed-date={datetime}, signature={signature}"
 
     return {
         "Authorization": authorization,
@@ -65,6 +270,105 @@ def get_authorization_header(method: str, path: str, query_string: str = "") ->
     }
 
 
+# ============ 재시도 (백오프 + 전역 예산 + Retry-After) ============
+# - 재시도 대상: 타임아웃/연결 오류, 429/500/502/503/504 (GET만, 딥링크 POST는 재시도하지 않음)
+# - 시도마다 다시 서명 → 429로 쉬게 된 키 대신 다른 키로 재시도
+# - 대기: 지수 백오프 full jitter, 전역 예산으로 재시도가 요청량의 일정 비율을 넘지 않게
+# - 503 + Retry-After(점검): 그 시각까지 호출하지 않고 바로 오류 (최대 RETRY_AFTER_MAX초)
+#   429의 Retry-After는 키 단위라 키 풀에서 처리
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))  # 첫 요청 포함
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.2"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "3.0"))
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+RETRY_BUDGET_MIN_PER_SEC = float(os.getenv("RETRY_BUDGET_MIN_PER_SEC", "1.0"))
+RETRY_BUDGET_MAX = float(os.getenv("RETRY_BUDGET_MAX", "20"))
+RETRY_AFTER_MAX = float(os.getenv("RETRY_AFTER_MAX", "300"))
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class UpstreamUnavailable(Exception):
+    """Retry-After 기간이라 쿠팡 API를 호출하지 않음"""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"쿠팡 API 서버가 일시 중단 상태입니다. {retry_in:.0f}초 후 다시 시도해주세요.")
+        self.retry_in = retry_in
+
+
+class RetryBudget:
+    """전역 재시도 예산 (토큰 버킷)"""
+
+    def __init__(self, ratio: float, min_per_sec: float, max_tokens: float):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.updated_at = monotonic()
+
+    def _refill(self):
+        now = monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self.updated_at) * self.min_per_sec)
+        self.updated_at = now
+
+    def deposit(self):
+        """일반 요청 1회"""
+        self._refill()
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """재시도 1회 (예산이 없으면 False)"""
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+retry_budget = RetryBudget(RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN_PER_SEC, RETRY_BUDGET_MAX)
+_retry_after_until = 0.0  # 503 Retry-After로 막힌 시각 (monotonic)
+
+
+def backoff_delay(attempt: int) -> float:
+    """attempt번째 재시도 전 대기 (full jitter)"""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def coupang_request(method: str, path: str, query_string: str = "", json: dict = None) -> httpx.Response:
+    """서명 + 재시도를 포함한 쿠팡 API 호출 (마지막 응답 또는 예외 반환)"""
+    global _retry_after_until
+    retry_in = _retry_after_until - monotonic()
+    if retry_in > 0:
+        raise UpstreamUnavailable(retry_in)
+
+    full_url = f"{DOMAIN}{path}?{query_string}" if query_string else f"{DOMAIN}{path}"
+    retry_budget.deposit()
+    attempt = 0
+    while True:
+        delay = None
+        headers = get_authorization_header(method, path, query_string)
+        try:
+            response = await get_http_client().request(method, full_url, headers=headers, json=json, timeout=30.0)
+        except (httpx.TimeoutException, httpx.NetworkError) as e:
+            error = e
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            error = None
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None and response.status_code == 503:
+                # 알려준 시각까지 호출하지 않음 (짧으면 그만큼 기다렸다가 재시도)
+                _retry_after_until = monotonic() + min(retry_after, RETRY_AFTER_MAX)
+                if retry_after > RETRY_MAX_DELAY:
+                    return response
+                delay = retry_after
+
+        attempt += 1
+        if method != "GET" or attempt >= RETRY_MAX_ATTEMPTS or not retry_budget.withdraw():
+            if error is not None:
+                raise error
+            return response
+        await asyncio.sleep(backoff_delay(attempt) if delay is None else delay)
+
+
 @mcp.tool()
 async def search_coupang_products(keyword: str, limit: int = 5) -> str:
     """
@@ -84,55 +388,50 @@ async def search_coupang_products(keyword: str, limit: int = 5) -> str:
     }
     query_string = urlencode(params)
 
-    # HMAC 서명에 쿼리스트링 포함
-    headers = get_authorization_header("GET", path, query_string)
-    full_url = f"{DOMAIN}{path}?{query_string}"
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(full_url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
+    try:
+        response = await coupang_request("GET", path, query_string)
+        response.raise_for_status()
+        data = response.json()
 
-            if data.get("rCode") != "0":
-                return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
+        if data.get("rCode") != "0":
+            return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
 
-            products = data.get("data", {}).get("productData", [])
+        products = data.get("data", {}).get("productData", [])
 
-            if not products:
-                return f"'{keyword}' 검색 결과가 없습니다."
+        if not products:
+            return f"'{keyword}' 검색 결과가 없습니다."
 
-            formatted_results = [f"## 🛒 '{keyword}' 검색 결과\n"]
+        formatted_results = [f"## 🛒 '{keyword}' 검색 결과\n"]
 
-            for idx, product in enumerate(products[:limit], 1):
-                name = product.get("productName", "")
-                price = product.get("productPrice", 0)
-                url = product.get("productUrl", "")
-                image = product.get("productImage", "")
-                is_rocket = product.get("isRocket", False)
-                is_free_shipping = product.get("isFreeShipping", False)
+        for idx, product in enumerate(products[:limit], 1):
+            name = product.get("productName", "")
+            price = product.get("productPrice", 0)
+            url = product.get("productUrl", "")
+            image = product.get("productImage", "")
+            is_rocket = product.get("isRocket", False)
+            is_free_shipping = product.get("isFreeShipping", False)
 
-                rocket_badge = "🚀 로켓배송" if is_rocket else ""
-                shipping_badge = "📦 무료배송" if is_free_shipping else ""
-                badges = " ".join(filter(None, [rocket_badge, shipping_badge]))
+            rocket_badge = "🚀 로켓배송" if is_rocket else ""
+            shipping_badge = "📦 무료배송" if is_free_shipping else ""
+            badges = " ".join(filter(None, [rocket_badge, shipping_badge]))
 
-                # 이미지 URL을 실제 CDN URL로 변환
-                real_image = await get_real_image_url(image) if image else ""
-                image_md = f"![{name[:20]}]({real_image})\n\n" if real_image else ""
+            # 이미지 URL을 실제 CDN URL로 변환
+            real_image = await get_real_image_url(image) if image else ""
+            image_md = f"![{name[:20]}]({real_image})\n\n" if real_image else ""
 
-                formatted_results.append(
-                    f"### {idx}. {name}\n\n"
-                    f"{image_md}"
-                    f"- **가격**: {int(price):,}원 {badges}\n"
-                    f"- **구매링크**: [{name[:30]}...]({url})\n"
-                )
+            formatted_results.append(
+                f"### {idx}. {name}\n\n"
+                f"{image_md}"
+                f"- **가격**: {int(price):,}원 {badges}\n"
+                f"- **구매링크**: [{name[:30]}...]({url})\n"
+            )
 
-            return "\n".join(formatted_results)
+        return "\n".join(formatted_results)
 
-        except httpx.HTTPStatusError as e:
-            return f"HTTP 오류: {e.response.status_code} - {e.response.text}"
-        except Exception as e:
-            return f"오류 발생: {str(e)}"
+    except httpx.HTTPStatusError as e:
+        return f"HTTP 오류: {e.response.status_code} - {e.response.text}"
+    except Exception as e:
+        return f"오류 발생: {str(e)}"
 
 
 @mcp.tool()
@@ -181,52 +480,47 @@ async def get_coupang_best_products(category_id: int = 1001, limit: int = 5) ->
     }
     query_string = urlencode(params)
 
-    # HMAC 서명에 쿼리스트링 포함
-    headers = get_authorization_header("GET", path, query_string)
-    full_url = f"{DOMAIN}{path}?{query_string}"
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(full_url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
+    try:
+        response = await coupang_request("GET", path, query_string)
+        response.raise_for_status()
+        data = response.json()
 
-            if data.get("rCode") != "0":
-                return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
+        if data.get("rCode") != "0":
+            return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
 
-            products = data.get("data", [])
+        products = data.get("data", [])
 
-            if not products:
-                return f"카테고리 {category_id} 베스트 상품이 없습니다."
+        if not products:
+            return f"카테고리 {category_id} 베스트 상품이 없습니다."
 
-            category_name = category_names.get(category_id, str(category_id))
-            formatted_results = [f"## 🏆 [{category_name}] 베스트 상품\n"]
+        category_name = category_names.get(category_id, str(category_id))
+        formatted_results = [f"## 🏆 [{category_name}] 베스트 상품\n"]
 
-            for idx, product in enumerate(products[:limit], 1):
-                name = product.get("productName", "")
-                price = product.get("productPrice", 0)
-                url = product.get("productUrl", "")
-                image = product.get("productImage", "")
-                rank = product.get("rank", idx)
-                is_rocket = product.get("isRocket", False)
+        for idx, product in enumerate(products[:limit], 1):
+            name = product.get("productName", "")
+            price = product.get("productPrice", 0)
+            url = product.get("productUrl", "")
+            image = product.get("productImage", "")
+            rank = product.get("rank", idx)
+            is_rocket = product.get("isRocket", False)
 
-                rocket_badge = "🚀 로켓배송" if is_rocket else ""
-                real_image = await get_real_image_url(image) if image else ""
-                image_md = f"![{name[:20]}]({real_image})\n\n" if real_image else ""
+            rocket_badge = "🚀 로켓배송" if is_rocket else ""
+            real_image = await get_real_image_url(image) if image else ""
+            image_md = f"![{name[:20]}]({real_image})\n\n" if real_image else ""
 
-                formatted_results.append(
-                    f"### {rank}위. {name}\n\n"
-                    f"{image_md}"
-                    f"- **가격**: {int(price):,}원 {rocket_badge}\n"
-                    f"- **구매링크**: [{name[:30]}...]({url})\n"
-                )
+            formatted_results.append(
+                f"### {rank}위. {name}\n\n"
+                f"{image_md}"
+                f"- **가격**: {int(price):,}원 {rocket_badge}\n"
+                f"- **구매링크**: [{name[:30]}...]({url})\n"
+            )
 
-            return "\n".join(formatted_results)
+        return "\n".join(formatted_results)
 
-        except httpx.HTTPStatusError as e:
-            return f"HTTP 오류: {e.response.status_code} - {e.response.text}"
-        except Exception as e:
-            return f"오류 발생: {str(e)}"
+    except httpx.HTTPStatusError as e:
+        return f"HTTP 오류: {e.response.status_code} - {e.response.text}"
+    except Exception as e:
+        return f"오류 발생: {str(e)}"
 
 
 @mcp.tool()
@@ -242,35 +536,31 @@ async def generate_coupang_deeplink(original_url: str) -> str:
     """
     path = "/v2/providers/affiliate_open_api/apis/openapi/v1/deeplink"
 
-    headers = get_authorization_header("POST", path)
-    full_url = f"{DOMAIN}{path}"
-
     body = {
         "coupangUrls": [original_url]
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(full_url, headers=headers, json=body, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
+    try:
+        response = await coupang_request("POST", path, json=body)
+        response.raise_for_status()
+        data = response.json()
 
-            if data.get("rCode") != "0":
-                return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
+        if data.get("rCode") != "0":
+            return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
 
-            links = data.get("data", [])
+        links = data.get("data", [])
 
-            if not links:
-                return "딥링크 생성에 실패했습니다."
+        if not links:
+            return "딥링크 생성에 실패했습니다."
 
-            deeplink = links[0].get("shortenUrl", "")
+        deeplink = links[0].get("shortenUrl", "")
 
-            return f"## 🔗 딥링크 생성 완료\n\n**원본 URL**: {original_url}\n\n**상품 링크**: {deeplink}\n\n> 이 링크로 구매 가능합니다."
+        return f"## 🔗 딥링크 생성 완료\n\n**원본 URL**: {original_url}\n\n**상품 링크**: {deeplink}\n\n> 이 링크로 구매 가능합니다."
 
-        except httpx.HTTPStatusError as e:
-            return f"HTTP 오류: {e.response.status_code} - {e.response.text}"
-        except Exception as e:
-            return f"오류 발생: {str(e)}"
+    except httpx.HTTPStatusError as e:
+        return f"HTTP 오류: {e.response.status_code} - {e.response.text}"
+    except Exception as e:
+        return f"오류 발생: {str(e)}"
 
 
 @mcp.tool()
@@ -288,52 +578,47 @@ async def get_coupang_goldbox(limit: int = 10) -> str:
     params = {"limit": min(limit, 100)}
     query_string = urlencode(params)
 
-    headers = get_authorization_header("GET", path, query_string)
-    full_url = f"{DOMAIN}{path}?{query_string}"
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(full_url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get("rCode") != "0":
-                return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
-
-            products = data.get("data", [])
-
-            if not products:
-                return "골드박스 상품이 없습니다."
-
-            formatted_results = ["## 🎁 골드박스 특가 상품\n"]
-
-            for idx, product in enumerate(products[:limit], 1):
-                name = product.get("productName", "")
-                price = product.get("productPrice", 0)
-                original_price = product.get("originalPrice", price)
-                url = product.get("productUrl", "")
-                image = product.get("productImage", "")
-                is_rocket = product.get("isRocket", False)
-                discount_rate = product.get("discountRate", 0)
-
-                rocket_badge = "🚀 로켓배송" if is_rocket else ""
-                discount_text = f"({discount_rate}% 할인)" if discount_rate else ""
-                real_image = await get_real_image_url(image) if image else ""
-                image_md = f"![{name[:20]}]({real_image})\n\n" if real_image else ""
-
-                formatted_results.append(
-                    f"### {idx}. {name}\n\n"
-                    f"{image_md}"
-                    f"- **특가**: {int(price):,}원 {discount_text} {rocket_badge}\n"
-                    f"- **구매링크**: [{name[:30]}...]({url})\n"
-                )
-
-            return "\n".join(formatted_results)
-
-        except httpx.HTTPStatusError as e:
-            return f"HTTP 오류: {e.response.status_code} - {e.response.text}"
-        except Exception as e:
-            return f"오류 발생: {str(e)}"
+    try:
+        response = await coupang_request("GET", path, query_string)
+        response.raise_for_status()
+        data = response.json()
+
+        if data.get("rCode") != "0":
+            return f"API 오류: {data.get('rMessage', '알 수 없는 오류')}"
+
+        products = data.get("data", [])
+
+        if not products:
+            return "골드박스 상품이 없습니다."
+
+        formatted_results = ["## 🎁 골드박스 특가 상품\n"]
+
+        for idx, product in enumerate(products[:limit], 1):
+            name = product.get("productName", "")
+            price = product.get("productPrice", 0)
+            url = product.get("productUrl", "")
+            image = product.get("productImage", "")
+            is_rocket = product.get("isRocket", False)
+            discount_rate = product.get("discountRate", 0)
+
+            rocket_badge = "🚀 로켓배송" if is_rocket else ""
+            discount_text = f"({discount_rate}% 할인)" if discount_rate else ""
+            real_image = await get_real_image_url(image) if image else ""
+            image_md = f"![{name[:20]}]({real_image})\n\n" if real_image else ""
+
+            formatted_results.append(
+                f"### {idx}. {name}\n\n"
+                f"{image_md}"
+                f"- **특가**: {int(price):,}원 {discount_text} {rocket_badge}\n"
+                f"- **구매링크**: [{name[:30]}...]({url})\n"
+            )
+
+        return "\n".join(formatted_results)
+
+    except httpx.HTTPStatusError as e:
+        return f"HTTP 오류: {e.response.status_code} - {e.response.text}"
+    except Exception as e:
+        return f"오류 발생: {str(e)}"
 
 
 if __name__ == "__main__":
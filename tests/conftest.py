@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# http_server import 시 캐시/장부 파일이 작업 디렉터리에 생기지 않도록
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="coupang-test-"))
+os.environ.setdefault("PREWARM_ENABLED", "0")
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from http_server import SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+
+    async def fetch(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def main():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(*(flight.do("k", fetch, 21) for _ in range(5)))
+        return flight, results
+
+    flight, results = run(main())
+    assert results == [42] * 5
+    assert calls == [21]
+    assert flight.stats() == {"inflight": 0, "calls": 1, "shared": 4}
+
+
+def test_exception_reaches_every_caller():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+        return flight, results
+
+    flight, results = run(main())
+    assert all(isinstance(r, ValueError) and str(r) == "boom" for r in results)
+    assert flight.stats()["inflight"] == 0
+
+
+def test_one_cancelled_caller_keeps_shared_call_running():
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        flight = SingleFlight("test")
+        first = asyncio.create_task(flight.do("k", slow))
+        second = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert run(main()) == "done"
+
+
+def test_last_cancelled_caller_cancels_shared_call():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        flight = SingleFlight("test")
+        waiter = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+        return flight
+
+    flight = run(main())
+    assert cancelled == [True]
+    assert flight.stats()["inflight"] == 0
+
+
+def test_new_caller_after_cancel_does_not_join_dying_call():
+    async def fetch(value):
+        await asyncio.sleep(0.01)
+        return value
+
+    async def main():
+        flight = SingleFlight("test")
+        waiter = asyncio.create_task(flight.do("k", fetch, "old"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # 취소된 Task의 done 콜백이 돌기 전에 같은 키로 호출
+        return await flight.do("k", fetch, "new")
+
+    assert run(main()) == "new"